@@ -1,9 +1,28 @@
+import os
+import re
+import sys
 import uuid
 import json
-from datetime import datetime
-import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog, scrolledtext
-from tkinter.font import Font
+import time
+import heapq
+import argparse
+import threading
+from search_index import CustomerIndex, fold
+from jsonstream import iter_array
+from persistence import atomic_write, BackgroundSaver
+import bulk_import
+import export
+from compact import new_id, now_ts, id_to_bytes, ts_from_str, id_field, date_field
+import instrumentation
+from instrumentation import timed
+import analytics
+from analytics import SalesRollups
+from columnar import SalesColumns
+from tickets import TicketStore
+from dedup import DedupIndex
+from summary_cache import SummaryCache
+from query import SortedKeys, prefix_range
+import binsnap
 
 # Stil sabitleri
 BG_COLOR = "#f0f0f0"
@@ -19,9 +38,44 @@ BUTTON_STYLE = {
     "font": ("Helvetica", 10)
 }
 
+# Komut satırı dışa aktarım türleri (bkz. export)
+DISA_AKTARIM_TURLERI = {"musteriler": "customers", "satislar": "sales", "destekler": "tickets"}
+
+# Bu uzantıyla kaydedilen veriler ikili anlık görüntü biçiminde yazılır (bkz. binsnap)
+IKILI_UZANTI = ".bin"
+# Açık ikili dosyanın yerine geçecek yeni dosya önce bu ekle yanına yazılır (veriler.yeni.bin)
+BEKLEYEN_EKI = ".yeni"
+
+# Destek talebi durumları: izin verilen geçişler; yeni talepler "Açık" olarak kuyruğa girer
+DESTEK_GECISLERI = {
+    "Açık": ("İşlemde", "Kapalı"),
+    "İşlemde": ("Beklemede", "Çözüldü", "Kapalı"),
+    "Beklemede": ("İşlemde", "Kapalı"),
+    "Çözüldü": ("Kapalı", "Açık"),
+    "Kapalı": ("Açık",),
+}
+KAPALI_DURUMLAR = ("Çözüldü", "Kapalı")
+
+# tkinter yalnızca arayüz açılırken yüklenir; CRM çekirdeği ekransız ortamda da kullanılabilir
+tk = ttk = messagebox = simpledialog = scrolledtext = filedialog = Font = None
+
+
+def tk_yukle():
+    global tk, ttk, messagebox, simpledialog, scrolledtext, filedialog, Font
+    import tkinter as tk
+    from tkinter import ttk, messagebox, simpledialog, scrolledtext, filedialog
+    from tkinter.font import Font
+
+
 class ModernCRMApp:
-    def __init__(self, crm):
+    def __init__(self, crm, otomatik_kayit_suresi=60):
+        tk_yukle()
         self.crm = crm
+        # Kayıtlar arka planda yazılır; arayüz diske yazımı beklemez
+        if self.crm.kaydedici is None:
+            self.crm.kaydedici = BackgroundSaver()
+        self.otomatik_kayit_suresi = otomatik_kayit_suresi
+        self.yukleniyor = False
         self.root = tk.Tk()
         self.root.title("Modern CRM Sistemi")
         self.root.geometry("1000x600")
@@ -33,7 +87,59 @@ class ModernCRMApp:
         
         self.create_widgets()
         self.center_window()
-        
+        self.root.protocol("WM_DELETE_WINDOW", self.kapat)
+        # Ölçüm kısayolları: F9 aç/kapat, F10 metrikleri yaz, F11 profil başlat/bitir
+        self.root.bind("<F9>", self.metrikleri_ac_kapat)
+        self.root.bind("<F10>", self.metrikleri_yaz)
+        self.root.bind("<F11>", self.profil_ac_kapat)
+        self.kayit_hatalarini_denetle()
+        if self.otomatik_kayit_suresi:
+            self.root.after(self.otomatik_kayit_suresi * 1000, self.otomatik_kaydet)
+
+    def otomatik_kaydet(self):
+        # Yükleme bitmeden kaydetmek yarım veriyi dosyanın üzerine yazardı
+        if not self.yukleniyor:
+            self.verileri_kaydet()
+        self.root.after(self.otomatik_kayit_suresi * 1000, self.otomatik_kaydet)
+
+    def verileri_kaydet(self):
+        if not self.crm.verileri_kaydet():
+            messagebox.showerror("Kayıt Hatası", f"Dosya yazma hatası: {str(self.crm.son_hata)}")
+
+    def kayit_hatalarini_denetle(self):
+        # Arka plan yazımındaki hatalar Tk iş parçacığında gösterilir
+        while not self.crm.kaydedici.errors.empty():
+            hata = self.crm.kaydedici.errors.get()
+            messagebox.showerror("Kayıt Hatası", f"Dosya yazma hatası: {str(hata)}")
+        try:
+            self.crm.goruntuyu_tamamla()
+        except OSError as e:
+            messagebox.showerror("Kayıt Hatası", f"Dosya yazma hatası: {str(e)}")
+        self.root.after(500, self.kayit_hatalarini_denetle)
+
+    def kapat(self):
+        if not self.yukleniyor:
+            self.verileri_kaydet()
+        self.crm.kapat()
+        self.root.destroy()
+
+    def metrikleri_ac_kapat(self, event=None):
+        acik = instrumentation.toggle()
+        self.status_label.config(text="Ölçüm açık" if acik else "Ölçüm kapalı")
+
+    def metrikleri_yaz(self, event=None, dosya="crm_metrikler.prom"):
+        try:
+            instrumentation.export_prometheus(dosya, prefix="crm")
+        except OSError as e:
+            messagebox.showerror("Hata", f"Metrikler yazılamadı: {e}")
+            return
+        self.status_label.config(text=f"Metrikler {dosya} dosyasına yazıldı")
+
+    def profil_ac_kapat(self, event=None, onek="crm_profil"):
+        dosyalar = instrumentation.toggle_profile(onek)
+        self.status_label.config(text="Profil alınıyor (bitirmek için F11)" if dosyalar is None
+                                 else "Profil yazıldı: " + ", ".join(dosyalar))
+
     def center_window(self):
         self.root.update_idletasks()
         width = self.root.winfo_width()
@@ -61,18 +167,84 @@ class ModernCRMApp:
             ("Müşteri Listesi", self.show_musteri_listesi),
             ("Satış Ekle", self.satis_ekle),
             ("Destek Talebi", self.destek_ekle),
+            ("Destek Kuyruğu", self.show_destek_kuyrugu),
             ("Müşteri Güncelle", self.musteri_guncelle),
             ("Raporlar", self.show_raporlar),
-            ("Verileri Kaydet", self.crm.verileri_kaydet)
+            ("Toplu İçe Aktar", self.toplu_ice_aktar),
+            ("Verileri Kaydet", self.verileri_kaydet)
         ]
 
+        self.buttons = []
         for text, command in buttons:
+            command = instrumentation.wrap(command, "crm.buton." + text)
             btn = tk.Button(left_panel, text=text, command=command, **BUTTON_STYLE)
             btn.pack(fill=tk.X, pady=2)
+            self.buttons.append(btn)
+
+        # Durum satırı (yükleme ilerlemesi)
+        self.status_label = ttk.Label(left_panel, text="", wraplength=180)
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X, pady=5)
 
         # Müşteri Listesi Tablosu
         self.create_liste_tablosu()
-        
+
+    def toplu_ice_aktar(self):
+        # CSV/JSONL müşteri veya satış dosyası; her toplu adımdan sonra arayüze dönülür
+        dosya = filedialog.askopenfilename(filetypes=[("CSV / JSON Lines", "*.csv *.jsonl *.ndjson"), ("Tümü", "*.*")])
+        if not dosya:
+            return
+        for btn in self.buttons:
+            btn.config(state=tk.DISABLED)
+        adimlar = bulk_import.iter_import(self.crm, dosya)
+        sonuc = {}
+
+        def devam():
+            try:
+                sonuc.update(next(adimlar))
+                self.status_label.config(text=f"İçe aktarılıyor... {sonuc['read']} satır")
+                self.root.after(1, devam)
+                return
+            except StopIteration:
+                pass
+            except Exception as e:
+                messagebox.showerror("Hata", f"İçe aktarma durdu: {e}")
+            for btn in self.buttons:
+                btn.config(state=tk.NORMAL)
+            self.status_label.config(text="")
+            self.update_table()
+            if sonuc:
+                messagebox.showinfo("İçe Aktarma", (
+                    f"Okunan: {sonuc['read']}\nEklenen: {sonuc['imported']}\n"
+                    f"Mükerrer: {sonuc['duplicates']}\nReddedilen: {sonuc['rejected']}\n"
+                    f"Süre: {sonuc['seconds']:.1f} sn ({sonuc['rows_per_sec']:.0f} satır/sn)\n"
+                    f"Hata raporu: {sonuc['error_report']}"))
+        self.root.after(1, devam)
+
+    def verileri_yukle(self, dosya="veriler.json", bitince=None):
+        # Dosya Tk döngüsü içinde parça parça okunur; pencere bu sırada donmaz
+        self.yukleniyor = True
+        for btn in self.buttons:
+            btn.config(state=tk.DISABLED)
+        def ilerleme(oran):
+            self.status_label.config(text=f"Veriler yükleniyor... %{int(oran * 100)}")
+        adimlar = self.crm.verileri_yukle_adim(dosya, ilerleme=ilerleme)
+
+        def devam():
+            try:
+                next(adimlar)
+            except StopIteration:
+                self.yukleniyor = False
+                for btn in self.buttons:
+                    btn.config(state=tk.NORMAL)
+                self.status_label.config(text="")
+                self.update_table()
+                if bitince:
+                    bitince()
+                return
+            self.root.after(1, devam)
+        self.status_label.config(text="Veriler yükleniyor...")
+        self.root.after(1, devam)
+
         
     def create_liste_tablosu(self):
         # Treeview için çerçeve
@@ -80,6 +252,14 @@ class ModernCRMApp:
         self.table_frame = table_frame 
         table_frame.pack(fill=tk.BOTH, expand=True)
 
+        # Arama (ad/soyad öneki, telefon, email veya yaklaşık eşleşme)
+        search_frame = ttk.Frame(table_frame)
+        search_frame.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+        ttk.Label(search_frame, text="Ara:").pack(side=tk.LEFT)
+        self.search_entry = ttk.Entry(search_frame)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.search_entry.bind("<KeyRelease>", lambda e: self.musteri_ara())
+
         # Scrollbar
         scroll_y = ttk.Scrollbar(table_frame, orient=tk.VERTICAL)
         scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
@@ -88,7 +268,6 @@ class ModernCRMApp:
         self.tree = ttk.Treeview(
             table_frame,
             columns=("ID", "Ad", "Soyad", "Telefon", "Email", "Satış", "Destek"),
-            yscrollcommand=scroll_y.set,
             selectmode="browse"
         )
         scroll_y.config(command=self.tree.yview)
@@ -102,26 +281,24 @@ class ModernCRMApp:
         self.tree.heading("Telefon", text="Telefon")
         self.tree.heading("Email", text="Email")
         self.tree.heading("Satış", text="Satış Sayısı")
-        self.tree.heading("Destek", text="Destek Talebi")
+        self.tree.heading("Destek", text="Açık Talep")
 
         self.tree.pack(fill=tk.BOTH, expand=True)
+        # Satırlar CRM olaylarıyla tek tek güncellenir
+        self.tablo = MusteriTablosu(self.crm, self.tree, scroll_y)
         self.update_table()
 
+    @timed("crm.update_table")
     def update_table(self):
-        # Tabloyu güncelle
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        for i, musteri in enumerate(self.crm.musteriler.values(), 1):
-            self.tree.insert("", "end", text=str(i), values=(
-                musteri.musteri_id,
-                musteri.ad,
-                musteri.soyad,
-                musteri.telefon,
-                musteri.email,
-                len(musteri.satislar),
-                len(musteri.destek_talepleri)
-            ))
+        # Tabloyu baştan çiz (yalnızca ilk sayfa)
+        self.tablo.yenile()
+
+    def musteri_ara(self):
+        sorgu = self.search_entry.get().strip()
+        if sorgu:
+            self.tablo.yenile([m.musteri_id for m in self.crm.musteri_ara(sorgu, limit=500)])
+        else:
+            self.tablo.yenile()
 
     def musteri_ekle(self):
         self.clear_content()
@@ -140,8 +317,12 @@ class ModernCRMApp:
         def save():
             values = [e.get() for e in entries]
             if all(values):
+                benzerler = self.crm.olasi_tekrarlar(*values)
+                if benzerler and not messagebox.askyesno("Olası Tekrar", "Benzer müşteri(ler) var:\n" + "\n".join(
+                        f"{m.musteri_bilgilerini_goster()} (%{skor * 100:.0f})" for m, skor in benzerler)
+                        + "\n\nYine de eklensin mi?"):
+                    return
                 self.crm.musteri_ekle(*values)
-                self.update_table()
                 messagebox.showinfo("Başarılı", "Müşteri eklendi!")
                 self.show_musteri_listesi()
             else:
@@ -152,7 +333,6 @@ class ModernCRMApp:
     def show_musteri_listesi(self):
         self.clear_content()
         self.table_frame.pack(fill=tk.BOTH, expand=True)
-        self.update_table()
 
     def satis_ekle(self):
         self.clear_content()
@@ -179,7 +359,6 @@ class ModernCRMApp:
                 tutar = float(entries[2].get())
                 musteri = self.crm.musteri_getir(musteri_id)
                 musteri.satis_ekle(urun, miktar, tutar)
-                self.update_table()
                 messagebox.showinfo("Başarılı", "Satış eklendi!")
                 self.show_musteri_listesi()
             except ValueError:
@@ -210,7 +389,6 @@ class ModernCRMApp:
             if konu and aciklama:
                 musteri = self.crm.musteri_getir(musteri_id)
                 musteri.destek_talebi_olustur(konu, aciklama)
-                self.update_table()
                 messagebox.showinfo("Başarılı", "Destek talebi eklendi!")
                 self.show_musteri_listesi()
             else:
@@ -218,10 +396,62 @@ class ModernCRMApp:
 
         ttk.Button(form_frame, text="Kaydet", command=save).grid(row=2, columnspan=2, pady=10)
 
+    def show_destek_kuyrugu(self):
+        # Açık talepler en eskiden yeniye; "Sıradakini Al" SLA süresi en yakın yeni talebi işleme alır
+        self.clear_content()
+        kuyruk_frame = ttk.Frame(self.content_area)
+        kuyruk_frame.pack(fill=tk.BOTH, expand=True)
+        ust = ttk.Frame(kuyruk_frame)
+        ust.pack(fill=tk.X, pady=(0, 5))
+        sayac = ttk.Label(ust)
+        sayac.pack(side=tk.LEFT)
+        sutunlar = ("Talep", "Müşteri", "Konu", "Durum", "Tarih", "Son Tarih")
+        tablo = ttk.Treeview(kuyruk_frame, columns=sutunlar, show="headings", selectmode="browse")
+        for sutun in sutunlar:
+            tablo.heading(sutun, text=sutun)
+        tablo.tag_configure("gecikmis", foreground="#c0392b")
+        tablo.pack(fill=tk.BOTH, expand=True)
+
+        def doldur():
+            tablo.delete(*tablo.get_children())
+            simdi = now_ts()
+            sayac.config(text=f"Açık talep: {self.crm.destekler.open_total()}")
+            for talep_id in self.crm.destekler.opened_before(simdi + 1)[:500]:
+                musteri, talep = self.crm.destek_talebi_bul(talep_id)
+                son = self.crm.destekler.deadline(talep_id)
+                tablo.insert("", "end", iid=talep_id, tags=("gecikmis",) if son < simdi else (), values=(
+                    talep_id, f"{musteri.ad} {musteri.soyad}", talep.konu, talep.durum, talep.tarih,
+                    time.strftime("%Y-%m-%d %H:%M", time.gmtime(son))))
+
+        def siradaki():
+            if self.crm.siradaki_destek() is None:
+                messagebox.showinfo("Bilgi", "Kuyrukta bekleyen talep yok")
+            doldur()
+
+        def durum_degistir():
+            secili = tablo.selection()
+            if not secili:
+                messagebox.showwarning("Uyarı", "Lütfen bir talep seçin")
+                return
+            try:
+                self.crm.destek_durumu_degistir(secili[0], durum_secim.get())
+            except ValueError as e:
+                messagebox.showerror("Hata", str(e))
+            doldur()
+
+        ttk.Button(ust, text="Sıradakini Al", command=siradaki).pack(side=tk.RIGHT)
+        ttk.Button(ust, text="Durumu Değiştir", command=durum_degistir).pack(side=tk.RIGHT, padx=5)
+        durum_secim = ttk.Combobox(ust, values=list(DESTEK_GECISLERI), state="readonly", width=12)
+        durum_secim.current(1)
+        durum_secim.pack(side=tk.RIGHT)
+        doldur()
+
     def show_raporlar(self):
         self.clear_content()
-        report_frame = ttk.Frame(self.content_area)
-        report_frame.pack(pady=20)
+        sekmeler = ttk.Notebook(self.content_area)
+        sekmeler.pack(fill=tk.BOTH, expand=True)
+        report_frame = ttk.Frame(sekmeler)
+        sekmeler.add(report_frame, text="Özet")
 
         # Toplam Satış
         ttk.Label(report_frame, text="Toplam Satış Tutarı:", font=self.title_font).grid(row=0, column=0, padx=10, pady=5)
@@ -230,16 +460,62 @@ class ModernCRMApp:
 
         # En Çok Satış Yapan
         ttk.Label(report_frame, text="En Çok Satış Yapan:", font=self.title_font).grid(row=1, column=0, padx=10, pady=5)
-        best_customer = self.crm.en_cok_satis_yapan()
-        best_text = f"{best_customer.ad} {best_customer.soyad} - {sum(s.toplam_tutar for s in best_customer.satislar)} ₺" if best_customer else "Kayıt yok"
+        en_iyiler = self.crm.en_cok_satis_yapanlar(10)
+        best_text = f"{en_iyiler[0][0].ad} {en_iyiler[0][0].soyad} - {en_iyiler[0][1]} ₺" if en_iyiler else "Kayıt yok"
         ttk.Label(report_frame, text=best_text, font=self.normal_font).grid(row=1, column=1, padx=10, pady=5)
 
+        # İlk 10
+        ttk.Label(report_frame, text="İlk 10 Müşteri:", font=self.title_font).grid(row=2, column=0, padx=10, pady=5, sticky=tk.N)
+        top_text = "\n".join(f"{i}. {m.ad} {m.soyad} - {toplam} ₺" for i, (m, toplam) in enumerate(en_iyiler, 1)) or "Kayıt yok"
+        ttk.Label(report_frame, text=top_text, font=self.normal_font, justify=tk.LEFT).grid(row=2, column=1, padx=10, pady=5, sticky=tk.W)
+
+        # Aylık ciro (son 24 ay): hazır aylık kırılımlardan okunur, satışlar taranmaz
+        simdi = now_ts()
+        aylik = self.crm.donemsel_satislar("month", analytics.month_start(simdi, 23),
+                                           analytics.month_start(simdi, -1))
+        aylik_frame = ttk.Frame(sekmeler)
+        sekmeler.add(aylik_frame, text="Aylık Ciro")
+        grafik = tk.Canvas(aylik_frame, height=200, bg="white", highlightthickness=0)
+        grafik.pack(fill=tk.X, padx=10, pady=10)
+        grafik.bind("<Configure>", lambda e: self._cubuk_grafik(grafik, [(etiket, ciro) for etiket, ciro, _, _ in aylik]))
+        self._rapor_tablosu(aylik_frame, ("Ay", "Ciro (₺)", "Miktar", "Satış"), aylik)
+
+        # Bu çeyreğin en çok satan ürünleri
+        urun_frame = ttk.Frame(sekmeler)
+        sekmeler.add(urun_frame, text="Ürünler (Bu Çeyrek)")
+        self._rapor_tablosu(urun_frame, ("Ürün", "Ciro (₺)", "Miktar"),
+                            self.crm.en_cok_satan_urunler(20, analytics.quarter_start(simdi)))
+
+    def _rapor_tablosu(self, ust, sutunlar, satirlar):
+        tablo = ttk.Treeview(ust, columns=sutunlar, show="headings")
+        for sutun in sutunlar:
+            tablo.heading(sutun, text=sutun)
+            tablo.column(sutun, width=120)
+        for satir in satirlar:
+            tablo.insert("", "end", values=[f"{d:.2f}" if isinstance(d, float) else d for d in satir])
+        tablo.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+
+    def _cubuk_grafik(self, grafik, veriler):
+        grafik.delete("all")
+        if not veriler:
+            grafik.create_text(10, 10, anchor=tk.NW, text="Kayıt yok")
+            return
+        genislik, yukseklik = grafik.winfo_width(), grafik.winfo_height()
+        en_buyuk = max(deger for _, deger in veriler) or 1
+        adim = genislik / len(veriler)
+        for i, (etiket, deger) in enumerate(veriler):
+            boy = (yukseklik - 30) * deger / en_buyuk
+            x = i * adim
+            grafik.create_rectangle(x + 2, yukseklik - 20 - boy, x + adim - 2, yukseklik - 20,
+                                    fill=SECONDARY_COLOR, outline="")
+            grafik.create_text(x + adim / 2, yukseklik - 10, text=etiket[2:], font=("Helvetica", 7))
+
     def get_selected_musteri_id(self):
         selection = self.tree.selection()
         if not selection:
             messagebox.showerror("Hata", "Lütfen bir müşteri seçin!")
             return None
-        return self.tree.item(selection[0])['values'][0]
+        return selection[0]
 
     def clear_content(self):
         for widget in self.content_area.winfo_children():
@@ -272,7 +548,6 @@ class ModernCRMApp:
         def save():
             new_values = [e.get() for e in entries]
             musteri.musteri_guncelle(*new_values)
-            self.update_table()
             messagebox.showinfo("Başarılı", "Bilgiler güncellendi!")
             self.show_musteri_listesi()
 
@@ -281,83 +556,777 @@ class ModernCRMApp:
     def run(self):
         self.root.mainloop()
 
+
+class MusteriTablosu:
+    # Müşteri tablosu modeli: satırlar musteri_id ile anahtarlanır ve sayfa sayfa
+    # çizilir. Ağaçta yalnızca sira[bas:cizilen] penceresi durur: kaydırma sona
+    # yaklaştıkça sonraki sayfa eklenip baştaki sayfa silinir, başa yaklaştıkça
+    # tersi yapılır; böylece satır sayısı PENCERE ile sınırlı kalır.
+    SAYFA = 200
+    PENCERE = 3 * SAYFA
+
+    def __init__(self, crm, tree, scroll_y):
+        self.crm = crm
+        self.tree = tree
+        self.scroll_y = scroll_y
+        self.sira = []
+        self.bas = 0
+        self.cizilen = 0
+        self.filtreli = False
+        # süzgeçsiz görünümde sayfalar kayıt sırasına göre imleçle alınır;
+        # bitti: son sayfa çizildi, yeni müşteriler hemen eklenir
+        self.imlec = None
+        self.bitti = False
+        self._sayfa_bekliyor = False
+        tree.configure(yscrollcommand=self._kaydirildi)
+        crm.dinleyici_ekle(self.olay)
+
+    def satir(self, musteri):
+        return self.crm.musteri_ozeti(musteri.musteri_id)[:7]
+
+    @timed("crm.tablo.yenile")
+    def yenile(self, idler=None):
+        # idler verilirse yalnızca o müşteriler gösterilir (arama sonucu)
+        self.tree.delete(*self.tree.get_children())
+        self.filtreli = idler is not None
+        self.sira = [] if idler is None else list(idler)
+        self.bas = self.cizilen = 0
+        self.imlec = None
+        self.bitti = self.filtreli
+        self.sonraki_sayfa()
+
+    def _ciz(self, bas, son, konum):
+        # sira[bas:son] satırlarını ağaçta `konum` sırasından itibaren ekler
+        for j, i in enumerate(range(bas, son)):
+            musteri = self.crm.musteriler[self.sira[i]]
+            self.tree.insert("", "end" if konum == "end" else konum + j, iid=musteri.musteri_id,
+                             text=str(i + 1), values=self.satir(musteri))
+
+    def _ust_satir(self):
+        # pencerede en üstte görünen satırın sırası
+        return round(float(self.tree.yview()[0]) * (self.cizilen - self.bas))
+
+    @timed("crm.tablo.sonraki_sayfa")
+    def sonraki_sayfa(self):
+        self._sayfa_bekliyor = False
+        if self.cizilen == len(self.sira) and not self.filtreli and not self.bitti:
+            musteriler, imlec = self.crm.musteri_sorgula(imlec=self.imlec, limit=self.SAYFA)
+            self.imlec = imlec or self.imlec
+            self.bitti = len(musteriler) < self.SAYFA
+            self.sira.extend(m.musteri_id for m in musteriler)
+        son = min(self.cizilen + self.SAYFA, len(self.sira))
+        if son == self.cizilen:
+            return
+        ust = self._ust_satir()
+        self._ciz(self.cizilen, son, "end")
+        self.cizilen = son
+        fazla = self.cizilen - self.bas - self.PENCERE
+        if fazla > 0:
+            self.tree.delete(*self.sira[self.bas:self.bas + fazla])
+            self.bas += fazla
+            self.tree.yview_moveto(max(ust - fazla, 0) / (self.cizilen - self.bas))
+
+    @timed("crm.tablo.onceki_sayfa")
+    def onceki_sayfa(self):
+        self._sayfa_bekliyor = False
+        if self.bas == 0:
+            return
+        ust = self._ust_satir()
+        bas = max(self.bas - self.SAYFA, 0)
+        self._ciz(bas, self.bas, 0)
+        eklenen, self.bas = self.bas - bas, bas
+        fazla = self.cizilen - self.bas - self.PENCERE
+        if fazla > 0:
+            self.tree.delete(*self.sira[self.cizilen - fazla:self.cizilen])
+            self.cizilen -= fazla
+        self.tree.yview_moveto((ust + eklenen) / (self.cizilen - self.bas))
+
+    def _kaydirildi(self, ilk, son):
+        self.scroll_y.set(ilk, son)
+        if self._sayfa_bekliyor:
+            return
+        kalan = self.cizilen < len(self.sira) or not self.bitti
+        if float(son) > 0.9 and kalan:
+            self._sayfa_bekliyor = True
+            self.tree.after_idle(self.sonraki_sayfa)
+        elif float(ilk) < 0.1 and self.bas > 0:
+            self._sayfa_bekliyor = True
+            self.tree.after_idle(self.onceki_sayfa)
+
+    def olay(self, olay, musteri, kayit):
+        if olay in ("musteri", "musteriler"):
+            # Pencere son sayfadaysa yeni satırlar hemen görünür; değilse
+            # imleç onları sırası gelince getirir
+            if not self.filtreli and self.bitti:
+                self.bitti = False
+                if self.cizilen == len(self.sira):
+                    self.sonraki_sayfa()
+        elif olay == "birlestir":
+            if kayit.musteri_id in self.sira:
+                i = self.sira.index(kayit.musteri_id)
+                del self.sira[i]
+                if i < self.bas:
+                    self.bas -= 1
+                if i < self.cizilen:
+                    self.cizilen -= 1
+            if self.tree.exists(kayit.musteri_id):
+                self.tree.delete(kayit.musteri_id)
+            if self.tree.exists(musteri.musteri_id):
+                self.tree.item(musteri.musteri_id, values=self.satir(musteri))
+        elif self.tree.exists(musteri.musteri_id):
+            self.tree.item(musteri.musteri_id, values=self.satir(musteri))
+
+
 class CRM:
-    def __init__(self):
+    # Önbellekte tutulan en fazla müşteri özet satırı
+    OZET_BOYUTU = 10000
+    # musteri_sorgula sıralamaları: kayıt sırası, "ad soyad", satış toplamı
+    SIRALAMALAR = ("kayit", "ad", "toplam")
+
+    def __init__(self, gunluk_dosyasi=None, sikistirma_esigi=5000):
         self.musteriler = {}
+        self.dinleyiciler = []
+        # Günlük modu: her değişiklik tek satır olarak eklenir, tam yazım sadece sıkıştırmada yapılır
+        self.gunluk = Gunluk(gunluk_dosyasi) if gunluk_dosyasi else None
+        self.sikistirma_esigi = sikistirma_esigi
+        self.anlik_dosya = "veriler.json"
+        # Verilirse kayıtlar bu BackgroundSaver üzerinde, çağıran iş parçacığını bekletmeden yazılır
+        self.kaydedici = None
+        self.son_hata = None
+        self.ozet = SatisOzeti()
+        self.dinleyici_ekle(self.ozet)
+        # Arama dizini; ilk aramada kurulur
+        self._indeks = None
+        self.dinleyici_ekle(self._indeksi_guncelle)
+        # Günlük/haftalık/aylık satış kırılımları (ürün ve müşteri bazında); ilk sorguda kurulur
+        self._analiz = None
+        self.dinleyici_ekle(self._analize_ekle)
+        # Tarih aralıklı raporlar için sütunlu satış görüntüsü; ilk sorguda kurulur
+        self._sutunlar = None
+        self.dinleyici_ekle(self._sutunlara_ekle)
+        # Destek talepleri: durum, yaş ve müşteriye göre dizin, SLA sırasına göre kuyruk; ilk kullanımda kurulur
+        self._destekler = None
+        self.dinleyici_ekle(self._destekleri_guncelle)
+        # Olası tekrar müşteriler için bloklama dizini; ilk kullanımda kurulur
+        self._tekrarlar = None
+        self.dinleyici_ekle(self._tekrarlari_guncelle)
+        # Liste görünümleri için müşteri özet satırları; değişen müşterinin satırı
+        # kirli işaretlenir ve bir sonraki okumada yeniden hesaplanır
+        self.ozetler = SummaryCache(self._ozet_satiri, self.OZET_BOYUTU)
+        self.dinleyici_ekle(self._ozetleri_guncelle)
+        # Sayfalı sorgular için sıralamalar; ilk sorguda kurulur
+        self._siralar = None
+        self._son_sira = 0
+        self.dinleyici_ekle(self._siralari_guncelle)
+        # Açık ikili anlık görüntü (TembelMusteri kayıtları buradan okur). Kayıt onun
+        # üzerine yazılacaksa yeni dosya yanına yazılır (_bekleyen) ve yer değiştirme
+        # sahibi iş parçacığında, kilit altında goruntuyu_tamamla ile yapılır.
+        self._goruntu = None
+        self._bekleyen = None
+        self._goruntu_kilidi = threading.RLock()
+
+    def dinleyici_ekle(self, dinleyici):
+        self.dinleyiciler.append(dinleyici)
+
+    def _bildir(self, olay, musteri, kayit=None):
+        for dinleyici in self.dinleyiciler:
+            dinleyici(olay, musteri, kayit)
+        if self.gunluk:
+            self.gunluk.olay_yaz(olay, musteri, kayit)
+
+    def _musteri_bagla(self, musteri):
+        musteri.crm = self
+        self.musteriler[musteri.musteri_id] = musteri
 
     def musteri_ekle(self, ad, soyad, telefon, email):
         musteri = Musteri(ad, soyad, telefon, email)
-        self.musteriler[musteri.musteri_id] = musteri
+        self._musteri_bagla(musteri)
+        self._bildir("musteri", musteri)
         return musteri.musteri_id
 
+    def musterileri_ekle(self, kayitlar):
+        # Toplu ekleme: (ad, soyad, telefon, email) listesi; dinleyiciler tek bir "musteriler" olayı alır
+        yeniler = [Musteri(*k) for k in kayitlar]
+        for musteri in yeniler:
+            self._musteri_bagla(musteri)
+        if yeniler:
+            self._bildir("musteriler", None, yeniler)
+        return [m.musteri_id for m in yeniler]
+
     def musteri_getir(self, musteri_id):
         return self.musteriler.get(musteri_id)
 
+    @property
+    def indeks(self):
+        if self._indeks is None:
+            indeks = CustomerIndex()
+            indeks.extend((m.musteri_id, m.ad, m.soyad, m.telefon, m.email) for m in self.musteriler.values())
+            self._indeks = indeks
+        return self._indeks
+
+    def _indeksi_guncelle(self, olay, musteri, kayit):
+        if self._indeks is None:
+            return
+        if olay in ("musteri", "guncelle"):
+            self._indeks.update(musteri.musteri_id, musteri.ad, musteri.soyad, musteri.telefon, musteri.email)
+        elif olay == "musteriler":
+            self._indeks.extend((m.musteri_id, m.ad, m.soyad, m.telefon, m.email) for m in kayit)
+        elif olay == "birlestir":
+            self._indeks.remove(kayit.musteri_id)
+
+    @property
+    def tekrarlar(self):
+        if self._tekrarlar is None:
+            tekrarlar = DedupIndex()
+            tekrarlar.extend((m.musteri_id, m.ad, m.soyad, m.telefon, m.email) for m in self.musteriler.values())
+            self._tekrarlar = tekrarlar
+        return self._tekrarlar
+
+    def _tekrarlari_guncelle(self, olay, musteri, kayit):
+        if self._tekrarlar is None:
+            return
+        if olay in ("musteri", "guncelle"):
+            self._tekrarlar.update(musteri.musteri_id, musteri.ad, musteri.soyad, musteri.telefon, musteri.email)
+        elif olay == "musteriler":
+            self._tekrarlar.extend((m.musteri_id, m.ad, m.soyad, m.telefon, m.email) for m in kayit)
+        elif olay == "birlestir":
+            self._tekrarlar.remove(kayit.musteri_id)
+
+    def olasi_tekrarlar(self, ad, soyad, telefon, email, esik=0.8, haric=None):
+        # [(musteri, skor)] eklenmek üzere olan kayda benzeyen müşteriler; birkaç küçük blok taranır
+        return [(self.musteriler[mid], skor)
+                for mid, skor in self.tekrarlar.likely(ad, soyad, telefon, email, esik, exclude=haric)]
+
+    @timed("crm.tekrar_taramasi")
+    def tekrar_taramasi(self, esik=0.8, isci=1):
+        # [(musteri, musteri, skor)] tüm müşteriler arasında olası tekrarlar, en benzerden başlayarak
+        return [(self.musteriler[a], self.musteriler[b], skor) for a, b, skor in self.tekrarlar.scan(esik, isci)]
+
+    def musterileri_birlestir(self, kalan_id, giden_id):
+        # giden müşterinin satış ve destek kayıtları kalana taşınır, giden silinir
+        kalan, giden = self.musteriler.get(kalan_id), self.musteriler.get(giden_id)
+        if kalan is None or giden is None or kalan is giden:
+            raise ValueError("Birleştirilecek müşteriler bulunamadı")
+        kalan.satislar.extend(giden.satislar)
+        kalan.destek_talepleri.extend(giden.destek_talepleri)
+        del self.musteriler[giden_id]
+        giden.crm = None
+        self._bildir("birlestir", kalan, giden)
+        return kalan
+
+    @property
+    def analiz(self):
+        if self._analiz is None:
+            self.analizi_yeniden_olustur()
+        return self._analiz
+
+    def _analize_ekle(self, olay, musteri, kayit):
+        if self._analiz is None:
+            return
+        if olay == "satis":
+            self._analiz.add(kayit.zaman, kayit.toplam_tutar, kayit.miktar,
+                             product=kayit.urun, customer=musteri.musteri_id)
+        elif olay == "birlestir":
+            self._analiz.merge("customer", kayit.musteri_id, musteri.musteri_id)
+
+    def analizi_yeniden_olustur(self):
+        analiz = SalesRollups()
+        for m in self.musteriler.values():
+            for s in m.satislar:
+                analiz.add(s.zaman, s.toplam_tutar, s.miktar, product=s.urun, customer=m.musteri_id)
+        self._analiz = analiz
+
+    def _sutunlara_ekle(self, olay, musteri, kayit):
+        if olay == "satis" and self._sutunlar is not None:
+            self._sutunlar.append(musteri.musteri_id, kayit.toplam_tutar, kayit.miktar, kayit.zaman, kayit.urun)
+        elif olay == "birlestir":
+            self._sutunlar = None  # müşteri kodları değişti; sonraki sorguda yeniden kurulur
+
+    @property
+    def destekler(self):
+        if self._destekler is None:
+            self.destekleri_yeniden_olustur()
+        return self._destekler
+
+    def _destekleri_guncelle(self, olay, musteri, kayit):
+        if self._destekler is None:
+            return
+        if olay == "destek":
+            self._destekler.add(kayit.talep_id, musteri.musteri_id, kayit.zaman, kayit.durum)
+        elif olay == "destek_durum":
+            self._destekler.transition(kayit.talep_id, kayit.durum)
+        elif olay == "birlestir":
+            self._destekler.reassign(kayit.musteri_id, musteri.musteri_id)
+
+    def destekleri_yeniden_olustur(self):
+        destekler = TicketStore(DESTEK_GECISLERI, "Açık", KAPALI_DURUMLAR)
+        destekler.extend((talep_id, m.musteri_id, zaman, durum)
+                         for m in self.musteriler.values() for talep_id, zaman, durum in m.destek_anahtarlari())
+        self._destekler = destekler
+
+    def destek_talebi_bul(self, talep_id):
+        # (musteri, talep) ya da (None, None)
+        if talep_id not in self.destekler:
+            return None, None
+        musteri = self.musteriler[self.destekler.customer(talep_id)]
+        for talep in musteri.destek_talepleri:
+            if talep.talep_id == talep_id:
+                return musteri, talep
+        return musteri, None
+
+    def destek_durumu_degistir(self, talep_id, durum):
+        musteri, talep = self.destek_talebi_bul(talep_id)
+        if talep is None:
+            raise ValueError("Destek talebi bulunamadı")
+        return musteri.destek_durumu_degistir(talep_id, durum)
+
+    def siradaki_destek(self, durum="İşlemde"):
+        # SLA süresi en yakın açık talebi alır ve `durum`a geçirir
+        talep_id = self.destekler.next()
+        if talep_id is None:
+            return None
+        return self.destek_durumu_degistir(talep_id, durum)
+
+    def satis_sutunlari(self):
+        if self._sutunlar is None:
+            sutunlar = SalesColumns()
+            for m in self.musteriler.values():
+                for s in m.satislar:
+                    sutunlar.append(m.musteri_id, s.toplam_tutar, s.miktar, s.zaman, s.urun)
+            self._sutunlar = sutunlar
+        return self._sutunlar
+
+    @timed("crm.musteri_ara")
+    def musteri_ara(self, sorgu, limit=20):
+        # Ad/soyad öneki, telefon, email ya da Türkçe harf duyarsız yaklaşık eşleşme
+        return [self.musteriler[mid] for mid in self.indeks.search(sorgu, limit)]
+
+    @timed("crm.musteri_listele")
     def musteri_listele(self):
         return [m.to_dict() for m in self.musteriler.values()]
 
+    def musteri_ozeti(self, musteri_id):
+        # (musteri_id, ad, soyad, telefon, email, satis_sayisi, acik_destek, destek_sayisi,
+        #  satis_toplami, "ad soyad"); değişene kadar önbellekten okunur
+        return self.ozetler.get(musteri_id)
+
+    def _ozet_satiri(self, musteri_id):
+        m = self.musteriler[musteri_id]
+        return (musteri_id, m.ad, m.soyad, m.telefon, m.email, m.satis_sayisi(),
+                self.destekler.open_count(musteri_id), m.destek_sayisi(),
+                self.ozet.musteri_toplamlari.get(musteri_id, 0), f"{m.ad} {m.soyad}")
+
+    @property
+    def siralar(self):
+        if self._siralar is None:
+            siralar = {ad: SortedKeys(ad) for ad in self.SIRALAMALAR}
+            musteriler = list(self.musteriler.values())
+            toplamlar = self.ozet.musteri_toplamlari
+            siralar["kayit"].extend((m.musteri_id, i) for i, m in enumerate(musteriler))
+            siralar["ad"].extend((m.musteri_id, fold(f"{m.ad} {m.soyad}")) for m in musteriler)
+            siralar["toplam"].extend((m.musteri_id, toplamlar.get(m.musteri_id, 0)) for m in musteriler)
+            self._son_sira = len(musteriler)
+            self._siralar = siralar
+        return self._siralar
+
+    def _siralari_guncelle(self, olay, musteri, kayit):
+        if self._siralar is None:
+            return
+        if olay in ("musteri", "musteriler"):
+            yeniler = [musteri] if olay == "musteri" else kayit
+            self._siralar["kayit"].extend((m.musteri_id, self._son_sira + i) for i, m in enumerate(yeniler))
+            self._son_sira += len(yeniler)
+            self._siralar["ad"].extend((m.musteri_id, fold(f"{m.ad} {m.soyad}")) for m in yeniler)
+            self._siralar["toplam"].extend((m.musteri_id, 0) for m in yeniler)
+        elif olay == "guncelle":
+            self._siralar["ad"].update(musteri.musteri_id, fold(f"{musteri.ad} {musteri.soyad}"))
+        elif olay in ("satis", "birlestir"):
+            if olay == "birlestir":
+                for sira in self._siralar.values():
+                    sira.remove(kayit.musteri_id)
+            self._siralar["toplam"].update(musteri.musteri_id, self.ozet.musteri_toplamlari.get(musteri.musteri_id, 0))
+
+    @timed("crm.musteri_sorgula")
+    def musteri_sorgula(self, ad_oneki=None, acik_destek=None, min_toplam=None, max_toplam=None,
+                        sirala="kayit", azalan=False, imlec=None, limit=50):
+        # ([musteri], imlec). Sonraki sayfa için imlec geri verilir; limit'ten kısa sayfa sonuncudur.
+        # İmleç son satırın sıralama anahtarıdır, araya eklenen/silinen müşteriler sayfaları kaydırmaz.
+        # Sıralamayla aynı alandaki süzgeç (ad -> ad_oneki, toplam -> tutar aralığı) ikili aramayla,
+        # diğerleri satır satır uygulanır.
+        if sirala not in self.SIRALAMALAR:
+            raise ValueError(f"Bilinmeyen sıralama: {sirala}")
+        siralar = self.siralar
+        alt = ust = None
+        kosullar = []
+        if ad_oneki:
+            onek = fold(ad_oneki)
+            if sirala == "ad":
+                alt, ust = prefix_range(onek)
+            else:
+                kosullar.append(lambda mid: siralar["ad"].key(mid).startswith(onek))
+        if min_toplam is not None or max_toplam is not None:
+            if sirala == "toplam":
+                alt, ust = min_toplam, max_toplam
+            else:
+                toplamlar = self.ozet.musteri_toplamlari
+                kosullar.append(lambda mid: (min_toplam is None or toplamlar.get(mid, 0) >= min_toplam)
+                                and (max_toplam is None or toplamlar.get(mid, 0) <= max_toplam))
+        if acik_destek is not None:
+            destekler = self.destekler
+            kosullar.append(lambda mid: (destekler.open_count(mid) > 0) == acik_destek)
+        kosul = (lambda mid: all(k(mid) for k in kosullar)) if kosullar else None
+        idler, imlec = siralar[sirala].page(imlec, limit, azalan, alt, ust, kosul)
+        return [self.musteriler[mid] for mid in idler], imlec
+
+    def _ozetleri_guncelle(self, olay, musteri, kayit):
+        if olay in ("satis", "destek", "guncelle", "destek_durum"):
+            self.ozetler.mark_dirty(musteri.musteri_id)
+        elif olay == "birlestir":
+            self.ozetler.mark_dirty(musteri.musteri_id)
+            self.ozetler.mark_dirty(kayit.musteri_id)
+
+    @timed("crm.toplam_satis_tutar")
     def toplam_satis_tutar(self):
-        return sum(s.toplam_tutar for m in self.musteriler.values() for s in m.satislar)
+        return self.ozet.genel_toplam
+
+    def musteri_satis_toplami(self, musteri_id):
+        return self.ozet.musteri_toplamlari.get(musteri_id, 0)
 
     def en_cok_satis_yapan(self):
-        if not self.musteriler:
-            return None
-        return max(self.musteriler.values(), key=lambda m: sum(s.toplam_tutar for s in m.satislar), default=None)
+        enler = self.en_cok_satis_yapanlar(1)
+        return enler[0][0] if enler else None
+
+    @timed("crm.en_cok_satis_yapanlar")
+    def en_cok_satis_yapanlar(self, n=10):
+        # [(musteri, toplam), ...] büyükten küçüğe
+        return [(self.musteriler[mid], toplam) for mid, toplam in self.ozet.en_iyiler(n)]
+
+    @timed("crm.donem_toplami")
+    def donem_toplami(self, baslangic=None, bitis=None):
+        # baslangic <= zaman < bitis aralığındaki satışların toplamı
+        return self.satis_sutunlari().total(baslangic, bitis)
+
+    @timed("crm.donem_en_iyileri")
+    def donem_en_iyileri(self, n=10, baslangic=None, bitis=None):
+        # [(musteri, toplam)] aralıkta en çok satış yapanlar
+        return [(self.musteriler[mid], toplam)
+                for mid, toplam in self.satis_sutunlari().top_customers(n, baslangic, bitis)]
+
+    @timed("crm.donemsel_satislar")
+    def donemsel_satislar(self, donem="month", baslangic=None, bitis=None):
+        # [(etiket, ciro, miktar, satis_sayisi)]; donem: "day", "week" veya "month"
+        return self.analiz.series(donem, baslangic, bitis)
+
+    @timed("crm.en_cok_satan_urunler")
+    def en_cok_satan_urunler(self, n=20, baslangic=None, bitis=None):
+        # [(urun, ciro, miktar)] büyükten küçüğe
+        return self.analiz.top("product", n, baslangic, bitis)
 
+    @timed("crm.verileri_kaydet")
     def verileri_kaydet(self, dosya="veriler.json"):
         try:
-            with open(dosya, "w", encoding="utf-8") as f:
-                # Müşteri listesini dict formatına çevir
-                kayit_listesi = [m.to_dict() for m in self.musteriler.values()]
-                json.dump(kayit_listesi, f, indent=2, ensure_ascii=False)
-            print(f"Veriler {dosya} dosyasına kaydedildi")  # Debug için
+            self.goruntuyu_tamamla()
+            if self.gunluk:
+                # Günlük zaten diskte; sadece tampon boşaltılır, eşik aşıldıysa sıkıştırılır.
+                # Günlüğün tabanından başka bir dosya istendiyse oraya tam anlık görüntü
+                # yazılır; taban ve günlük değişmez.
+                self.gunluk.diske_yaz()
+                if self.gunluk.kayit_sayisi >= self.sikistirma_esigi:
+                    self.gunlugu_sikistir()
+                if os.path.abspath(dosya) != os.path.abspath(self.anlik_dosya):
+                    self._kaydet(dosya, self._kayit_isi(self.anlik_goruntu(), dosya))
+                self.goruntuyu_tamamla()
+                return True
+            self._kaydet(dosya, self._kayit_isi(self.anlik_goruntu(), dosya))
+            self.goruntuyu_tamamla()
             return True
         except Exception as e:
-            messagebox.showerror("Kayıt Hatası", f"Dosya yazma hatası: {str(e)}")
+            # Hata gösterimi arayüzün işi; burada yalnızca saklanır
+            self.son_hata = e
             return False
 
+    def _kaydet(self, anahtar, is_):
+        if self.kaydedici:
+            self.kaydedici.submit(anahtar, is_)
+        else:
+            is_()
+
+    @timed("crm.anlik_goruntu")
+    def anlik_goruntu(self):
+        # Çağıran iş parçacığında çalışır ve ucuzdur: yalnızca referanslar ve kısa metinler kopyalanır.
+        # Satışlar sonradan değişmediği için listelerinin kopyası yeterlidir; destek talebinin
+        # durumu değişebildiğinden talepler o anki değerleriyle (id, zaman, durum, konu, açıklama) alınır.
+        # İkili dosyadan henüz çözülmemiş kayıtlar burada okunmaz (bkz. TembelMusteri.anlik_kayitlar).
+        return [(m.musteri_id, m.ad, m.soyad, m.telefon, m.email, *m.anlik_kayitlar())
+                for m in self.musteriler.values()]
+
+    @staticmethod
+    def _bekleyen_yolu(dosya):
+        kok, uzanti = os.path.splitext(dosya)
+        return kok + BEKLEYEN_EKI + uzanti
 
-    def verileri_yukle(self, dosya="veriler.json"):
+    def _kayit_isi(self, goruntu, dosya):
+        # Anlık görüntüyü yazan iş. Hedef açık ikili dosyanın kendisiyse (Windows'ta
+        # eşlenmiş dosyanın yerine başkası konamaz) yeni dosya yanına yazılır ve
+        # yer değiştirme goruntuyu_tamamla'ya bırakılır.
+        yerinde = self._goruntu is not None and os.path.abspath(dosya) == os.path.abspath(self._goruntu.path)
+        hedef = self._bekleyen_yolu(dosya) if yerinde else dosya
+        def is_():
+            self.anlik_goruntu_yaz(goruntu, hedef)
+            if yerinde:
+                with self._goruntu_kilidi:
+                    self._bekleyen = hedef
+        return is_
+
+    def goruntuyu_tamamla(self):
+        # Sahip iş parçacığında (arayüz, API kilidi) çağrılır: yazılmış bekleyen dosya
+        # varsa ve eski dosyayı okuyabilecek kayıt işi kalmadıysa eski eşleme kapatılır,
+        # yeni dosya yerine taşınır ve açılır; hâlâ çözülmemiş müşteriler ona bağlanır.
+        with self._goruntu_kilidi:
+            bekleyen, eski = self._bekleyen, self._goruntu
+            if bekleyen is None or eski is None or (self.kaydedici and not self.kaydedici.idle()):
+                return False
+            self._bekleyen = None
+            eski.close()
+            try:
+                os.replace(bekleyen, eski.path)
+            finally:
+                # taşıma başarısız olsa da dosya (eskisi) yeniden açılır ve bağlanır
+                yeni = binsnap.CrmSnapshot(eski.path)
+                refler = {mid: ref for mid, *_, ref in yeni.customers()}
+                for m in self.musteriler.values():
+                    if isinstance(m, TembelMusteri) and m._kaynak[0] is eski and m.musteri_id in refler:
+                        m._kaynak = (yeni, refler[m.musteri_id])
+                self._goruntu = yeni
+            return True
+
+    @staticmethod
+    @timed("crm.anlik_goruntu_yaz")
+    def anlik_goruntu_yaz(goruntu, dosya):
+        # Kayıtlar (id, zaman, ...) demetleri olarak yazılır; çözülmemiş olanlar (None)
+        # burada, yazan iş parçacığında kaynak ikili dosyadan okunur
+        def satis_kayitlari(satislar, kaynak):
+            if satislar is None:
+                return kaynak[0].sales(kaynak[1])
+            return ((s._id, s.zaman, s.urun, s.miktar, s.toplam_tutar) for s in satislar)
+
+        def destek_kayitlari(destekler, kaynak):
+            return kaynak[0].tickets(kaynak[1]) if destekler is None else destekler
+
+        # .bin uzantılı dosyalar ikili biçimde (binsnap) yazılır
+        if dosya.endswith(IKILI_UZANTI):
+            atomic_write(dosya, lambda f: binsnap.write_crm(f, (
+                (mid, ad, soyad, telefon, email, satis_kayitlari(satislar, kaynak), destek_kayitlari(destekler, kaynak))
+                for mid, ad, soyad, telefon, email, satislar, destekler, kaynak in goruntu)), encoding=None)
+            return
+        # Her müşteri bir satıra yazılır; dosya biçimi verileri_yukle ile aynıdır
+        def yaz(f):
+            f.write("[")
+            for i, (mid, ad, soyad, telefon, email, satislar, destekler, kaynak) in enumerate(goruntu):
+                f.write(",\n" if i else "\n")
+                f.write(json.dumps({
+                    "musteri_id": mid, "ad": ad, "soyad": soyad, "telefon": telefon, "email": email,
+                    "satislar": [Satis.from_record(*k).to_dict() for k in satis_kayitlari(satislar, kaynak)],
+                    "destek_talepleri": [DestekTalebi.from_record(*k).to_dict()
+                                         for k in destek_kayitlari(destekler, kaynak)]
+                }, ensure_ascii=False))
+            f.write("\n]\n")
+        atomic_write(dosya, yaz)
+
+    @timed("crm.gunlugu_sikistir")
+    def gunlugu_sikistir(self, dosya=None):
+        # Günlüğü yeni bir anlık görüntüye katlar. Günlük önce döndürülür, böylece
+        # yazım sürerken gelen olaylar yeni günlüğe gider; döndürülen dosyalar
+        # ancak anlık görüntü diske yazıldıktan sonra silinir.
+        dosya = dosya or self.anlik_dosya
+        self.anlik_dosya = dosya
+        self.goruntuyu_tamamla()
+        yaz = self._kayit_isi(self.anlik_goruntu(), dosya)
+        sira = self.gunluk.dondur()
+        def is_():
+            yaz()
+            self.gunluk.donmuslari_sil(sira)
+        self._kaydet(("sikistir", dosya), is_)
+        self.goruntuyu_tamamla()
+
+    def kapat(self):
+        if self.kaydedici:
+            self.kaydedici.flush()
+        self.goruntuyu_tamamla()
+        if self.gunluk:
+            self.gunluk.diske_yaz()
+            self.gunluk.kapat()
+
+    @timed("crm.verileri_yukle")
+    def verileri_yukle(self, dosya="veriler.json", ilerleme=None):
+        for _ in self.verileri_yukle_adim(dosya, ilerleme):
+            pass
+
+    def verileri_yukle_adim(self, dosya="veriler.json", ilerleme=None, adim=2000):
+        # Müşteriler dosyadan tek tek okunur; her `adim` müşteride bir kez durulur.
+        # ilerleme(oran) okunan dosya oranıyla çağrılır. İkili anlık görüntüde yalnızca
+        # müşteri dizini okunur; satış ve destek kayıtları ilk erişimde çözülür.
+        self.anlik_dosya = dosya
+        self.goruntuyu_tamamla()
+        bekleyen = self._bekleyen_yolu(dosya)
+        if dosya.endswith(IKILI_UZANTI) and os.path.exists(bekleyen) and self._goruntu is None:
+            # önceki oturum yeni dosyayı yazmış ama yerine koyamadan kapanmış
+            os.replace(bekleyen, dosya)
         try:
-            with open(dosya, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                for m in data:
-                    musteri = Musteri(m['ad'], m['soyad'], m['telefon'], m['email'])
-                    musteri.musteri_id = m['musteri_id']
-                    for s in m['satislar']:
-                        musteri.satislar.append(Satis(s['urun'], s['miktar'], s['toplam_tutar']))
-                    for d in m['destek_talepleri']:
-                        destek = DestekTalebi(d['konu'], d['aciklama'])
-                        destek.tarih = d['tarih']
-                        destek.durum = d['durum']
-                        destek.talep_id = d['talep_id']
-                        musteri.destek_talepleri.append(destek)
-                    self.musteriler[musteri.musteri_id] = musteri
+            if binsnap.is_snapshot(dosya):
+                self._goruntu = goruntu = binsnap.CrmSnapshot(dosya)
+                for i, (mid, ad, soyad, telefon, email, toplam, ref) in enumerate(goruntu.customers(), 1):
+                    self._musteri_bagla(TembelMusteri(goruntu, self._goruntu_kilidi, mid, ad, soyad, telefon,
+                                                      email, toplam, ref))
+                    if i % adim == 0:
+                        if ilerleme:
+                            ilerleme(i / len(goruntu))
+                        yield i
+            else:
+                with open(dosya, "rb") as f:
+                    for i, m in enumerate(iter_array(f, progress=ilerleme), 1):
+                        self._musteri_bagla(Musteri.from_dict(m))
+                        if i % adim == 0:
+                            yield i
         except FileNotFoundError:
             pass
+        if self.gunluk:
+            self.gunluk.uygula(self)
+            self.gunluk.ac()
+        self.ozet.yeniden_olustur(self)
+        self._analiz = None
+        self._sutunlar = None
+        self._destekler = None
+        self._indeks = None
+        self._tekrarlar = None
+        self._siralar = None
+        self.ozetler.clear()
+
+class SatisOzeti:
+    # Genel toplam, müşteri toplamları ve en çok satış yapanlar için yığın; her satışta O(log n) güncellenir
+    def __init__(self):
+        self.genel_toplam = 0
+        self.musteri_toplamlari = {}
+        # (-toplam, musteri_id); eskiyen kayıtlar sorgu sırasında atılır
+        self._yigin = []
+
+    def yeniden_olustur(self, crm):
+        self.musteri_toplamlari = {
+            mid: m.satis_toplami() for mid, m in crm.musteriler.items()}
+        self.genel_toplam = sum(self.musteri_toplamlari.values())
+        self._yigini_kur()
+
+    def _yigini_kur(self):
+        self._yigin = [(-t, mid) for mid, t in self.musteri_toplamlari.items()]
+        heapq.heapify(self._yigin)
+
+    def __call__(self, olay, musteri, kayit):
+        if olay == "satis":
+            self.ekle(musteri.musteri_id, kayit.toplam_tutar)
+        elif olay == "musteri":
+            self.musteri_toplamlari[musteri.musteri_id] = 0
+            heapq.heappush(self._yigin, (0, musteri.musteri_id))
+        elif olay == "musteriler":
+            for m in kayit:
+                self.musteri_toplamlari[m.musteri_id] = 0
+                heapq.heappush(self._yigin, (0, m.musteri_id))
+        elif olay == "birlestir":
+            # genel toplam değişmez; gidenin yığındaki kayıtları sorguda atılır
+            tutar = self.musteri_toplamlari.pop(kayit.musteri_id, 0)
+            self.genel_toplam -= tutar
+            self.ekle(musteri.musteri_id, tutar)
+
+    def ekle(self, musteri_id, tutar):
+        self.genel_toplam += tutar
+        toplam = self.musteri_toplamlari.get(musteri_id, 0) + tutar
+        self.musteri_toplamlari[musteri_id] = toplam
+        heapq.heappush(self._yigin, (-toplam, musteri_id))
+        if len(self._yigin) > 2 * len(self.musteri_toplamlari) + 64:
+            self._yigini_kur()
+
+    def en_iyiler(self, n):
+        sonuc, gorulen = [], set()
+        while self._yigin and len(sonuc) < n:
+            eksi_toplam, mid = heapq.heappop(self._yigin)
+            if mid in gorulen or self.musteri_toplamlari.get(mid) != -eksi_toplam:
+                continue  # eski kayıt
+            gorulen.add(mid)
+            sonuc.append((mid, -eksi_toplam))
+        for mid, toplam in sonuc:
+            heapq.heappush(self._yigin, (-toplam, mid))
+        return sonuc
+
 
 # DİĞER GEREKLİ SINIFLAR
+# Satış ve destek kayıtları milyonlarca olabilir: __slots__, 16 baytlık id ve tamsayı zaman tutulur.
+# satis_id/talep_id ve tarih eskisi gibi metin olarak okunup yazılabilir.
 class Satis:
+    __slots__ = ("_id", "zaman", "urun", "miktar", "toplam_tutar")
+    satis_id = id_field("_id")
+    tarih = date_field("zaman")
+
     def __init__(self, urun, miktar, toplam_tutar):
-        self.satis_id = str(uuid.uuid4())
-        self.tarih = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        self.urun = urun
+        self._id = new_id()
+        self.zaman = now_ts()
+        self.urun = sys.intern(urun)
         self.miktar = miktar
         self.toplam_tutar = toplam_tutar
 
     def to_dict(self):
-        return self.__dict__
+        return {"satis_id": self.satis_id, "tarih": self.tarih, "urun": self.urun,
+                "miktar": self.miktar, "toplam_tutar": self.toplam_tutar}
+
+    @classmethod
+    def from_dict(cls, d):
+        satis = cls.__new__(cls)
+        satis._id = id_to_bytes(d['satis_id']) if 'satis_id' in d else new_id()
+        satis.zaman = ts_from_str(d['tarih']) if 'tarih' in d else now_ts()
+        satis.urun = sys.intern(d['urun'])
+        satis.miktar = d['miktar']
+        satis.toplam_tutar = d['toplam_tutar']
+        return satis
+
+    @classmethod
+    def from_record(cls, _id, zaman, urun, miktar, toplam_tutar):
+        satis = cls.__new__(cls)
+        satis._id, satis.zaman, satis.urun, satis.miktar, satis.toplam_tutar = _id, zaman, urun, miktar, toplam_tutar
+        return satis
 
 class DestekTalebi:
+    __slots__ = ("_id", "konu", "aciklama", "zaman", "durum")
+    talep_id = id_field("_id")
+    tarih = date_field("zaman")
+
     def __init__(self, konu, aciklama):
-        self.talep_id = str(uuid.uuid4())
+        self._id = new_id()
         self.konu = konu
         self.aciklama = aciklama
-        self.tarih = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.zaman = now_ts()
         self.durum = "Açık"
 
     def to_dict(self):
-        return self.__dict__
+        return {"talep_id": self.talep_id, "konu": self.konu, "aciklama": self.aciklama,
+                "tarih": self.tarih, "durum": self.durum}
+
+    @classmethod
+    def from_dict(cls, d):
+        destek = cls.__new__(cls)
+        destek._id = id_to_bytes(d['talep_id'])
+        destek.konu = d['konu']
+        destek.aciklama = d['aciklama']
+        destek.zaman = ts_from_str(d['tarih'])
+        destek.durum = sys.intern(d['durum'])
+        return destek
+
+    @classmethod
+    def from_record(cls, _id, zaman, durum, konu, aciklama):
+        destek = cls.__new__(cls)
+        destek._id, destek.zaman, destek.durum, destek.konu, destek.aciklama = _id, zaman, durum, konu, aciklama
+        return destek
+
+    def kayit(self):
+        # from_record'un tersi: o anki değerler
+        return self._id, self.zaman, self.durum, self.konu, self.aciklama
 
 class Musteri:
     def __init__(self, ad, soyad, telefon, email):
@@ -368,23 +1337,70 @@ class Musteri:
         self.email = email
         self.satislar = []
         self.destek_talepleri = []
+        self.crm = None
 
     def musteri_bilgilerini_goster(self):
         return f"{self.ad} {self.soyad} | Tel: {self.telefon} | Email: {self.email}"
 
-    def satis_ekle(self, urun, miktar, toplam_tutar):
+    def satis_toplami(self):
+        return sum(s.toplam_tutar for s in self.satislar)
+
+    def satis_sayisi(self):
+        return len(self.satislar)
+
+    def destek_sayisi(self):
+        return len(self.destek_talepleri)
+
+    def destek_anahtarlari(self):
+        # [(talep_id, zaman, durum)]
+        return [(d.talep_id, d.zaman, d.durum) for d in self.destek_talepleri]
+
+    # Dışa aktarım için: kayıtları belleğe almadan gezer
+    def satis_kayitlari(self):
+        return iter(self.satislar)
+
+    def destek_kayitlari(self):
+        return iter(self.destek_talepleri)
+
+    # Kaydetme anlık görüntüsü için (bkz. CRM.anlik_goruntu): satışlar, destekler, kaynak
+    def anlik_kayitlar(self):
+        return list(self.satislar), [d.kayit() for d in self.destek_talepleri], None
+
+    def satis_ekle(self, urun, miktar, toplam_tutar, tarih=None):
         satis = Satis(urun, miktar, toplam_tutar)
+        if tarih:
+            satis.tarih = tarih
         self.satislar.append(satis)
+        if self.crm:
+            self.crm._bildir("satis", self, satis)
+        return satis
 
     def destek_talebi_olustur(self, konu, aciklama):
         talep = DestekTalebi(konu, aciklama)
         self.destek_talepleri.append(talep)
+        if self.crm:
+            self.crm._bildir("destek", self, talep)
+        return talep
+
+    def destek_durumu_degistir(self, talep_id, durum):
+        talep = next((t for t in self.destek_talepleri if t.talep_id == talep_id), None)
+        if talep is None:
+            raise ValueError("Destek talebi bulunamadı")
+        if durum not in DESTEK_GECISLERI.get(talep.durum, ()):
+            raise ValueError(f"Geçersiz durum geçişi: {talep.durum} -> {durum}")
+        talep.durum = sys.intern(durum)
+        if self.crm:
+            self.crm._bildir("destek_durum", self, talep)
+        return talep
 
     def musteri_guncelle(self, ad=None, soyad=None, telefon=None, email=None):
+        eski = {"ad": self.ad, "soyad": self.soyad, "telefon": self.telefon, "email": self.email}
         if ad: self.ad = ad
         if soyad: self.soyad = soyad
         if telefon: self.telefon = telefon
         if email: self.email = email
+        if self.crm:
+            self.crm._bildir("guncelle", self, eski)
 
     def to_dict(self):
         return {
@@ -397,15 +1413,345 @@ class Musteri:
             "destek_talepleri": [d.to_dict() for d in self.destek_talepleri]
         }
 
+    @classmethod
+    def from_dict(cls, m):
+        musteri = cls(m['ad'], m['soyad'], m['telefon'], m['email'])
+        musteri.musteri_id = m['musteri_id']
+        for s in m['satislar']:
+            musteri.satislar.append(Satis.from_dict(s))
+        for d in m['destek_talepleri']:
+            musteri.destek_talepleri.append(DestekTalebi.from_dict(d))
+        return musteri
+
+
+class TembelMusteri(Musteri):
+    # İkili anlık görüntüden yüklenen müşteri: satış ve destek kayıtları ilk
+    # erişimde dosyadan çözülür; o zamana kadar toplam ve sayılar dizinden gelir
+    def __init__(self, goruntu, kilit, musteri_id, ad, soyad, telefon, email, satis_toplami, ref):
+        self.musteri_id = musteri_id
+        self.ad = ad
+        self.soyad = soyad
+        self.telefon = telefon
+        self.email = email
+        self.crm = None
+        # (görüntü, (ilk satış, satış sayısı, ilk talep, talep sayısı)); kaydedilen
+        # dosya yerine konunca `kilit` altında değişir (bkz. CRM.goruntuyu_tamamla)
+        self._kaynak = (goruntu, ref)
+        self._kilit = kilit
+        self._satis_toplami = satis_toplami
+        self._satislar = None
+        self._destekler = None
+
+    def _coz(self, okuma):
+        # okuma: "sales", "tickets" veya "ticket_keys"; kaynak değişimiyle aynı kilit altında
+        with self._kilit:
+            goruntu, ref = self._kaynak
+            return getattr(goruntu, okuma)(ref)
+
+    @property
+    def satislar(self):
+        if self._satislar is None:
+            self._satislar = [Satis.from_record(*k) for k in self._coz("sales")]
+        return self._satislar
+
+    @property
+    def destek_talepleri(self):
+        if self._destekler is None:
+            self._destekler = [DestekTalebi.from_record(*k) for k in self._coz("tickets")]
+        return self._destekler
+
+    def satis_toplami(self):
+        return self._satis_toplami if self._satislar is None else super().satis_toplami()
+
+    def satis_sayisi(self):
+        return self._kaynak[1][1] if self._satislar is None else len(self._satislar)
+
+    def destek_sayisi(self):
+        return self._kaynak[1][3] if self._destekler is None else len(self._destekler)
+
+    def destek_anahtarlari(self):
+        if self._destekler is None:
+            return self._coz("ticket_keys")
+        return super().destek_anahtarlari()
+
+    def satis_kayitlari(self):
+        if self._satislar is None:
+            return (Satis.from_record(*k) for k in self._coz("sales"))
+        return super().satis_kayitlari()
+
+    def destek_kayitlari(self):
+        if self._destekler is None:
+            return (DestekTalebi.from_record(*k) for k in self._coz("tickets"))
+        return super().destek_kayitlari()
+
+    def anlik_kayitlar(self):
+        # Çözülmemiş kayıtlar yerine None ve (görüntü, ref) döner; dosyadan okuma
+        # kaydı yazan iş parçacığında yapılır. Görüntü, bu kaydı yazan iş bitene
+        # kadar kapatılmaz (bkz. CRM.goruntuyu_tamamla).
+        satislar, destekler = self._satislar, self._destekler
+        return (None if satislar is None else list(satislar),
+                None if destekler is None else [d.kayit() for d in destekler], self._kaynak)
+
+
+class Gunluk:
+    # Sadece-ekleme günlüğü: her satır tek bir değişikliği tutar (JSON Lines)
+    def __init__(self, dosya):
+        self.dosya = dosya
+        self.f = None
+        self.kayit_sayisi = 0
+
+    def ac(self):
+        if self.f is None:
+            self.f = open(self.dosya, "a", encoding="utf-8")
+
+    def kapat(self):
+        if self.f:
+            self.f.close()
+            self.f = None
+
+    def olay_yaz(self, olay, musteri, kayit):
+        if olay == "musteriler":
+            self.ac()
+            self.f.write("".join(json.dumps({"t": "musteri", "m": m.to_dict()}, ensure_ascii=False,
+                                            separators=(",", ":")) + "\n" for m in kayit))
+            self.kayit_sayisi += len(kayit)
+            return
+        if olay == "musteri":
+            satir = {"t": olay, "m": musteri.to_dict()}
+        elif olay == "guncelle":
+            satir = {"t": olay, "id": musteri.musteri_id, "ad": musteri.ad, "soyad": musteri.soyad,
+                     "telefon": musteri.telefon, "email": musteri.email}
+        elif olay == "birlestir":
+            satir = {"t": olay, "id": musteri.musteri_id, "giden": kayit.musteri_id}
+        else:
+            satir = {"t": olay, "id": musteri.musteri_id, "k": kayit.to_dict()}
+        self.ac()
+        self.f.write(json.dumps(satir, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.kayit_sayisi += 1
+
+    @timed("crm.gunluk.diske_yaz")
+    def diske_yaz(self):
+        if self.f:
+            self.f.flush()
+            os.fsync(self.f.fileno())
+
+    def donmuslar(self):
+        # Sıkıştırılmayı bekleyen döndürülmüş günlükler: (sıra, yol), eskiden yeniye
+        klasor = os.path.dirname(os.path.abspath(self.dosya))
+        ad = re.escape(os.path.basename(self.dosya))
+        sonuc = []
+        for dosya in os.listdir(klasor):
+            eslesme = re.fullmatch(ad + r"\.(\d+)", dosya)
+            if eslesme:
+                sonuc.append((int(eslesme.group(1)), os.path.join(klasor, dosya)))
+        return sorted(sonuc)
+
+    def dondur(self):
+        # Mevcut günlüğü numaralı bir dosyaya taşır ve boş bir günlük açar
+        self.diske_yaz()
+        self.kapat()
+        donmuslar = self.donmuslar()
+        sira = donmuslar[-1][0] + 1 if donmuslar else 1
+        if os.path.exists(self.dosya):
+            os.replace(self.dosya, f"{self.dosya}.{sira}")
+        self.kayit_sayisi = 0
+        self.ac()
+        return sira
+
+    def donmuslari_sil(self, sira):
+        for n, yol in self.donmuslar():
+            if n <= sira:
+                os.remove(yol)
+
+    @timed("crm.gunluk.uygula")
+    def uygula(self, crm):
+        # Döndürülmüş günlükleri ve güncel günlüğü anlık görüntünün üzerine yeniden oynatır.
+        # Yarıda kalmış bir sıkıştırmadan sonra kayıtlar tekrar edebilir; id ile atlanır.
+        gorulen = {}
+        for _, yol in self.donmuslar():
+            self._dosyayi_uygula(crm, yol, gorulen)
+        self._dosyayi_uygula(crm, self.dosya, gorulen)
+
+    def _dosyayi_uygula(self, crm, yol, gorulen):
+        try:
+            f = open(yol, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for satir in f:
+                if not satir.endswith("\n"):
+                    break  # yarım yazılmış son satır
+                kayit = json.loads(satir)
+                self.kayit_sayisi += 1
+                olay = kayit["t"]
+                if olay == "musteri":
+                    if kayit["m"]["musteri_id"] not in crm.musteriler:
+                        crm._musteri_bagla(Musteri.from_dict(kayit["m"]))
+                    continue
+                musteri = crm.musteriler.get(kayit["id"])
+                if musteri is None:
+                    continue
+                if olay == "guncelle":
+                    musteri.ad, musteri.soyad = kayit["ad"], kayit["soyad"]
+                    musteri.telefon, musteri.email = kayit["telefon"], kayit["email"]
+                    continue
+                if olay == "birlestir":
+                    giden = crm.musteriler.pop(kayit["giden"], None)
+                    if giden is not None:
+                        musteri.satislar.extend(giden.satislar)
+                        musteri.destek_talepleri.extend(giden.destek_talepleri)
+                        gorulen.pop(("satis", musteri.musteri_id), None)
+                        gorulen.pop(("destek", musteri.musteri_id), None)
+                    continue
+                if olay == "destek_durum":
+                    for talep in musteri.destek_talepleri:
+                        if talep.talep_id == kayit["k"]["talep_id"]:
+                            talep.durum = sys.intern(kayit["k"]["durum"])
+                    continue
+                if olay == "satis":
+                    liste, anahtar, sinif = musteri.satislar, "satis_id", Satis
+                else:
+                    liste, anahtar, sinif = musteri.destek_talepleri, "talep_id", DestekTalebi
+                idler = gorulen.get((olay, musteri.musteri_id))
+                if idler is None:
+                    idler = gorulen[(olay, musteri.musteri_id)] = {getattr(x, anahtar) for x in liste}
+                if kayit["k"][anahtar] not in idler:
+                    idler.add(kayit["k"][anahtar])
+                    liste.append(sinif.from_dict(kayit["k"]))
+
+def komut_satiri(argv=None):
+    # Arayüzsüz toplu işlemler: python CRM.py rapor | ekle | satis | disa-aktar | ice-aktar
+    parser = argparse.ArgumentParser(prog="CRM.py", description="CRM komut satırı")
+    parser.add_argument("--dosya", default="veriler.json", help="anlık görüntü dosyası")
+    parser.add_argument("--gunluk", default="veriler.gunluk.jsonl", help="günlük dosyası")
+    parser.add_argument("--metrikler", help="ölçümü aç ve bitişte Prometheus metin biçiminde bu dosyaya yaz")
+    alt = parser.add_subparsers(dest="komut")
+    p = alt.add_parser("ekle", aliases=["add"], help="müşteri ekle")
+    for alan in ("ad", "soyad", "telefon", "email"):
+        p.add_argument(alan)
+    p = alt.add_parser("satis", aliases=["sale"], help="satış ekle")
+    p.add_argument("musteri", help="müşteri id, telefon veya email")
+    p.add_argument("urun")
+    p.add_argument("miktar", type=int)
+    p.add_argument("tutar", type=float)
+    p = alt.add_parser("rapor", aliases=["report"], help="satış raporu")
+    p.add_argument("-n", type=int, default=10, help="listelenecek müşteri sayısı")
+    p.add_argument("--aylik", type=int, default=0, metavar="AY", help="son AY ayın cirosunu da yaz")
+    p.add_argument("--baslangic", help="aralık raporu başlangıcı (YYYY-AA-GG, dahil)")
+    p.add_argument("--bitis", help="aralık raporu bitişi (YYYY-AA-GG, hariç)")
+    p = alt.add_parser("disa-aktar", aliases=["export"], help="müşteri, satış veya destek kayıtlarını CSV/JSONL olarak yaz")
+    p.add_argument("hedef")
+    p.add_argument("--tur", choices=list(DISA_AKTARIM_TURLERI), default="musteriler")
+    p.add_argument("--baslangic", help="bu tarihten itibaren (YYYY-AA-GG, dahil)")
+    p.add_argument("--bitis", help="bu tarihe kadar (YYYY-AA-GG, hariç)")
+    p.add_argument("--musteri", action="append", help="yalnızca bu müşteri id'si (tekrarlanabilir)")
+    p.add_argument("--parca", type=int, metavar="N", help="dosya başına en çok N satır (hedef-00001.csv, ...)")
+    p.add_argument("--durum", help="artımlı aktarım: son aktarılan zamanın tutulduğu dosya")
+    p = alt.add_parser("ice-aktar", aliases=["import"], help="CSV/JSONL müşteri veya satış aktar")
+    p.add_argument("kaynak")
+    p.add_argument("--isci", type=int, default=1, help="doğrulama için süreç sayısı")
+    p = alt.add_parser("tekrarlar", aliases=["duplicates"], help="olası tekrar müşterileri listele")
+    p.add_argument("--esik", type=float, default=0.8, help="en düşük benzerlik (0-1)")
+    p.add_argument("--isci", type=int, default=1, help="karşılaştırma için süreç sayısı")
+    p = alt.add_parser("birlestir", aliases=["merge"], help="giden müşteriyi kalan müşteriyle birleştir")
+    p.add_argument("kalan")
+    p.add_argument("giden")
+    p = alt.add_parser("donustur", aliases=["convert"], help="JSON ve ikili (.bin) anlık görüntü arasında dönüştür")
+    p.add_argument("kaynak")
+    p.add_argument("hedef")
+    args = parser.parse_args(argv)
+    if args.komut is None:
+        parser.print_help()
+        return 2
+    if args.metrikler:
+        instrumentation.enable()
+
+    def gun(deger):
+        # YYYY-AA-GG -> o günün başlangıcı
+        if not deger:
+            return None
+        ts = ts_from_str(deger + " 00:00:00")
+        if not isinstance(ts, int):
+            parser.error("tarih YYYY-AA-GG biçiminde olmalı")
+        return ts
+
+    if args.komut in ("donustur", "convert"):
+        kaynak = CRM()
+        kaynak.verileri_yukle(args.kaynak)
+        kaynak._kayit_isi(kaynak.anlik_goruntu(), args.hedef)()
+        kaynak.goruntuyu_tamamla()
+        print(f"{len(kaynak.musteriler)} müşteri {args.hedef} dosyasına yazıldı")
+        return 0
+
+    sistem = CRM(gunluk_dosyasi=args.gunluk)
+    sistem.verileri_yukle(args.dosya)
+    komut = {"add": "ekle", "sale": "satis", "report": "rapor", "export": "disa-aktar",
+             "import": "ice-aktar", "duplicates": "tekrarlar", "merge": "birlestir"}.get(args.komut, args.komut)
+    try:
+        if komut == "ekle":
+            for m, skor in sistem.olasi_tekrarlar(args.ad, args.soyad, args.telefon, args.email):
+                print(f"Uyarı: benzer müşteri {m.musteri_id} {m.musteri_bilgilerini_goster()} (%{skor * 100:.0f})",
+                      file=sys.stderr)
+            print(sistem.musteri_ekle(args.ad, args.soyad, args.telefon, args.email))
+        elif komut == "satis":
+            musteri = sistem.musteri_getir(args.musteri) or next(iter(sistem.musteri_ara(args.musteri, 1)), None)
+            if musteri is None:
+                parser.error(f"müşteri bulunamadı: {args.musteri}")
+            musteri.satis_ekle(args.urun, args.miktar, args.tutar)
+        elif komut == "rapor":
+            print(f"Müşteri sayısı: {len(sistem.musteriler)}")
+            print(f"Toplam satış tutarı: {sistem.toplam_satis_tutar()} ₺")
+            for i, (m, toplam) in enumerate(sistem.en_cok_satis_yapanlar(args.n), 1):
+                print(f"{i}. {m.ad} {m.soyad} - {toplam} ₺")
+            if args.aylik:
+                print("Aylık ciro:")
+                baslangic = analytics.month_start(now_ts(), args.aylik - 1)
+                for ay, ciro, miktar, adet in sistem.donemsel_satislar("month", baslangic, analytics.month_start(now_ts(), -1)):
+                    print(f"  {ay}: {ciro} ₺ ({adet} satış, {miktar} adet)")
+            if args.baslangic or args.bitis:
+                baslangic, bitis = gun(args.baslangic), gun(args.bitis)
+                print(f"Aralık toplamı: {sistem.donem_toplami(baslangic, bitis)} ₺")
+                for i, (m, toplam) in enumerate(sistem.donem_en_iyileri(args.n, baslangic, bitis), 1):
+                    print(f"{i}. {m.ad} {m.soyad} - {toplam} ₺")
+        elif komut == "disa-aktar":
+            sonuc = export.export(sistem, DISA_AKTARIM_TURLERI[args.tur], args.hedef,
+                                  start=gun(args.baslangic), end=gun(args.bitis), customer_ids=args.musteri,
+                                  chunk_rows=args.parca, state=args.durum)
+            print(json.dumps(sonuc, ensure_ascii=False))
+        elif komut == "ice-aktar":
+            print(json.dumps(bulk_import.import_file(sistem, args.kaynak, workers=args.isci), ensure_ascii=False))
+        elif komut == "tekrarlar":
+            for a, b, skor in sistem.tekrar_taramasi(args.esik, args.isci):
+                print(f"%{skor * 100:.0f}\t{a.musteri_id} {a.musteri_bilgilerini_goster()}\t"
+                      f"{b.musteri_id} {b.musteri_bilgilerini_goster()}")
+        elif komut == "birlestir":
+            try:
+                sistem.musterileri_birlestir(args.kalan, args.giden)
+            except ValueError as e:
+                parser.error(str(e))
+        if komut in ("ekle", "satis", "ice-aktar", "birlestir") and not sistem.verileri_kaydet(args.dosya):
+            print(f"Kayıt hatası: {sistem.son_hata}", file=sys.stderr)
+            return 1
+    finally:
+        sistem.kapat()
+        if args.metrikler:
+            instrumentation.export_prometheus(args.metrikler, prefix="crm")
+    return 0
+
+
 if __name__ == "__main__":
-    sistem = CRM()
-    sistem.verileri_yukle()
+    if len(sys.argv) > 1:
+        sys.exit(komut_satiri())
+
+    sistem = CRM(gunluk_dosyasi="veriler.gunluk.jsonl")
 
-    if not sistem.musteriler:
-        mid = sistem.musteri_ekle("Ayşe", "Çelik", "05005556677", "ayse@example.com")
-        m = sistem.musteri_getir(mid)
-        m.satis_ekle("Telefon", 1, 12000)
-        m.destek_talebi_olustur("Teslimat", "Kargo ne zaman gelir?")
+    def ornek_veri():
+        if not sistem.musteriler:
+            mid = sistem.musteri_ekle("Ayşe", "Çelik", "05005556677", "ayse@example.com")
+            m = sistem.musteri_getir(mid)
+            m.satis_ekle("Telefon", 1, 12000)
+            m.destek_talebi_olustur("Teslimat", "Kargo ne zaman gelir?")
 
     app = ModernCRMApp(sistem)
+    app.verileri_yukle(bitince=ornek_veri)
     app.run()
\ No newline at end of file
@@ -1,9 +1,27 @@
+import sys
+import time
 import uuid
 import json
-from datetime import datetime
-import tkinter as tk
-from tkinter import ttk, messagebox
-from tkinter.font import Font
+import sqlite3
+import argparse
+import threading
+from search_index import CustomerIndex, NameIndex, fold
+from dedup import DedupIndex
+from summary_cache import SummaryCache
+from query import SortedKeys, prefix_range
+from stock_index import StockIndex
+from tickets import TicketStore
+from jsonstream import iter_object
+from persistence import atomic_write, BackgroundSaver
+import bulk_import
+import export
+import binsnap
+import shards
+from compact import new_id, now_ts, ts_from_str, id_field, date_field
+import instrumentation
+from instrumentation import timed
+import analytics
+from analytics import SalesRollups
 
 # Style constants
 BG_COLOR = "#f0f0f0"
@@ -19,20 +37,59 @@ BUTTON_STYLE = {
     "font": ("Helvetica", 10)
 }
 
+# Support request statuses and allowed transitions; new requests are queued as "Open"
+SUPPORT_TRANSITIONS = {
+    "Open": ("In Progress", "Closed"),
+    "In Progress": ("Waiting", "Resolved", "Closed"),
+    "Waiting": ("In Progress", "Closed"),
+    "Resolved": ("Closed", "Open"),
+    "Closed": ("Open",),
+}
+CLOSED_STATUSES = ("Resolved", "Closed")
+
+# Store files with this suffix are saved as binary snapshots (see binsnap)
+BINARY_SUFFIX = ".bin"
+
+# tkinter is imported only when the GUI starts, so the StoreManager core works headless
+tk = ttk = messagebox = filedialog = Font = None
+
+
+def load_tk():
+    global tk, ttk, messagebox, filedialog, Font
+    import tkinter as tk
+    from tkinter import ttk, messagebox, filedialog
+    from tkinter.font import Font
+
 # Data Model Classes
 class Instrument:
-    def __init__(self, name, stock):
+    def __init__(self, name, stock, reorder_level=0):
         self.instrument_id = str(uuid.uuid4())
         self.name = name
-        self.stock = stock
+        self.reorder_level = reorder_level
+        # StockIndex tracking this instrument; every stock assignment is reported to it
+        self.index = None
+        self._stock = stock
+
+    @property
+    def stock(self):
+        return self._stock
+
+    @stock.setter
+    def stock(self, value):
+        old = self._stock
+        self._stock = value
+        if self.index is not None:
+            self.index.changed(self, old)
 
     def sell(self, quantity):
+        # not atomic on its own; StoreManager.create_sale calls it under the instrument's lock
         if quantity > self.stock:
             raise ValueError("Yetersiz stok")
         self.stock -= quantity
 
     def to_dict(self):
-        return {"instrument_id": self.instrument_id, "name": self.name, "stock": self.stock}
+        return {"instrument_id": self.instrument_id, "name": self.name, "stock": self.stock,
+                "reorder_level": self.reorder_level}
 
 class Customer:
     def __init__(self, first_name, last_name, phone, email):
@@ -55,11 +112,18 @@ class Customer:
             "supports": [sup.to_dict() for sup in self.supports]
         }
 
+# Sales and support requests are high-volume: slotted, with 16-byte ids and
+# integer timestamps behind the usual string attributes
 class Sale:
-    def __init__(self, customer_id, items):  # items: list of (instrument, qty, price)
-        self.sale_id = str(uuid.uuid4())
+    __slots__ = ("_id", "customer_id", "timestamp", "items", "total")
+    sale_id = id_field("_id")
+    date = date_field("timestamp")
+
+    def __init__(self, customer_id, items, date=None):  # items: list of (instrument, qty, price)
+        self._id = new_id()
         self.customer_id = customer_id
-        self.date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        # date: when the sale happened, if not now (e.g. imported history)
+        self.timestamp = now_ts() if date is None else ts_from_str(date)
         self.items = items  # tuple list
         self.total = sum(qty * price for _, qty, price in items)
 
@@ -71,12 +135,16 @@ class Sale:
                 ], "total": self.total}
 
 class SupportRequest:
+    __slots__ = ("_id", "customer_id", "subject", "message", "timestamp", "status")
+    request_id = id_field("_id")
+    date = date_field("timestamp")
+
     def __init__(self, customer_id, subject, message):
-        self.request_id = str(uuid.uuid4())
+        self._id = new_id()
         self.customer_id = customer_id
         self.subject = subject
         self.message = message
-        self.date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.timestamp = now_ts()
         self.status = "Open"
 
     def to_dict(self):
@@ -84,148 +152,972 @@ class SupportRequest:
                 "subject": self.subject, "message": self.message,
                 "date": self.date, "status": self.status}
 
+# Storage backend
+class SQLiteStorage:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS instruments (
+            instrument_id TEXT PRIMARY KEY, name TEXT NOT NULL, stock INTEGER NOT NULL,
+            reorder_level INTEGER NOT NULL DEFAULT 0);
+        CREATE TABLE IF NOT EXISTS customers (
+            customer_id TEXT PRIMARY KEY, first_name TEXT, last_name TEXT, phone TEXT, email TEXT);
+        CREATE TABLE IF NOT EXISTS sales (
+            sale_id TEXT PRIMARY KEY, customer_id TEXT NOT NULL, date TEXT, total REAL);
+        CREATE TABLE IF NOT EXISTS sale_items (
+            sale_id TEXT NOT NULL, instrument_id TEXT NOT NULL, qty INTEGER, price REAL);
+        CREATE TABLE IF NOT EXISTS supports (
+            request_id TEXT PRIMARY KEY, customer_id TEXT NOT NULL, subject TEXT, message TEXT,
+            date TEXT, status TEXT);
+        CREATE INDEX IF NOT EXISTS idx_sales_customer ON sales(customer_id);
+        CREATE INDEX IF NOT EXISTS idx_sale_items_sale ON sale_items(sale_id);
+        CREATE INDEX IF NOT EXISTS idx_sale_items_instrument ON sale_items(instrument_id);
+        CREATE INDEX IF NOT EXISTS idx_supports_customer ON supports(customer_id);
+    """
+
+    def __init__(self, path="store_data.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # the connection is shared between threads; transactions must not interleave
+        self.lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+        # databases created before reorder levels existed
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(instruments)")]
+        if "reorder_level" not in columns:
+            self.conn.execute("ALTER TABLE instruments ADD COLUMN reorder_level INTEGER NOT NULL DEFAULT 0")
+            self.conn.commit()
+
+    def is_empty(self):
+        row = self.conn.execute(
+            "SELECT EXISTS(SELECT 1 FROM instruments) OR EXISTS(SELECT 1 FROM customers)").fetchone()
+        return not row[0]
+
+    # Rows -> model objects
+    def _instrument(self, row):
+        inst = Instrument(row[1], row[2], row[3])
+        inst.instrument_id = row[0]
+        return inst
+
+    def _customer(self, row):
+        cust = Customer(row[1], row[2], row[3], row[4])
+        cust.customer_id = row[0]
+        return cust
+
+    def add_instrument(self, inst):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT INTO instruments (instrument_id, name, stock, reorder_level) "
+                              "VALUES (?, ?, ?, ?)", (inst.instrument_id, inst.name, inst.stock, inst.reorder_level))
+
+    def set_reorder_level(self, instrument_id, level):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE instruments SET reorder_level = ? WHERE instrument_id = ?",
+                              (level, instrument_id))
+
+    def units_sold(self):
+        return self.conn.execute("SELECT instrument_id, SUM(qty) FROM sale_items GROUP BY instrument_id")
+
+    def add_customer(self, cust):
+        self.add_customers([cust])
+
+    def add_customers(self, custs):
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT INTO customers VALUES (?, ?, ?, ?, ?)", [
+                (c.customer_id, c.first_name, c.last_name, c.phone, c.email) for c in custs])
+
+    def get_instrument(self, instrument_id):
+        row = self.conn.execute("SELECT * FROM instruments WHERE instrument_id = ?",
+                                (instrument_id,)).fetchone()
+        return self._instrument(row) if row else None
+
+    def get_customer(self, customer_id):
+        row = self.conn.execute("SELECT * FROM customers WHERE customer_id = ?",
+                                (customer_id,)).fetchone()
+        return self._customer(row) if row else None
+
+    def list_instruments(self, offset=0, limit=None):
+        rows = self.conn.execute("SELECT * FROM instruments ORDER BY rowid LIMIT ? OFFSET ?",
+                                 (-1 if limit is None else limit, offset))
+        return [self._instrument(r) for r in rows]
+
+    def iter_customer_keys(self):
+        return self.conn.execute(
+            "SELECT customer_id, first_name, last_name, phone, email FROM customers ORDER BY rowid")
+
+    def list_customers(self, offset=0, limit=None):
+        rows = self.conn.execute("SELECT * FROM customers ORDER BY rowid LIMIT ? OFFSET ?",
+                                 (-1 if limit is None else limit, offset))
+        return [self._customer(r) for r in rows]
+
+    @timed("store.storage.record_sale")
+    def record_sale(self, sale):
+        # Stock decrement and sale insert commit or roll back together
+        with self.lock, self.conn:
+            for inst, qty, price in sale.items:
+                cur = self.conn.execute(
+                    "UPDATE instruments SET stock = stock - ? WHERE instrument_id = ? AND stock >= ?",
+                    (qty, inst.instrument_id, qty))
+                if cur.rowcount != 1:
+                    raise ValueError("Yetersiz stok")
+            self.conn.execute("INSERT INTO sales VALUES (?, ?, ?, ?)",
+                              (sale.sale_id, sale.customer_id, sale.date, sale.total))
+            self.conn.executemany("INSERT INTO sale_items VALUES (?, ?, ?, ?)", [
+                (sale.sale_id, inst.instrument_id, qty, price) for inst, qty, price in sale.items])
+
+    def record_support(self, sup):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT INTO supports VALUES (?, ?, ?, ?, ?, ?)",
+                              (sup.request_id, sup.customer_id, sup.subject, sup.message,
+                               sup.date, sup.status))
+
+    def customer_sales(self, customer_id, get_instrument):
+        sales = []
+        for sale_id, date, total in self.conn.execute(
+                "SELECT sale_id, date, total FROM sales WHERE customer_id = ? ORDER BY rowid",
+                (customer_id,)).fetchall():
+            items = [(get_instrument(iid), qty, price) for iid, qty, price in self.conn.execute(
+                "SELECT instrument_id, qty, price FROM sale_items WHERE sale_id = ?", (sale_id,))]
+            sale = Sale(customer_id, items)
+            sale.sale_id, sale.date, sale.total = sale_id, date, total
+            sales.append(sale)
+        return sales
+
+    def _support(self, row):
+        sup = SupportRequest(row[1], row[2], row[3])
+        sup.request_id, sup.date, sup.status = row[0], row[4], row[5]
+        return sup
+
+    def customer_supports(self, customer_id):
+        return [self._support(row) for row in self.conn.execute(
+            "SELECT * FROM supports WHERE customer_id = ? ORDER BY rowid", (customer_id,))]
+
+    def get_support(self, request_id):
+        row = self.conn.execute("SELECT * FROM supports WHERE request_id = ?", (request_id,)).fetchone()
+        return self._support(row) if row else None
+
+    def set_support_status(self, request_id, status):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE supports SET status = ? WHERE request_id = ?", (status, request_id))
+
+    def iter_support_keys(self):
+        return self.conn.execute("SELECT request_id, customer_id, date, status FROM supports")
+
+    def count(self, table):
+        return self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def total_revenue(self):
+        return self.conn.execute("SELECT COALESCE(SUM(total), 0) FROM sales").fetchone()[0]
+
+    def monthly_revenue(self):
+        # [(YYYY-MM, revenue, sales)]; dates are stored as "YYYY-MM-DD HH:MM:SS"
+        return self.conn.execute("SELECT substr(date, 1, 7), SUM(total), COUNT(*) FROM sales "
+                                 "GROUP BY 1 ORDER BY 1").fetchall()
+
+    @staticmethod
+    def _date_range(column, start, end):
+        # WHERE clause for start <= date < end; bounds are "YYYY-MM-DD HH:MM:SS" strings or None
+        conds, args = [], []
+        if start is not None:
+            conds.append(f"{column} >= ?")
+            args.append(start)
+        if end is not None:
+            conds.append(f"{column} < ?")
+            args.append(end)
+        return (" WHERE " + " AND ".join(conds) if conds else ""), args
+
+    def iter_sale_lines(self, start=None, end=None):
+        # (sale_id, date, customer_id, instrument_id, instrument name, qty, price), grouped by sale
+        where, args = self._date_range("s.date", start, end)
+        return self.conn.execute(
+            "SELECT si.sale_id, s.date, s.customer_id, si.instrument_id, i.name, si.qty, si.price "
+            "FROM sale_items si JOIN sales s ON s.sale_id = si.sale_id "
+            "LEFT JOIN instruments i ON i.instrument_id = si.instrument_id" + where + " ORDER BY si.sale_id", args)
+
+    def iter_supports(self, start=None, end=None):
+        # (request_id, customer_id, subject, message, date, status)
+        where, args = self._date_range("date", start, end)
+        return self.conn.execute("SELECT request_id, customer_id, subject, message, date, status FROM supports"
+                                 + where + " ORDER BY rowid", args)
+
+    def merge_customers(self, keep_id, drop_id):
+        # sales and supports of drop_id move to keep_id, then drop_id is deleted; one transaction
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE sales SET customer_id = ? WHERE customer_id = ?", (keep_id, drop_id))
+            self.conn.execute("UPDATE supports SET customer_id = ? WHERE customer_id = ?", (keep_id, drop_id))
+            self.conn.execute("DELETE FROM customers WHERE customer_id = ?", (drop_id,))
+
+    def close(self):
+        self.conn.close()
+
+
 class StoreManager:
-    def __init__(self):
+    def __init__(self, storage=None):
         self.instruments = {}
         self.customers = {}
         self.sales = {}
         self.supports = {}
-        self.content = None
-        self.clear_content = None
+        # With a storage backend the dicts above are only caches of objects already touched;
+        # the backend is the source of truth and history is not loaded at startup.
+        self.storage = storage
+        # Indexes over the whole history (customer search, revenue rollups, units sold,
+        # support tickets) are built on first use, so opening a large database reads
+        # only the instrument catalogue; until then writes leave them alone.
+        self._index = None
+        # blocking index for likely duplicate customers; built on first use
+        self._dedup = None
+        # display rows for customer lists and selectors, recomputed only after a change
+        self.summaries = SummaryCache(self._summary_row)
+        # When set, JSON saves are written on this BackgroundSaver's worker thread
+        self.saver = None
+        # one lock per instrument id, created on first use
+        self._instrument_locks = {}
+        self._locks_guard = threading.Lock()
+        # day/week/month revenue rollups by instrument, instrument name and customer;
+        # sales are committed and counted under _analytics_lock so a concurrent first
+        # build never counts one twice
+        self._analytics = None
+        self._units_loaded = False
+        self._analytics_lock = threading.Lock()
+        # stock levels, reorder alerts and units sold per instrument
+        self.stock_index = StockIndex()
+        # instrument names for type-ahead search and the name order of query_instruments;
+        # kept with the stock index
+        self.instrument_names = NameIndex()
+        self.instrument_order = SortedKeys("name")
+        # customer sort orders of query_customers ("created", "name"); built on first use
+        self._customer_orders = None
+        self._customer_seq = 0
+        # support requests by status, age and customer, queued by SLA deadline
+        self._tickets = None
 
     # Instrument methods
-    def add_instrument(self, name, stock):
-        inst = Instrument(name, stock)
+    def add_instrument(self, name, stock, reorder_level=0):
+        inst = Instrument(name, stock, reorder_level)
+        if self.storage:
+            self.storage.add_instrument(inst)
         self.instruments[inst.instrument_id] = inst
+        self.stock_index.add(inst)
+        self.instrument_names.add(inst.instrument_id, inst.name)
+        self.instrument_order.add(inst.instrument_id, fold(inst.name))
+        return inst
+
+    def set_reorder_level(self, instrument_id, level):
+        inst = self.get_instrument(instrument_id)
+        if inst is None:
+            raise ValueError("Geçersiz enstrüman ID'si")
+        if self.storage:
+            self.storage.set_reorder_level(instrument_id, level)
+        self.stock_index.set_reorder_level(inst, level)
+        return inst
+
+    def low_stock(self):
+        # instruments at or below their reorder level
+        return self.stock_index.below_threshold()
+
+    def top_sellers(self, n=10):
+        # [(instrument, units sold)]
+        with self._analytics_lock:
+            if not self._units_loaded:
+                self.stock_index.set_units_sold(self._count_units())
+                self._units_loaded = True
+        return self.stock_index.top_sellers(n)
+
+    def _count_units(self):
+        if self.storage:
+            return self.storage.units_sold()
+        units = {}
+        for sale in self.sales.values():
+            for inst, qty, price in sale.items:
+                units[inst.instrument_id] = units.get(inst.instrument_id, 0) + qty
+        return units
+
+    @timed("store.rebuild_stock_index")
+    def rebuild_stock_index(self):
+        # in storage mode this caches every instrument; the catalogue is small.
+        # Units sold are counted on the first top_sellers() call.
+        listeners = self.stock_index.listeners
+        self.stock_index = StockIndex()
+        self.stock_index.listeners = listeners
+        instruments = self.list_instruments()
+        self.stock_index.extend(instruments)
+        self.instrument_names = NameIndex()
+        self.instrument_names.extend((i.instrument_id, i.name) for i in instruments)
+        self.instrument_order = SortedKeys("name")
+        self.instrument_order.extend((i.instrument_id, fold(i.name)) for i in instruments)
+        with self._analytics_lock:
+            self._units_loaded = False
+
+    def get_instrument(self, instrument_id):
+        inst = self.instruments.get(instrument_id)
+        if inst is None and self.storage:
+            inst = self.storage.get_instrument(instrument_id)
+            if inst:
+                self.instruments[instrument_id] = inst
+                self.stock_index.add(inst)
+                self.instrument_names.add(instrument_id, inst.name)
+                self.instrument_order.add(instrument_id, fold(inst.name))
         return inst
 
-    def list_instruments(self):
-        return list(self.instruments.values())
+    @timed("store.search_instruments")
+    def search_instruments(self, text, limit=20):
+        # prefix of any word of the name, Turkish-insensitive
+        return [self.get_instrument(iid) for iid in self.instrument_names.search(text, limit)]
+
+    @timed("store.query_instruments")
+    def query_instruments(self, prefix=None, stock_below=None, sort="name", descending=False, cursor=None, limit=50):
+        # ([instrument], cursor) by name or stock level; pass the cursor back for the next
+        # page, a page shorter than limit is the last. A filter on the sort field is a
+        # binary search, the other is checked row by row.
+        if sort == "stock":
+            where = None
+            if prefix:
+                text = fold(prefix)
+                where = lambda iid: self.instrument_order.key(iid).startswith(text)
+            return self.stock_index.page(cursor, limit, descending,
+                                         high=None if stock_below is None else stock_below - 1, where=where)
+        if sort != "name":
+            raise ValueError(f"Bilinmeyen sıralama: {sort}")
+        low, high = prefix_range(fold(prefix)) if prefix else (None, None)
+        where = None
+        if stock_below is not None:
+            where = lambda iid: self.get_instrument(iid).stock < stock_below
+        ids, cursor = self.instrument_order.page(cursor, limit, descending, low, high, where)
+        return [self.get_instrument(iid) for iid in ids], cursor
+
+    @timed("store.list_instruments")
+    def list_instruments(self, offset=0, limit=None):
+        if self.storage:
+            return [self.instruments.setdefault(i.instrument_id, i)
+                    for i in self.storage.list_instruments(offset, limit)]
+        items = list(self.instruments.values())
+        return items[offset:None if limit is None else offset + limit]
 
     # Customer methods
     def add_customer(self, first, last, phone, email):
         cust = Customer(first, last, phone, email)
+        if self.storage:
+            self.storage.add_customer(cust)
         self.customers[cust.customer_id] = cust
+        if self._index is not None:
+            self._index.add(cust.customer_id, first, last, phone, email)
+        if self._dedup is not None:
+            self._dedup.add(cust.customer_id, first, last, phone, email)
+        self._order_customers([cust])
+        return cust
+
+    def add_customers(self, rows):
+        # Bulk insert of (first, last, phone, email) rows: one transaction, one index sort
+        custs = [Customer(*row) for row in rows]
+        if self.storage:
+            self.storage.add_customers(custs)
+        for cust in custs:
+            self.customers[cust.customer_id] = cust
+        if self._index is not None:
+            self._index.extend((c.customer_id, c.first_name, c.last_name, c.phone, c.email) for c in custs)
+        if self._dedup is not None:
+            self._dedup.extend((c.customer_id, c.first_name, c.last_name, c.phone, c.email) for c in custs)
+        self._order_customers(custs)
+        return custs
+
+    def get_customer(self, customer_id):
+        cust = self.customers.get(customer_id)
+        if cust is None and self.storage:
+            cust = self.storage.get_customer(customer_id)
+            if cust:
+                self.customers[customer_id] = cust
         return cust
 
-    def list_customers(self):
-        return list(self.customers.values())
+    @timed("store.list_customers")
+    def list_customers(self, offset=0, limit=None):
+        if self.storage:
+            return [self.customers.setdefault(c.customer_id, c)
+                    for c in self.storage.list_customers(offset, limit)]
+        items = list(self.customers.values())
+        return items[offset:None if limit is None else offset + limit]
+
+    @timed("store.search_customers")
+    def search_customers(self, text, limit=20):
+        # name prefix, phone, email or Turkish-insensitive fuzzy match
+        return [self.get_customer(cid) for cid in self.index.search(text, limit)]
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = self._build_index()
+        return self._index
+
+    @timed("store.build_index")
+    def _build_index(self):
+        index = CustomerIndex()
+        if self.storage:
+            rows = self.storage.iter_customer_keys()
+        else:
+            rows = ((c.customer_id, c.first_name, c.last_name, c.phone, c.email)
+                    for c in self.customers.values())
+        index.extend(rows)
+        return index
+
+    def rebuild_index(self):
+        # drops the customer indexes; each is rebuilt on first use
+        self._index = None
+        self._dedup = None
+        self._customer_orders = None
+        self.summaries.clear()
+
+    def customer_summary(self, customer_id):
+        # (customer_id, "first last", phone, email, selector label)
+        return self.summaries.get(customer_id)
+
+    def _summary_row(self, customer_id):
+        c = self.get_customer(customer_id)
+        name = f"{c.first_name} {c.last_name}"
+        return customer_id, name, c.phone, c.email, f"{name} ({c.phone})" if c.phone else name
+
+    # Customer queries
+    @property
+    def customer_orders(self):
+        if self._customer_orders is None:
+            orders = {"created": SortedKeys("created"), "name": SortedKeys("name")}
+            if self.storage:
+                rows = [(cid, fold(f"{first} {last}")) for cid, first, last, _, _ in self.storage.iter_customer_keys()]
+            else:
+                rows = [(c.customer_id, fold(f"{c.first_name} {c.last_name}")) for c in self.customers.values()]
+            orders["created"].extend((cid, i) for i, (cid, _) in enumerate(rows))
+            orders["name"].extend(rows)
+            self._customer_seq = len(rows)
+            self._customer_orders = orders
+        return self._customer_orders
+
+    def _order_customers(self, custs):
+        if self._customer_orders is None:
+            return
+        self._customer_orders["created"].extend(
+            (c.customer_id, self._customer_seq + i) for i, c in enumerate(custs))
+        self._customer_seq += len(custs)
+        self._customer_orders["name"].extend((c.customer_id, fold(f"{c.first_name} {c.last_name}")) for c in custs)
+
+    @timed("store.query_customers")
+    def query_customers(self, prefix=None, has_open_tickets=None, sort="created", descending=False,
+                        cursor=None, limit=50):
+        # ([customer], cursor) in creation or name order; pass the cursor back for the next
+        # page, a page shorter than limit is the last. Customers added meanwhile never
+        # shift a page. A name prefix is a binary search when sorting by name.
+        orders = self.customer_orders
+        if sort not in orders:
+            raise ValueError(f"Bilinmeyen sıralama: {sort}")
+        low = high = None
+        conditions = []
+        if prefix:
+            text = fold(prefix)
+            if sort == "name":
+                low, high = prefix_range(text)
+            else:
+                conditions.append(lambda cid: orders["name"].key(cid).startswith(text))
+        if has_open_tickets is not None:
+            tickets = self.tickets
+            conditions.append(lambda cid: (tickets.open_count(cid) > 0) == has_open_tickets)
+        where = (lambda cid: all(c(cid) for c in conditions)) if conditions else None
+        ids, cursor = orders[sort].page(cursor, limit, descending, low, high, where)
+        return [self.get_customer(cid) for cid in ids], cursor
+
+    # Duplicates
+    @property
+    def dedup(self):
+        if self._dedup is None:
+            dedup = DedupIndex()
+            if self.storage:
+                dedup.extend(self.storage.iter_customer_keys())
+            else:
+                dedup.extend((c.customer_id, c.first_name, c.last_name, c.phone, c.email)
+                             for c in self.customers.values())
+            self._dedup = dedup
+        return self._dedup
+
+    def possible_duplicates(self, first, last, phone, email, min_score=0.8):
+        # [(customer, score)] existing customers that look like this one, best first
+        return [(self.get_customer(cid), score)
+                for cid, score in self.dedup.likely(first, last, phone, email, min_score)]
+
+    @timed("store.find_duplicates")
+    def find_duplicates(self, min_score=0.8, workers=1):
+        # [(customer id, customer id, score)] over every customer, best first
+        return self.dedup.scan(min_score, workers)
+
+    def merge_customers(self, keep_id, drop_id):
+        # moves the sales and support requests of drop_id to keep_id and deletes drop_id
+        keep, drop = self.get_customer(keep_id), self.get_customer(drop_id)
+        if keep is None or drop is None or keep_id == drop_id:
+            raise ValueError("Birleştirilecek müşteriler bulunamadı")
+        if self.storage:
+            self.storage.merge_customers(keep_id, drop_id)
+        for sale in drop.orders:
+            sale.customer_id = keep_id
+        for sup in drop.supports:
+            sup.customer_id = keep_id
+        keep.orders.extend(drop.orders)
+        keep.supports.extend(drop.supports)
+        del self.customers[drop_id]
+        if self._index is not None:
+            self._index.remove(drop_id)
+        if self._customer_orders is not None:
+            for order in self._customer_orders.values():
+                order.remove(drop_id)
+        if self._dedup is not None:
+            self._dedup.remove(drop_id)
+        with self._analytics_lock:
+            if self._analytics is not None:
+                self._analytics.merge("customer", drop_id, keep_id)
+        if self._tickets is not None:
+            self._tickets.reassign(drop_id, keep_id)
+        self.summaries.mark_dirty(drop_id)
+        self.summaries.mark_dirty(keep_id)
+        return keep
+
+    @timed("store.total_revenue")
+    def total_revenue(self):
+        if self.storage:
+            return self.storage.total_revenue()
+        return sum(s.total for s in self.sales.values())
+
+    @timed("store.customer_sales")
+    def customer_sales(self, customer_id):
+        if self.storage:
+            return self.storage.customer_sales(customer_id, self.get_instrument)
+        return list(self.customers[customer_id].orders)
+
+    def customer_supports(self, customer_id):
+        if self.storage:
+            return self.storage.customer_supports(customer_id)
+        return list(self.customers[customer_id].supports)
+
+    # Analytics
+    @property
+    def analytics(self):
+        with self._analytics_lock:
+            if self._analytics is None:
+                self._analytics = self._build_analytics()
+            return self._analytics
+
+    @staticmethod
+    def _add_to_analytics(analytics, sale):
+        first = 1
+        for inst, qty, price in sale.items:
+            analytics.add(sale.timestamp, qty * price, qty, first, product=inst.name,
+                          customer=sale.customer_id, instrument=inst.instrument_id)
+            first = 0
+
+    def _count_sale(self, sale):
+        # caller holds _analytics_lock; rollups that are not built yet will read
+        # the sale from the data when they are
+        if self._analytics is not None:
+            self._add_to_analytics(self._analytics, sale)
+        if self._units_loaded:
+            for inst, qty, price in sale.items:
+                self.stock_index.sold(inst.instrument_id, qty)
+
+    @timed("store.build_analytics")
+    def _build_analytics(self):
+        analytics = SalesRollups()
+        if not self.storage:
+            for sale in self.sales.values():
+                self._add_to_analytics(analytics, sale)
+            return analytics
+        previous = None
+        for sale_id, date, customer_id, iid, name, qty, price in self.storage.iter_sale_lines():
+            analytics.add(ts_from_str(date), qty * price, qty, int(sale_id != previous),
+                          product=name, customer=customer_id, instrument=iid)
+            previous = sale_id
+        return analytics
+
+    def rebuild_analytics(self):
+        # drops the rollups; they are rebuilt on the next query
+        with self._analytics_lock:
+            self._analytics = None
+
+    @timed("store.revenue_by_period")
+    def revenue_by_period(self, period="month", start=None, end=None):
+        # [(label, revenue, qty, sales)]; period is "day", "week" or "month"
+        return self.analytics.series(period, start, end)
+
+    @timed("store.top_instruments")
+    def top_instruments(self, n=20, start=None, end=None):
+        # [(instrument name, revenue, qty)] largest first
+        return self.analytics.top("product", n, start, end)
 
     # Sale
-    def create_sale(self, customer_id, items):
-        # reduce stock
+    def _locks_for(self, items):
+        # sorted by instrument id: every sale takes locks in the same order, so no deadlock
+        ids = sorted({inst.instrument_id for inst, _, _ in items})
+        with self._locks_guard:
+            return [self._instrument_locks.setdefault(iid, threading.Lock()) for iid in ids]
+
+    def _reserve(self, items):
+        # All-or-nothing stock reservation; caller holds the instrument locks
+        needed = {}
         for inst, qty, price in items:
-            inst.sell(qty)
-        sale = Sale(customer_id, items)
-        self.sales[sale.sale_id] = sale
-        self.customers[customer_id].orders.append(sale)
+            needed[inst] = needed.get(inst, 0) + qty
+        taken = []
+        try:
+            for inst, qty in needed.items():
+                inst.sell(qty)
+                taken.append((inst, qty))
+        except ValueError:
+            for inst, qty in taken:
+                inst.stock += qty
+            raise
+
+    @timed("store.create_sale")
+    def create_sale(self, customer_id, items, date=None):
+        if any(qty <= 0 for _, qty, _ in items):
+            raise ValueError("Geçersiz miktar")
+        # unknown customers are rejected in both modes before anything is written
+        cust = self.get_customer(customer_id)
+        if cust is None:
+            raise KeyError(customer_id)
+        locks = self._locks_for(items)
+        for lock in locks:
+            lock.acquire()
+        try:
+            sale = Sale(customer_id, items, date)
+            if self.storage:
+                # checks and decrements every item in one transaction
+                with self._analytics_lock:
+                    self.storage.record_sale(sale)
+                    self._count_sale(sale)
+                # database committed; mirror the decrement on cached objects
+                for inst, qty, price in items:
+                    inst.stock -= qty
+            else:
+                # reduce stock
+                self._reserve(items)
+                with self._analytics_lock:
+                    self.sales[sale.sale_id] = sale
+                    self._count_sale(sale)
+            cust.orders.append(sale)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
         return sale
 
     # Support
     def create_support(self, customer_id, subject, message):
         sup = SupportRequest(customer_id, subject, message)
-        self.supports[sup.request_id] = sup
-        self.customers[customer_id].supports.append(sup)
+        if self.storage:
+            self.storage.record_support(sup)
+        else:
+            self.supports[sup.request_id] = sup
+            self.customers[customer_id].supports.append(sup)
+        if self._tickets is not None:
+            self._tickets.add(sup.request_id, customer_id, sup.timestamp, sup.status)
         return sup
 
+    def get_support(self, request_id):
+        if self.storage:
+            return self.storage.get_support(request_id)
+        return self.supports.get(request_id)
+
+    def update_support_status(self, request_id, status):
+        if request_id not in self.tickets:
+            raise ValueError("Destek talebi bulunamadı")
+        if not self.tickets.can_transition(request_id, status):
+            raise ValueError(f"Geçersiz durum geçişi: {self.tickets.status(request_id)} -> {status}")
+        if self.storage:
+            self.storage.set_support_status(request_id, status)
+        else:
+            self.supports[request_id].status = sys.intern(status)
+        self.tickets.transition(request_id, status)
+        return self.get_support(request_id)
+
+    def next_support(self, status="In Progress"):
+        # takes the queued request with the nearest SLA deadline
+        request_id = self.tickets.next()
+        if request_id is None:
+            return None
+        return self.update_support_status(request_id, status)
+
+    def open_supports(self, limit=None):
+        # open requests, oldest first
+        ids = self.tickets.opened_before(now_ts() + 1)
+        return [self.get_support(rid) for rid in ids[:limit]]
+
+    @property
+    def tickets(self):
+        if self._tickets is None:
+            self._tickets = self._build_tickets()
+        return self._tickets
+
+    @timed("store.build_tickets")
+    def _build_tickets(self):
+        tickets = TicketStore(SUPPORT_TRANSITIONS, "Open", CLOSED_STATUSES)
+        if self.storage:
+            for request_id, customer_id, date, status in self.storage.iter_support_keys():
+                tickets.add(request_id, customer_id, ts_from_str(date), status)
+        else:
+            for sup in self.supports.values():
+                tickets.add(sup.request_id, sup.customer_id, sup.timestamp, sup.status)
+        return tickets
+
+    def rebuild_tickets(self):
+        # drops the ticket index; it is rebuilt on first use
+        self._tickets = None
+
     # Persistence
+    @timed("store.save_data")
     def save_data(self, filename="store_data.json"):
-        data = {
-            "instruments": [i.to_dict() for i in self.instruments.values()],
-            "customers": [c.to_dict() for c in self.customers.values()],
-            "sales": [s.to_dict() for s in self.sales.values()],
-            "supports": [sp.to_dict() for sp in self.supports.values()]
+        if self.storage:
+            # every write is already committed
+            self.storage.conn.commit()
+            return
+        snapshot = self.snapshot()
+        def job():
+            self.write_snapshot(snapshot, filename)
+        if self.saver:
+            self.saver.submit(filename, job)
+        else:
+            job()
+
+    @timed("store.snapshot")
+    def snapshot(self):
+        # Cheap copy taken on the caller's thread: references and scalars only.
+        # Sales never change after creation; stock and customer fields are copied.
+        return {
+            "instruments": [(i.instrument_id, i.name, i.stock, i.reorder_level) for i in self.instruments.values()],
+            "customers": [(c.customer_id, c.first_name, c.last_name, c.phone, c.email,
+                           list(c.orders), list(c.supports)) for c in self.customers.values()],
+            "sales": list(self.sales.values()),
+            "supports": list(self.supports.values()),
         }
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
 
-    def load_data(self, filename="store_data.json"):
+    @staticmethod
+    @timed("store.write_snapshot")
+    def write_snapshot(snapshot, filename):
+        if filename.endswith(BINARY_SUFFIX):
+            atomic_write(filename, lambda f: binsnap.write_store(
+                f, snapshot["instruments"],
+                (c[:5] for c in snapshot["customers"]),
+                ((s._id, s.customer_id, s.timestamp, s.total,
+                  [(inst.instrument_id, qty, price) for inst, qty, price in s.items]) for s in snapshot["sales"]),
+                ((sp._id, sp.customer_id, sp.timestamp, sp.status, sp.subject, sp.message)
+                 for sp in snapshot["supports"])), encoding=None)
+            return
+        # Same layout as before, one record per line, streamed into an atomically replaced file
+        sections = {
+            "instruments": ({"instrument_id": iid, "name": name, "stock": stock, "reorder_level": level}
+                            for iid, name, stock, level in snapshot["instruments"]),
+            "customers": ({"customer_id": cid, "first_name": first, "last_name": last,
+                           "phone": phone, "email": email,
+                           "orders": [o.to_dict() for o in orders],
+                           "supports": [sp.to_dict() for sp in sups]}
+                          for cid, first, last, phone, email, orders, sups in snapshot["customers"]),
+            "sales": (s.to_dict() for s in snapshot["sales"]),
+            "supports": (sp.to_dict() for sp in snapshot["supports"]),
+        }
+        def write(f):
+            f.write("{")
+            for n, (name, records) in enumerate(sections.items()):
+                f.write(f'{"," if n else ""}\n"{name}": [')
+                for i, rec in enumerate(records):
+                    f.write(",\n" if i else "\n")
+                    f.write(json.dumps(rec, ensure_ascii=False))
+                f.write("\n]")
+            f.write("\n}\n")
+        atomic_write(filename, write)
+
+    @timed("store.load_data")
+    def load_data(self, filename="store_data.json", progress=None):
+        if self.storage:
+            # Nothing to preload; an empty database is seeded once from an old JSON file
+            if self.storage.is_empty():
+                self.import_json(filename)
+            self.rebuild_index()
+            self.rebuild_analytics()
+            self.rebuild_stock_index()
+            self.rebuild_tickets()
+            return
         try:
-            with open(filename, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            # load instruments
-            for m in data.get("instruments", []):
-                inst = Instrument(m['name'], m['stock'])
-                inst.instrument_id = m['instrument_id']
-                self.instruments[inst.instrument_id] = inst
-            # load customers
-            for m in data.get("customers", []):
-                cust = Customer(m['first_name'], m['last_name'], m['phone'], m['email'])
-                cust.customer_id = m['customer_id']
-                self.customers[cust.customer_id] = cust
-            # sales & supports skip detailed reload for brevity
+            if binsnap.is_snapshot(filename):
+                self._load_snapshot(filename)
+            else:
+                # records are read one at a time; progress(fraction) is called as the file is consumed
+                with open(filename, "rb") as f:
+                    for section, m in iter_object(f, progress=progress):
+                        if section == "instruments":
+                            inst = Instrument(m['name'], m['stock'], m.get('reorder_level', 0))
+                            inst.instrument_id = m['instrument_id']
+                            self.instruments[inst.instrument_id] = inst
+                        elif section == "customers":
+                            cust = Customer(m['first_name'], m['last_name'], m['phone'], m['email'])
+                            cust.customer_id = m['customer_id']
+                            self.customers[cust.customer_id] = cust
+                        elif section == "sales":
+                            items = [(self.instruments[it['instrument_id']], it['qty'], it['price'])
+                                     for it in m['items'] if it['instrument_id'] in self.instruments]
+                            sale = Sale(m['customer_id'], items)
+                            sale.sale_id, sale.date, sale.total = m['sale_id'], m['date'], m['total']
+                            self.sales[sale.sale_id] = sale
+                            if sale.customer_id in self.customers:
+                                self.customers[sale.customer_id].orders.append(sale)
+                        elif section == "supports":
+                            sup = SupportRequest(m['customer_id'], m['subject'], m['message'])
+                            sup.request_id, sup.date, sup.status = m['request_id'], m['date'], sys.intern(m['status'])
+                            self.supports[sup.request_id] = sup
+                            if sup.customer_id in self.customers:
+                                self.customers[sup.customer_id].supports.append(sup)
         except FileNotFoundError:
             pass
+        self.rebuild_index()
+        self.rebuild_analytics()
+        self.rebuild_stock_index()
+        self.rebuild_tickets()
+
+    def _load_snapshot(self, filename):
+        # binary snapshot (binsnap); read in one pass and closed again
+        snap = binsnap.StoreSnapshot(filename)
+        try:
+            for iid, name, stock, level in snap.instruments():
+                inst = Instrument(name, stock, level)
+                inst.instrument_id = iid
+                self.instruments[iid] = inst
+            for cid, first, last, phone, email in snap.customers():
+                cust = Customer(first, last, phone, email)
+                cust.customer_id = cid
+                self.customers[cid] = cust
+            for sid, cid, ts, total, lines in snap.sales():
+                sale = Sale.__new__(Sale)
+                sale._id, sale.customer_id, sale.timestamp, sale.total = sid, cid, ts, total
+                sale.items = [(self.instruments[iid], qty, price) for iid, qty, price in lines
+                              if iid in self.instruments]
+                self.sales[sale.sale_id] = sale
+                if cid in self.customers:
+                    self.customers[cid].orders.append(sale)
+            for rid, cid, ts, status, subject, message in snap.supports():
+                sup = SupportRequest.__new__(SupportRequest)
+                sup._id, sup.customer_id, sup.timestamp, sup.status = rid, cid, ts, status
+                sup.subject, sup.message = subject, message
+                self.supports[sup.request_id] = sup
+                if cid in self.customers:
+                    self.customers[cid].supports.append(sup)
+        finally:
+            snap.close()
+
+    @timed("store.import_json")
+    def import_json(self, filename="store_data.json"):
+        # Copies a JSON store file into the storage backend
+        json_mgr = StoreManager()
+        json_mgr.load_data(filename)
+        conn = self.storage.conn
+        with self.storage.lock, conn:
+            conn.executemany("INSERT OR IGNORE INTO instruments (instrument_id, name, stock, reorder_level) "
+                             "VALUES (?, ?, ?, ?)", [
+                (i.instrument_id, i.name, i.stock, i.reorder_level) for i in json_mgr.instruments.values()])
+            conn.executemany("INSERT OR IGNORE INTO customers VALUES (?, ?, ?, ?, ?)", [
+                (c.customer_id, c.first_name, c.last_name, c.phone, c.email)
+                for c in json_mgr.customers.values()])
+            conn.executemany("INSERT OR IGNORE INTO sales VALUES (?, ?, ?, ?)", [
+                (s.sale_id, s.customer_id, s.date, s.total) for s in json_mgr.sales.values()])
+            conn.executemany("INSERT INTO sale_items VALUES (?, ?, ?, ?)", [
+                (s.sale_id, inst.instrument_id, qty, price)
+                for s in json_mgr.sales.values() for inst, qty, price in s.items])
+            conn.executemany("INSERT OR IGNORE INTO supports VALUES (?, ?, ?, ?, ?, ?)", [
+                (sp.request_id, sp.customer_id, sp.subject, sp.message, sp.date, sp.status)
+                for sp in json_mgr.supports.values()])
     
-    def sale_ui(self):                          
-        self.clear_content()
-        frm = ttk.Frame(self.content)
-        frm.pack(pady=20)
-        # Müşteri seçimi
-        ttk.Label(frm, text="Müşteri:").grid(row=0, column=0, pady=5, sticky=tk.W)
-        cust_cb = ttk.Combobox(frm, values=[
-            f"{c.first_name} {c.last_name}|{c.customer_id}" 
-            for c in self.list_customers()])
-        cust_cb.grid(row=0, column=1, padx=5)
+# GUI Application
+class TypeAhead:
+    # Combobox that searches as you type: keystrokes are debounced, at most
+    # `limit` matches are listed and each label maps to its record id, so the
+    # id never has to be parsed back out of the display text.
+    DELAY_MS = 250
 
-        # Enstrüman seçimi
-        ttk.Label(frm, text="Enstrüman:").grid(row=1, column=0, pady=5, sticky=tk.W)
-        inst_cb = ttk.Combobox(frm, values=[
-            f"{i.name}|{i.instrument_id}" 
-            for i in self.list_instruments()])
-        inst_cb.grid(row=1, column=1, padx=5)
+    def __init__(self, parent, search, first, label, record_id, limit=20, **options):
+        # search(text, limit) and first(limit) return records; first fills the
+        # list when the box is opened empty. label(record) is the display text.
+        self.search, self.first, self.label, self.record_id = search, first, label, record_id
+        self.limit = limit
+        self.choices = {}
+        self._pending = None
+        self.cb = ttk.Combobox(parent, postcommand=self._opening, **options)
+        self.cb.bind("<KeyRelease>", self._typed)
 
-        # Miktar ve fiyat
-        ttk.Label(frm, text="Miktar:").grid(row=2, column=0, pady=5, sticky=tk.W)
-        qty_e = ttk.Entry(frm); qty_e.grid(row=2, column=1, padx=5)
-        ttk.Label(frm, text="Birim Fiyat:").grid(row=3, column=0, pady=5, sticky=tk.W)
-        price_e = ttk.Entry(frm); price_e.grid(row=3, column=1, padx=5)
-        def save_sale():
-            try:
-                cust_id = cust_cb.get().split("|")[1]
-                inst_id = inst_cb.get().split("|")[1]
-                qty = int(qty_e.get())
-                price = float(price_e.get())
-                inst = self.instruments[inst_id]
-                sale = self.create_sale(cust_id, [(inst, qty, price)])
-                messagebox.showinfo("Başarılı", f"Satış kaydedildi: {sale.total} ₺")
-            except IndexError:
-                messagebox.showerror("Hata", "Lütfen müşteri/enstrüman seçin!")
-            except KeyError:
-                messagebox.showerror("Hata", "Geçersiz enstrüman ID'si!")
-            except ValueError as e:
-                messagebox.showerror("Hata", str(e))
-        ttk.Button(frm, text="Satışı Kaydet", command=save_sale).grid(row=4, columnspan=2, pady=10)
+    def grid(self, **options):
+        self.cb.grid(**options)
 
-    def support_ui(self):                       
-        self.clear_content()
-        frm = ttk.Frame(self.content)
-        frm.pack(pady=20)
-        # Müşteri
-        ttk.Label(frm, text="Müşteri:").grid(row=0, column=0, pady=5, sticky=tk.W)
-        cust_cb = ttk.Combobox(frm, values=[f"{c.first_name} {c.last_name}|{c.customer_id}" 
-                                            for c in self.list_customers()])
-        cust_cb.grid(row=0, column=1, padx=5)
-        # Konu ve mesaj
-        ttk.Label(frm, text="Konu:").grid(row=1, column=0, pady=5, sticky=tk.W)
-        subj_e = ttk.Entry(frm); subj_e.grid(row=1, column=1, padx=5)
-        ttk.Label(frm, text="Mesaj:").grid(row=2, column=0, pady=5, sticky=tk.W)
-        msg_e = tk.Text(frm, width=30, height=4); msg_e.grid(row=2, column=1, padx=5)
-        def save_support():
-            cust_id = cust_cb.get().split("|")[1]
-            subject = subj_e.get()
-            message = msg_e.get("1.0", tk.END).strip()
-            if not (cust_id and subject and message):
-                messagebox.showerror("Hata", "Tüm alanları doldurun")
-                return
-            sup = self.create_support(cust_id, subject, message)
-            messagebox.showinfo("Başarılı", f"Talep oluşturuldu: {sup.request_id}")
-        ttk.Button(frm, text="Talebi Kaydet", command=save_support).grid(row=3, columnspan=2, pady=10)
+    def _typed(self, event):
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        if self._pending is not None:
+            self.cb.after_cancel(self._pending)
+        self._pending = self.cb.after(self.DELAY_MS, self.refresh)
+
+    def _opening(self):
+        if not self.cb.get().strip():
+            self._show(self.first(self.limit))
+
+    def refresh(self):
+        self._pending = None
+        text = self.cb.get().strip()
+        self._show(self.search(text, self.limit) if text else [])
+
+    def _show(self, records):
+        self.choices = {}
+        for rec in records:
+            if rec is None:
+                continue
+            label = base = self.label(rec)
+            n = 2
+            while label in self.choices:
+                label = f"{base} ({n})"
+                n += 1
+            self.choices[label] = self.record_id(rec)
+        self.cb["values"] = list(self.choices)
+
+    def selected_id(self):
+        # id of the listed record whose label is in the box, or None
+        if self._pending is not None:
+            self.cb.after_cancel(self._pending)
+            self.refresh()
+        return self.choices.get(self.cb.get())
+
+
+class PagedTree:
+    # Fills a Treeview from a cursor query a page at a time; the next page is
+    # loaded when the view is scrolled near its end, so opening a list costs
+    # one page however many records there are.
+    PAGE = 200
+
+    def __init__(self, tree, insert):
+        self.tree, self.insert = tree, insert
+        self.query = None
+        self.cursor = None
+        self.done = True
+        self._pending = False
+        tree.configure(yscrollcommand=self._scrolled)
+
+    def show(self, query=None, items=()):
+        # query(cursor, limit) -> (records, cursor); or a fixed list of records
+        self.tree.delete(*self.tree.get_children())
+        self.query, self.cursor, self.done = query, None, query is None
+        for item in items:
+            self.insert(item)
+        self.more()
+
+    def more(self):
+        self._pending = False
+        if self.done:
+            return
+        items, cursor = self.query(self.cursor, self.PAGE)
+        self.cursor = cursor or self.cursor
+        self.done = len(items) < self.PAGE
+        for item in items:
+            self.insert(item)
+
+    def _scrolled(self, first, last):
+        if float(last) > 0.9 and not self.done and not self._pending:
+            self._pending = True
+            self.tree.after_idle(self.more)
 
 
-# GUI Application
 class InstrumentStoreApp:
-    def __init__(self, manager: StoreManager):
+    def __init__(self, manager: StoreManager, autosave_interval=60):
+        load_tk()
         self.manager = manager
         self.root = tk.Tk()
         self.root.title("Müzik Enstrüman Dükkanı Yönetimi")
@@ -239,8 +1131,51 @@ class InstrumentStoreApp:
         self.create_widgets()
         self.center_window()
 
-        self.manager.content = self.content
-        self.manager.clear_content = self.clear_content
+        # JSON saves run in the background; the window never waits on disk I/O
+        if self.manager.saver is None:
+            self.manager.saver = BackgroundSaver()
+        self.manager.stock_index.add_listener(self.stock_alert)
+        self.autosave_interval = autosave_interval
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        # Instrumentation shortcuts: F9 toggle, F10 write metrics, F11 start/stop profiling
+        self.root.bind("<F9>", self.toggle_metrics)
+        self.root.bind("<F10>", self.write_metrics)
+        self.root.bind("<F11>", self.toggle_profile)
+        self.check_save_errors()
+        if autosave_interval:
+            self.root.after(autosave_interval * 1000, self.autosave)
+
+    def autosave(self):
+        self.manager.save_data()
+        self.root.after(self.autosave_interval * 1000, self.autosave)
+
+    def check_save_errors(self):
+        while not self.manager.saver.errors.empty():
+            err = self.manager.saver.errors.get()
+            messagebox.showerror("Kayıt Hatası", f"Dosya yazma hatası: {err}")
+        self.root.after(500, self.check_save_errors)
+
+    def close(self):
+        self.manager.save_data()
+        self.manager.saver.flush()
+        self.root.destroy()
+
+    def toggle_metrics(self, event=None):
+        on = instrumentation.toggle()
+        self.status_label.config(text="Ölçüm açık" if on else "Ölçüm kapalı")
+
+    def write_metrics(self, event=None, path="store_metrics.prom"):
+        try:
+            instrumentation.export_prometheus(path, prefix="store")
+        except OSError as e:
+            messagebox.showerror("Hata", f"Metrikler yazılamadı: {e}")
+            return
+        self.status_label.config(text=f"Metrikler {path} dosyasına yazıldı")
+
+    def toggle_profile(self, event=None, prefix="store_profile"):
+        files = instrumentation.toggle_profile(prefix)
+        self.status_label.config(text="Profil alınıyor (bitirmek için F11)" if files is None
+                                 else "Profil yazıldı: " + ", ".join(files))
 
     def center_window(self):
         self.root.update_idletasks()
@@ -267,11 +1202,19 @@ class InstrumentStoreApp:
             ("Müşteri Listesi", self.show_customers),
             ("Satış Yap", self.sale_ui),
             ("Destek Talebi", self.support_ui),
+            ("Destek Kuyruğu", self.show_support_queue),
+            ("Raporlar", self.show_reports),
+            ("Toplu İçe Aktar", self.import_ui),
             ("Verileri Kaydet", lambda: self.manager.save_data())
         ]
+        self.buttons = []
         for txt, cmd in buttons:
+            cmd = instrumentation.wrap(cmd, "store.button." + txt)
             btn = tk.Button(left, text=txt, command=cmd, **BUTTON_STYLE)
             btn.pack(fill=tk.X, pady=3)
+            self.buttons.append(btn)
+        self.status_label = ttk.Label(left, text="", wraplength=180)
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X, pady=5)
 
         # Table frame placeholder
         self.table_frame = ttk.Frame(self.content)
@@ -283,25 +1226,105 @@ class InstrumentStoreApp:
         self.table_frame = ttk.Frame(self.content)
         self.table_frame.pack(fill=tk.BOTH, expand=True)
 
+    @timed("store.ui.show_instruments")
     def show_instruments(self):
         self.clear_content()
-        cols = ("ID", "Ad", "Stok")
+        bar = ttk.Frame(self.table_frame)
+        bar.pack(fill=tk.X, pady=(0, 5))
+        low_only = tk.BooleanVar(value=False)
+        cols = ("ID", "Ad", "Stok", "Eşik", "Satılan")
         tree = ttk.Treeview(self.table_frame, columns=cols, show='headings')
         for c in cols:
             tree.heading(c, text=c)
-        for inst in self.manager.list_instruments():
-            tree.insert('', 'end', values=(inst.instrument_id, inst.name, inst.stock))
+        tree.tag_configure("low", foreground="#c0392b")
+
+        def insert(inst):
+            tree.insert('', 'end', iid=inst.instrument_id,
+                        values=(inst.instrument_id, inst.name, inst.stock, inst.reorder_level,
+                                self.manager.stock_index.units_sold.get(inst.instrument_id, 0)),
+                        tags=("low",) if inst.stock <= inst.reorder_level else ())
+        pages = PagedTree(tree, insert)
+
+        def fill():
+            # the low-stock view comes straight from the stock index, no scan
+            if low_only.get():
+                pages.show(items=self.manager.low_stock())
+            else:
+                pages.show(lambda cursor, limit: self.manager.query_instruments(cursor=cursor, limit=limit))
+
+        def set_level():
+            selected = tree.selection()
+            if not selected:
+                messagebox.showwarning("Uyarı", "Lütfen bir enstrüman seçin")
+                return
+            try:
+                self.manager.set_reorder_level(selected[0], int(level_e.get()))
+            except ValueError:
+                messagebox.showerror("Hata", "Geçersiz eşik değeri")
+                return
+            fill()
+
+        ttk.Checkbutton(bar, text="Yalnızca düşük stok", variable=low_only, command=fill).pack(side=tk.LEFT)
+        ttk.Button(bar, text="Eşiği Ayarla", command=set_level).pack(side=tk.RIGHT)
+        level_e = ttk.Entry(bar, width=6)
+        level_e.pack(side=tk.RIGHT, padx=5)
+        ttk.Label(bar, text="Eşik:").pack(side=tk.RIGHT)
+        fill()
         tree.pack(fill=tk.BOTH, expand=True)
 
+    def stock_alert(self, event, inst):
+        if event == "low":
+            self.status_label.config(text=f"Düşük stok: {inst.name} ({inst.stock} adet)")
+
+    def show_reports(self):
+        self.clear_content()
+        now = now_ts()
+        ttk.Label(self.table_frame, text=f"Toplam Ciro: {self.manager.total_revenue()} ₺",
+                  font=self.title_font).pack(anchor=tk.W, pady=(0, 5))
+        # read from the precomputed rollups; no sale is scanned here
+        ttk.Label(self.table_frame, text="Aylık Ciro (son 24 ay)", font=self.normal_font).pack(anchor=tk.W)
+        self._report_table(("Ay", "Ciro (₺)", "Adet", "Satış"),
+                           self.manager.revenue_by_period("month", analytics.month_start(now, 23),
+                                                          analytics.month_start(now, -1)))
+        ttk.Label(self.table_frame, text="En Çok Satan Enstrümanlar (bu çeyrek)", font=self.normal_font).pack(anchor=tk.W)
+        self._report_table(("Enstrüman", "Ciro (₺)", "Adet"),
+                           self.manager.top_instruments(20, analytics.quarter_start(now)))
+        ttk.Label(self.table_frame, text="Düşük Stok", font=self.normal_font).pack(anchor=tk.W)
+        self._report_table(("Enstrüman", "Stok", "Eşik"),
+                           [(i.name, i.stock, i.reorder_level) for i in self.manager.low_stock()])
+
+    def _report_table(self, cols, rows):
+        tree = ttk.Treeview(self.table_frame, columns=cols, show='headings', height=8)
+        for c in cols:
+            tree.heading(c, text=c)
+        for row in rows:
+            tree.insert('', 'end', values=[f"{v:.2f}" if isinstance(v, float) else v for v in row])
+        tree.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+
+    @timed("store.ui.show_customers")
     def show_customers(self):
         self.clear_content()
+        search_frm = ttk.Frame(self.table_frame)
+        search_frm.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(search_frm, text="Ara:").pack(side=tk.LEFT)
+        search_e = ttk.Entry(search_frm)
+        search_e.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         cols = ("ID", "Ad Soyad", "Telefon", "Email")
         tree = ttk.Treeview(self.table_frame, columns=cols, show='headings')
         for c in cols:
             tree.heading(c, text=c)
-        for cust in self.manager.list_customers():
-            name = f"{cust.first_name} {cust.last_name}"
-            tree.insert('', 'end', values=(cust.customer_id, name, cust.phone, cust.email))
+
+        pages = PagedTree(tree, lambda cust: tree.insert(
+            '', 'end', values=self.manager.customer_summary(cust.customer_id)[:4]))
+
+        def search(event=None):
+            text = search_e.get().strip()
+            if text:
+                pages.show(items=self.manager.search_customers(text, limit=500))
+            else:
+                pages.show(lambda cursor, limit: self.manager.query_customers(cursor=cursor, limit=limit))
+        search_e.bind("<KeyRelease>", search)
+        search()
         tree.pack(fill=tk.BOTH, expand=True)
 
     def add_instrument_ui(self):
@@ -314,16 +1337,21 @@ class InstrumentStoreApp:
         ttk.Label(frm, text="Stok:").grid(row=1, column=0, pady=5)
         stk_e = ttk.Entry(frm)
         stk_e.grid(row=1, column=1, padx=5)
+        ttk.Label(frm, text="Yeniden Sipariş Eşiği:").grid(row=2, column=0, pady=5)
+        lvl_e = ttk.Entry(frm)
+        lvl_e.insert(0, "0")
+        lvl_e.grid(row=2, column=1, padx=5)
 
         def save():
             try:
                 name = name_e.get()
                 stk = int(stk_e.get())
-                self.manager.add_instrument(name, stk)
+                lvl = int(lvl_e.get() or 0)
+                self.manager.add_instrument(name, stk, lvl)
                 messagebox.showinfo("Başarılı", "Enstrüman eklendi")
             except ValueError:
                 messagebox.showerror("Hata", "Geçersiz stok değeri")
-        ttk.Button(frm, text="Kaydet", command=save).grid(row=2, columnspan=2, pady=10)
+        ttk.Button(frm, text="Kaydet", command=save).grid(row=3, columnspan=2, pady=10)
 
     def add_customer_ui(self):
         self.clear_content()
@@ -339,23 +1367,331 @@ class InstrumentStoreApp:
         def save():
             vals = [e.get() for e in entries]
             if all(vals):
+                similar = self.manager.possible_duplicates(*vals)
+                if similar and not messagebox.askyesno("Olası Tekrar", "Benzer müşteri(ler) var:\n" + "\n".join(
+                        f"{c.first_name} {c.last_name} - {c.phone} - {c.email} (%{score * 100:.0f})"
+                        for c, score in similar) + "\n\nYine de eklensin mi?"):
+                    return
                 self.manager.add_customer(*vals)
                 messagebox.showinfo("Başarılı", "Müşteri eklendi")
             else:
                 messagebox.showerror("Hata", "Tüm alanları doldurun")
         ttk.Button(frm, text="Kaydet", command=save).grid(row=4, columnspan=2, pady=10)
 
+    def import_ui(self):
+        # CSV/JSONL customers or sales, imported batch by batch from the Tk loop
+        path = filedialog.askopenfilename(filetypes=[("CSV / JSON Lines", "*.csv *.jsonl *.ndjson"), ("Tümü", "*.*")])
+        if not path:
+            return
+        for btn in self.buttons:
+            btn.config(state=tk.DISABLED)
+        steps = bulk_import.iter_import(self.manager, path)
+        stats = {}
+
+        def step():
+            try:
+                stats.update(next(steps))
+                self.status_label.config(text=f"İçe aktarılıyor... {stats['read']} satır")
+                self.root.after(1, step)
+                return
+            except StopIteration:
+                pass
+            except Exception as e:
+                messagebox.showerror("Hata", f"İçe aktarma durdu: {e}")
+            for btn in self.buttons:
+                btn.config(state=tk.NORMAL)
+            self.status_label.config(text="")
+            if stats:
+                messagebox.showinfo("İçe Aktarma", (
+                    f"Okunan: {stats['read']}\nEklenen: {stats['imported']}\n"
+                    f"Mükerrer: {stats['duplicates']}\nReddedilen: {stats['rejected']}\n"
+                    f"Süre: {stats['seconds']:.1f} sn ({stats['rows_per_sec']:.0f} satır/sn)\n"
+                    f"Hata raporu: {stats['error_report']}"))
+        self.root.after(1, step)
+
     def sale_ui(self):
-        self.manager.sale_ui()
+        self.clear_content()
+        frm = ttk.Frame(self.content)
+        frm.pack(pady=20)
+        # Müşteri seçimi (yazdıkça aranır)
+        ttk.Label(frm, text="Müşteri:").grid(row=0, column=0, pady=5, sticky=tk.W)
+        cust_cb = self.customer_selector(frm)
+        cust_cb.grid(row=0, column=1, padx=5)
+
+        # Enstrüman seçimi
+        ttk.Label(frm, text="Enstrüman:").grid(row=1, column=0, pady=5, sticky=tk.W)
+        inst_cb = TypeAhead(frm, self.manager.search_instruments,
+                            lambda limit: self.manager.query_instruments(limit=limit)[0],
+                            lambda i: f"{i.name} (stok: {i.stock})", lambda i: i.instrument_id)
+        inst_cb.grid(row=1, column=1, padx=5)
+
+        # Miktar ve fiyat
+        ttk.Label(frm, text="Miktar:").grid(row=2, column=0, pady=5, sticky=tk.W)
+        qty_e = ttk.Entry(frm); qty_e.grid(row=2, column=1, padx=5)
+        ttk.Label(frm, text="Birim Fiyat:").grid(row=3, column=0, pady=5, sticky=tk.W)
+        price_e = ttk.Entry(frm); price_e.grid(row=3, column=1, padx=5)
+        def save_sale():
+            try:
+                cust_id, inst_id = cust_cb.selected_id(), inst_cb.selected_id()
+                if cust_id is None or inst_id is None:
+                    raise LookupError
+                qty = int(qty_e.get())
+                price = float(price_e.get())
+                inst = self.manager.get_instrument(inst_id)
+                if inst is None:
+                    raise KeyError(inst_id)
+                sale = self.manager.create_sale(cust_id, [(inst, qty, price)])
+                messagebox.showinfo("Başarılı", f"Satış kaydedildi: {sale.total} ₺")
+            except KeyError:
+                messagebox.showerror("Hata", "Geçersiz enstrüman ID'si!")
+            except LookupError:
+                messagebox.showerror("Hata", "Lütfen müşteri/enstrüman seçin!")
+            except ValueError as e:
+                messagebox.showerror("Hata", str(e))
+        ttk.Button(frm, text="Satışı Kaydet", command=save_sale).grid(row=4, columnspan=2, pady=10)
+
+    def customer_selector(self, parent):
+        # opening the form costs the same for 10 or 10 million customers
+        return TypeAhead(parent, self.manager.search_customers,
+                         lambda limit: self.manager.query_customers(limit=limit)[0],
+                         lambda c: self.manager.customer_summary(c.customer_id)[4],
+                         lambda c: c.customer_id)
 
     def support_ui(self):
-        self.manager.support_ui()
+        self.clear_content()
+        frm = ttk.Frame(self.content)
+        frm.pack(pady=20)
+        # Müşteri
+        ttk.Label(frm, text="Müşteri:").grid(row=0, column=0, pady=5, sticky=tk.W)
+        cust_cb = self.customer_selector(frm)
+        cust_cb.grid(row=0, column=1, padx=5)
+        # Konu ve mesaj
+        ttk.Label(frm, text="Konu:").grid(row=1, column=0, pady=5, sticky=tk.W)
+        subj_e = ttk.Entry(frm); subj_e.grid(row=1, column=1, padx=5)
+        ttk.Label(frm, text="Mesaj:").grid(row=2, column=0, pady=5, sticky=tk.W)
+        msg_e = tk.Text(frm, width=30, height=4); msg_e.grid(row=2, column=1, padx=5)
+        def save_support():
+            cust_id = cust_cb.selected_id()
+            subject = subj_e.get()
+            message = msg_e.get("1.0", tk.END).strip()
+            if not (cust_id and subject and message):
+                messagebox.showerror("Hata", "Tüm alanları doldurun")
+                return
+            sup = self.manager.create_support(cust_id, subject, message)
+            messagebox.showinfo("Başarılı", f"Talep oluşturuldu: {sup.request_id}")
+        ttk.Button(frm, text="Talebi Kaydet", command=save_support).grid(row=3, columnspan=2, pady=10)
+
+    def show_support_queue(self):
+        # open requests, oldest first; "Sıradakini Al" takes the one with the nearest SLA deadline
+        self.clear_content()
+        bar = ttk.Frame(self.table_frame)
+        bar.pack(fill=tk.X, pady=(0, 5))
+        counter = ttk.Label(bar)
+        counter.pack(side=tk.LEFT)
+        cols = ("ID", "Müşteri", "Konu", "Durum", "Tarih", "Son Tarih")
+        tree = ttk.Treeview(self.table_frame, columns=cols, show='headings', selectmode="browse")
+        for c in cols:
+            tree.heading(c, text=c)
+        tree.tag_configure("overdue", foreground="#c0392b")
+
+        def fill():
+            tree.delete(*tree.get_children())
+            now = now_ts()
+            counter.config(text=f"Açık talep: {self.manager.tickets.open_total()}")
+            for sup in self.manager.open_supports(500):
+                deadline = self.manager.tickets.deadline(sup.request_id)
+                cust = self.manager.get_customer(sup.customer_id)
+                name = f"{cust.first_name} {cust.last_name}" if cust else sup.customer_id
+                tree.insert('', 'end', iid=sup.request_id, tags=("overdue",) if deadline < now else (), values=(
+                    sup.request_id, name, sup.subject, sup.status, sup.date,
+                    time.strftime("%Y-%m-%d %H:%M", time.gmtime(deadline))))
+
+        def take_next():
+            if self.manager.next_support() is None:
+                messagebox.showinfo("Bilgi", "Kuyrukta bekleyen talep yok")
+            fill()
+
+        def change_status():
+            selected = tree.selection()
+            if not selected:
+                messagebox.showwarning("Uyarı", "Lütfen bir talep seçin")
+                return
+            try:
+                self.manager.update_support_status(selected[0], status_cb.get())
+            except ValueError as e:
+                messagebox.showerror("Hata", str(e))
+            fill()
+
+        ttk.Button(bar, text="Sıradakini Al", command=take_next).pack(side=tk.RIGHT)
+        ttk.Button(bar, text="Durumu Değiştir", command=change_status).pack(side=tk.RIGHT, padx=5)
+        status_cb = ttk.Combobox(bar, values=list(SUPPORT_TRANSITIONS), state="readonly", width=12)
+        status_cb.current(1)
+        status_cb.pack(side=tk.RIGHT)
+        fill()
+        tree.pack(fill=tk.BOTH, expand=True)
 
     def run(self):
         self.root.mainloop()
 
+def main(argv=None):
+    # Headless batch operations: python "Muzin Dükkanı.py" report | add-customer | add-instrument | export | import
+    # | convert | duplicates | merge | branch-report | reindex-branches
+    parser = argparse.ArgumentParser(prog="Muzin Dükkanı.py", description="Instrument store command line")
+    parser.add_argument("--db", default="store_data.db", help="SQLite database")
+    parser.add_argument("--json", default="store_data.json", help="JSON file to seed an empty database from")
+    parser.add_argument("--metrics", help="enable instrumentation and write Prometheus text metrics here on exit")
+    parser.add_argument("--branches", metavar="DIR", help="one database per branch in DIR (see shards)")
+    parser.add_argument("--branch", help="branch to work on with --branches; replaces --db/--json")
+    sub = parser.add_subparsers(dest="command")
+    p = sub.add_parser("add-customer")
+    for field in ("first", "last", "phone", "email"):
+        p.add_argument(field)
+    p = sub.add_parser("add-instrument")
+    p.add_argument("name")
+    p.add_argument("stock", type=int)
+    p.add_argument("--reorder-level", type=int, default=0, help="low-stock alert threshold")
+    p = sub.add_parser("report")
+    p.add_argument("--monthly", type=int, default=0, metavar="N", help="also print revenue for the last N months")
+    p = sub.add_parser("export", help="write customers and instruments to a .json store file, "
+                                      "or stream customers/sales/supports to CSV/JSONL")
+    p.add_argument("target")
+    p.add_argument("--kind", choices=["customers", "sales", "supports"], default="customers")
+    p.add_argument("--start", help="from this date (YYYY-MM-DD, inclusive)")
+    p.add_argument("--end", help="until this date (YYYY-MM-DD, exclusive)")
+    p.add_argument("--customer", action="append", help="only this customer id (repeatable)")
+    p.add_argument("--chunk-rows", type=int, metavar="N", help="at most N rows per file (target-00001.csv, ...)")
+    p.add_argument("--state", help="incremental export: file holding the last exported time")
+    p = sub.add_parser("import", help="import customers or sales from CSV/JSONL")
+    p.add_argument("source")
+    p.add_argument("--workers", type=int, default=1)
+    p = sub.add_parser("duplicates", help="list likely duplicate customers")
+    p.add_argument("--min-score", type=float, default=0.8, help="lowest similarity (0-1)")
+    p.add_argument("--workers", type=int, default=1)
+    p = sub.add_parser("merge", help="move the sales and supports of drop into keep and delete drop")
+    p.add_argument("keep")
+    p.add_argument("drop")
+    p = sub.add_parser("branch-report", help="totals and stock across every branch of --branches")
+    p.add_argument("--workers", type=int, help="branches aggregated in parallel (default: CPU count)")
+    sub.add_parser("reindex-branches", help="rebuild the customer/instrument routes of --branches")
+    p = sub.add_parser("convert", help="convert a store file between JSON and the binary (.bin) snapshot")
+    p.add_argument("source")
+    p.add_argument("target")
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 2
+    if args.metrics:
+        instrumentation.enable()
+
+    def day(value):
+        # YYYY-MM-DD -> start of that day
+        if not value:
+            return None
+        ts = ts_from_str(value + " 00:00:00")
+        if not isinstance(ts, int):
+            parser.error("dates must be YYYY-MM-DD")
+        return ts
+
+    if args.command == "convert":
+        source = StoreManager()
+        source.load_data(args.source)
+        source.write_snapshot(source.snapshot(), args.target)
+        print(f"{len(source.customers)} customers, {len(source.sales)} sales written to {args.target}")
+        return 0
+
+    stores = shards.BranchStores(args.branches) if args.branches else None
+    if args.command in ("branch-report", "reindex-branches"):
+        if stores is None:
+            parser.error(f"{args.command} needs --branches")
+        try:
+            if args.command == "branch-report":
+                print(json.dumps(stores.report(args.workers), ensure_ascii=False, indent=2))
+            else:
+                print(f"{stores.reindex()} routes")
+        finally:
+            stores.close()
+        return 0
+
+    if stores:
+        if not args.branch:
+            parser.error("--branches needs --branch")
+        args.db = stores.path(args.branch)  # for commands that open the database again
+        mgr = stores.manager(args.branch)
+    else:
+        mgr = StoreManager(storage=SQLiteStorage(args.db))
+        mgr.load_data(args.json)
+    try:
+        if args.command == "add-customer":
+            for cust, score in mgr.possible_duplicates(args.first, args.last, args.phone, args.email):
+                print(f"Warning: similar customer {cust.customer_id} {cust.first_name} {cust.last_name} "
+                      f"{cust.phone} {cust.email} ({score:.0%})", file=sys.stderr)
+            if stores:
+                cust = stores.add_customer(args.branch, args.first, args.last, args.phone, args.email)
+            else:
+                cust = mgr.add_customer(args.first, args.last, args.phone, args.email)
+            print(cust.customer_id)
+        elif args.command == "add-instrument":
+            if stores:
+                inst = stores.add_instrument(args.branch, args.name, args.stock, args.reorder_level)
+            else:
+                inst = mgr.add_instrument(args.name, args.stock, args.reorder_level)
+            print(inst.instrument_id)
+        elif args.command == "report":
+            print(f"Customers: {mgr.storage.count('customers')}")
+            print(f"Sales: {mgr.storage.count('sales')}")
+            print(f"Revenue: {mgr.total_revenue()} ₺")
+            for inst in mgr.list_instruments():
+                print(f"{inst.name}: {inst.stock}")
+            low = mgr.low_stock()
+            if low:
+                print("Low stock:")
+                for inst in low:
+                    print(f"  {inst.name}: {inst.stock} (reorder at {inst.reorder_level})")
+            print("Top sellers:")
+            for inst, units in mgr.top_sellers(5):
+                print(f"  {inst.name}: {units} units")
+            if args.monthly:
+                print("Monthly revenue:")
+                start = analytics.month_start(now_ts(), args.monthly - 1)
+                for month, revenue, qty, sales in mgr.revenue_by_period("month", start, analytics.month_start(now_ts(), -1)):
+                    print(f"  {month}: {revenue} ₺ ({sales} sales, {qty} items)")
+        elif args.command == "export" and not args.target.lower().endswith(".json"):
+            stats = export.export(mgr, "tickets" if args.kind == "supports" else args.kind, args.target,
+                                  start=day(args.start), end=day(args.end), customer_ids=args.customer,
+                                  chunk_rows=args.chunk_rows, state=args.state)
+            print(json.dumps(stats, ensure_ascii=False))
+        elif args.command == "export":
+            # JSON dump of the open database, written through a manager without storage
+            dump = StoreManager()
+            for inst in mgr.storage.list_instruments():
+                dump.instruments[inst.instrument_id] = inst
+            for cust in mgr.storage.list_customers():
+                dump.customers[cust.customer_id] = cust
+            dump.save_data(args.target)
+        elif args.command == "import":
+            print(json.dumps(bulk_import.import_file(mgr, args.source, workers=args.workers), ensure_ascii=False))
+        elif args.command == "duplicates":
+            for a, b, score in mgr.find_duplicates(args.min_score, args.workers):
+                print(f"{score:.0%}\t{a}\t{b}")
+        elif args.command == "merge":
+            try:
+                mgr.merge_customers(args.keep, args.drop)
+            except ValueError as e:
+                parser.error(str(e))
+    finally:
+        if mgr.storage:
+            mgr.storage.close()
+        if stores:
+            stores.close()
+        if args.metrics:
+            instrumentation.export_prometheus(args.metrics, prefix="store")
+    return 0
+
+
 if __name__ == "__main__":
-    mgr = StoreManager()
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    mgr = StoreManager(storage=SQLiteStorage("store_data.db"))
     mgr.load_data()
     app = InstrumentStoreApp(mgr)
-    app.run()
+    app.run()
\ No newline at end of file
@@ -0,0 +1,134 @@
+import time
+import heapq
+import calendar
+
+# Time-bucketed sales rollups. Every sale line lands in a day, a week
+# (starting Monday) and a month bucket, both as a total and per dimension
+# (product, customer, instrument). Timestamps are the integer seconds used by
+# compact.now_ts, so bucket keys are plain integer arithmetic.
+#
+#   rollups.series("month", start, end)            -> revenue by month
+#   rollups.top("product", 20, start, end, "month") -> best products in a range
+
+DAY = 86400
+PERIODS = ("day", "week", "month")
+DIMENSIONS = ("product", "customer", "instrument")
+
+
+def bucket(period, ts):
+    day = ts // DAY
+    if period == "day":
+        return day
+    if period == "week":
+        return day - (day + 3) % 7  # 1970-01-01 was a Thursday
+    t = time.gmtime(ts)
+    return t.tm_year * 12 + t.tm_mon - 1
+
+
+def bucket_start(period, key):
+    if period == "month":
+        return calendar.timegm((key // 12, key % 12 + 1, 1, 0, 0, 0))
+    return key * DAY
+
+
+def label(period, key):
+    if period == "month":
+        return f"{key // 12}-{key % 12 + 1:02d}"
+    return time.strftime("%Y-%m-%d", time.gmtime(key * DAY))
+
+
+def month_start(ts, months_back=0):
+    # start of the month `months_back` months before the one containing ts
+    key = bucket("month", ts) - months_back
+    return bucket_start("month", key)
+
+
+def quarter_start(ts):
+    key = bucket("month", ts)
+    return bucket_start("month", key - key % 3)
+
+
+class SalesRollups:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # totals[period][key] = [revenue, qty, sales]
+        self.totals = {p: {} for p in PERIODS}
+        # by_dim[dim][period][key][value] = [revenue, qty]
+        self.by_dim = {d: {p: {} for p in PERIODS} for d in DIMENSIONS}
+        self.skipped = 0
+
+    def add(self, ts, revenue, qty, sales=1, **dims):
+        # One sale line; `sales` counts it towards the number of sales (pass 0
+        # for the 2nd, 3rd... line of a multi-item sale). dims: product=,
+        # customer=, instrument=.
+        if not isinstance(ts, int):
+            self.skipped += 1  # unparseable legacy date
+            return
+        for period in PERIODS:
+            key = bucket(period, ts)
+            total = self.totals[period].get(key)
+            if total is None:
+                total = self.totals[period][key] = [0, 0, 0]
+            total[0] += revenue
+            total[1] += qty
+            total[2] += sales
+            for dim, value in dims.items():
+                if value is None:
+                    continue
+                values = self.by_dim[dim][period].setdefault(key, {})
+                row = values.get(value)
+                if row is None:
+                    values[value] = [revenue, qty]
+                else:
+                    row[0] += revenue
+                    row[1] += qty
+
+    def merge(self, dim, old, new):
+        # folds every row of value `old` into `new` (e.g. two customers merged)
+        for buckets in self.by_dim[dim].values():
+            for values in buckets.values():
+                row = values.pop(old, None)
+                if row is None:
+                    continue
+                target = values.get(new)
+                if target is None:
+                    values[new] = row
+                else:
+                    target[0] += row[0]
+                    target[1] += row[1]
+
+    def _keys(self, buckets, period, start, end):
+        lo = None if start is None else bucket(period, start)
+        hi = None if end is None else bucket(period, end - 1)
+        return sorted(k for k in buckets if (lo is None or k >= lo) and (hi is None or k <= hi))
+
+    def series(self, period="month", start=None, end=None, dim=None, value=None):
+        # [(label, revenue, qty, sales)] for buckets overlapping [start, end);
+        # with dim/value only that product/customer/instrument (sales is then None)
+        if dim is None:
+            buckets = self.totals[period]
+            return [(label(period, k),) + tuple(buckets[k]) for k in self._keys(buckets, period, start, end)]
+        buckets = self.by_dim[dim][period]
+        result = []
+        for k in self._keys(buckets, period, start, end):
+            row = buckets[k].get(value)
+            if row:
+                result.append((label(period, k), row[0], row[1], None))
+        return result
+
+    def top(self, dim, n=10, start=None, end=None, period="month", by="revenue"):
+        # [(value, revenue, qty)] largest first, over buckets overlapping [start, end)
+        buckets = self.by_dim[dim][period]
+        sums = {}
+        for k in self._keys(buckets, period, start, end):
+            for value, (revenue, qty) in buckets[k].items():
+                row = sums.get(value)
+                if row is None:
+                    sums[value] = [revenue, qty]
+                else:
+                    row[0] += revenue
+                    row[1] += qty
+        i = 0 if by == "revenue" else 1
+        return [(v, r[0], r[1]) for v, r in heapq.nlargest(n, sums.items(), key=lambda item: item[1][i])]
@@ -0,0 +1,332 @@
+import os
+import gc
+import sys
+import json
+import contextlib
+import time
+import random
+import platform
+import argparse
+import tempfile
+import threading
+import tracemalloc
+
+from store_loader import load_store_module
+
+# Benchmarks for the CRM and StoreManager data paths on synthetic datasets.
+#   python benchmark.py run --sizes 10000,100000 --out sonuc.json
+#   python benchmark.py compare eski.json yeni.json --threshold 0.1
+#   python benchmark.py stress --threads 8
+
+FIRST_NAMES = ["Ayşe", "Mehmet", "Fatma", "Ali", "Zeynep", "Mustafa", "Elif", "Ahmet", "Işıl", "Çağrı"]
+LAST_NAMES = ["Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Öztürk", "Aydın", "Arslan", "Doğan"]
+PRODUCTS = ["Telefon", "Laptop", "Tablet", "Kulaklık", "Monitör", "Klavye", "Fare", "Yazıcı"]
+
+
+def generate_crm(customers, sales_per_customer=5, tickets_per_customer=1, seed=1):
+    # Objects are built directly (no events) so generation stays cheap
+    import CRM
+    rnd = random.Random(seed)
+    crm = CRM.CRM()
+    for n in range(customers):
+        m = CRM.Musteri(rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES), f"05{n:09d}", f"musteri{n}@example.com")
+        for _ in range(rnd.randint(0, 2 * sales_per_customer)):
+            miktar = rnd.randint(1, 5)
+            m.satislar.append(CRM.Satis(rnd.choice(PRODUCTS), miktar, float(miktar * rnd.randint(100, 20000))))
+        for _ in range(rnd.randint(0, 2 * tickets_per_customer)):
+            m.destek_talepleri.append(CRM.DestekTalebi("Teslimat", "Kargo ne zaman gelir?"))
+        crm._musteri_bagla(m)
+    crm.ozet.yeniden_olustur(crm)
+    return crm
+
+
+def generate_store(customers, instruments=500, sales_per_customer=2, seed=1):
+    store = load_store_module()
+    rnd = random.Random(seed)
+    mgr = store.StoreManager()
+    insts = [mgr.add_instrument(f"Enstrüman {i}", 10 ** 9) for i in range(instruments)]
+    for n in range(customers):
+        cust = store.Customer(rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES), f"05{n:09d}", f"musteri{n}@example.com")
+        mgr.customers[cust.customer_id] = cust
+        for _ in range(rnd.randint(0, 2 * sales_per_customer)):
+            sale = store.Sale(cust.customer_id, [(rnd.choice(insts), rnd.randint(1, 3), float(rnd.randint(500, 50000)))])
+            mgr.sales[sale.sale_id] = sale
+            cust.orders.append(sale)
+    return mgr
+
+
+class FakeTree:
+    # Just enough of ttk.Treeview for MusteriTablosu, so the refresh path runs without a display
+    def __init__(self):
+        self.rows = {}
+        self.top = 0.0
+
+    def configure(self, **kw):
+        pass
+
+    def get_children(self, item=""):
+        return tuple(self.rows)
+
+    def delete(self, *items):
+        for i in items:
+            del self.rows[i]
+
+    def insert(self, parent, index, iid=None, text="", values=()):
+        self.rows[iid] = (text, values)
+        return iid
+
+    def exists(self, iid):
+        return iid in self.rows
+
+    def item(self, iid, **kw):
+        if "values" in kw:
+            self.rows[iid] = (self.rows[iid][0], kw["values"])
+        return {"text": self.rows[iid][0], "values": self.rows[iid][1]}
+
+    def yview(self):
+        return (self.top, 1.0)
+
+    def yview_moveto(self, fraction):
+        self.top = float(fraction)
+
+    def after_idle(self, func):
+        func()
+
+
+class FakeScrollbar:
+    def set(self, first, last):
+        pass
+
+
+def measure(func, repeat=3, memory=True):
+    # best-of-N wall time, then one extra run under tracemalloc for peak allocation
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+
+def crm_benchmarks(size, workdir, repeat, memory):
+    import CRM
+    crm = generate_crm(size)
+    path = os.path.join(workdir, f"crm_{size}.json")
+    bin_path = os.path.join(workdir, f"crm_{size}.bin")
+    journal = os.path.join(workdir, f"crm_{size}.gunluk.jsonl")
+    crm.verileri_kaydet(path)
+    crm.verileri_kaydet(bin_path)
+    ids = list(crm.musteriler)
+    rnd = random.Random(size)
+
+    def load():
+        CRM.CRM().verileri_yukle(path)
+
+    def journal_save():
+        # one new sale appended to the journal, then a save
+        j.musteri_getir(rnd.choice(ids)).satis_ekle("Telefon", 1, 100.0)
+        j.verileri_kaydet(path)
+
+    j = CRM.CRM(gunluk_dosyasi=journal, sikistirma_esigi=10 ** 9)
+    j.verileri_yukle(path)
+    yil_basi = CRM.ts_from_str(time.strftime("%Y-01-01 00:00:00"))
+    tree = FakeTree()
+    tablo = CRM.MusteriTablosu(crm, tree, FakeScrollbar())
+    cases = [
+        ("crm.verileri_kaydet", lambda: crm.verileri_kaydet(path)),
+        ("crm.verileri_yukle", load),
+        ("crm.verileri_kaydet.ikili", lambda: crm.verileri_kaydet(bin_path)),
+        ("crm.verileri_yukle.ikili", lambda: CRM.CRM().verileri_yukle(bin_path)),
+        ("crm.verileri_kaydet.gunluk", journal_save),
+        ("crm.toplam_satis_tutar", crm.toplam_satis_tutar),
+        ("crm.en_cok_satis_yapan", crm.en_cok_satis_yapan),
+        ("crm.donem_en_iyileri", lambda: crm.donem_en_iyileri(10, yil_basi)),
+        ("crm.musteri_listele", crm.musteri_listele),
+        ("crm.update_table", tablo.yenile),
+    ]
+    try:
+        for name, func in cases:
+            yield name, measure(func, repeat, memory)
+    finally:
+        j.kapat()
+
+
+def store_benchmarks(size, workdir, repeat, memory):
+    store = load_store_module()
+    mgr = generate_store(size)
+    path = os.path.join(workdir, f"store_{size}.json")
+    bin_path = os.path.join(workdir, f"store_{size}.bin")
+    mgr.save_data(path)
+    mgr.save_data(bin_path)
+    insts = list(mgr.instruments.values())
+    custs = list(mgr.customers)
+    rnd = random.Random(size)
+
+    def load():
+        store.StoreManager().load_data(path)
+
+    def sales():
+        for _ in range(1000):
+            mgr.create_sale(rnd.choice(custs), [(rnd.choice(insts), 1, 100.0)])
+
+    cases = [
+        ("store.save_data", lambda: mgr.save_data(path)),
+        ("store.load_data", load),
+        ("store.save_data.binary", lambda: mgr.save_data(bin_path)),
+        ("store.load_data.binary", lambda: store.StoreManager().load_data(bin_path)),
+        ("store.create_sale.x1000", sales),
+        ("store.list_customers", mgr.list_customers),
+    ]
+    for name, func in cases:
+        yield name, measure(func, repeat, memory)
+
+
+def run(sizes, repeat=3, memory=True, progress=None):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            for suite in (crm_benchmarks, store_benchmarks):
+                for name, (seconds, peak) in suite(size, workdir, repeat, memory):
+                    results.append({"name": name, "size": size, "seconds": seconds, "peak_bytes": peak})
+                    if progress:
+                        progress(results[-1])
+    return {"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                     "time": time.strftime("%Y-%m-%d %H:%M:%S"), "repeat": repeat},
+            "results": results}
+
+
+def compare(old, new, threshold=0.10):
+    # Flags every (name, size) whose time grew by more than `threshold` (relative)
+    before = {(r["name"], r["size"]): r for r in old["results"]}
+    rows = []
+    for r in new["results"]:
+        o = before.get((r["name"], r["size"]))
+        if o is None:
+            continue
+        ratio = r["seconds"] / o["seconds"] if o["seconds"] else float("inf")
+        rows.append({"name": r["name"], "size": r["size"], "old": o["seconds"], "new": r["seconds"],
+                     "ratio": ratio, "regression": ratio > 1 + threshold})
+    return rows
+
+
+def stress_checkout(threads=8, orders_per_thread=2000, instruments=20, initial_stock=300,
+                    max_items=3, db=None, seed=1):
+    # Concurrent multi-item checkouts against one StoreManager. Afterwards,
+    # for every instrument, remaining stock + units in recorded sales must
+    # equal the initial stock (no lost or phantom updates).
+    store = load_store_module()
+    mgr = store.StoreManager(storage=store.SQLiteStorage(db) if db else None)
+    insts = [mgr.add_instrument(f"Enstrüman {i}", initial_stock) for i in range(instruments)]
+    cust = mgr.add_customer("Stres", "Test", "05000000000", "stres@example.com")
+    counts = {"ok": 0, "rejected": 0}
+    counts_lock = threading.Lock()
+    start_gate = threading.Barrier(threads)
+
+    def worker(n):
+        rnd = random.Random(seed + n)
+        ok = rejected = 0
+        start_gate.wait()
+        for _ in range(orders_per_thread):
+            picked = rnd.sample(insts, rnd.randint(1, max_items))
+            try:
+                mgr.create_sale(cust.customer_id, [(i, rnd.randint(1, 3), 10.0) for i in picked])
+                ok += 1
+            except ValueError:
+                rejected += 1
+        with counts_lock:
+            counts["ok"] += ok
+            counts["rejected"] += rejected
+
+    old_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # force frequent thread switches to expose races
+    try:
+        pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        t0 = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        seconds = time.perf_counter() - t0
+    finally:
+        sys.setswitchinterval(old_interval)
+
+    sold = {i.instrument_id: 0 for i in insts}
+    sales = mgr.customer_sales(cust.customer_id)
+    for sale in sales:
+        for inst, qty, _ in sale.items:
+            sold[inst.instrument_id] += qty
+    current = {i.instrument_id: (mgr.storage.get_instrument(i.instrument_id).stock if mgr.storage else i.stock)
+               for i in insts}
+    mismatched = [iid for iid in sold if current[iid] + sold[iid] != initial_stock or current[iid] < 0]
+    if mgr.storage:
+        mgr.storage.close()
+    orders = threads * orders_per_thread
+    return {"benchmark": "stress_checkout", "threads": threads, "orders": orders,
+            "completed": counts["ok"], "rejected": counts["rejected"],
+            "sales_recorded": len(sales),
+            "seconds": seconds, "orders_per_sec": orders / seconds if seconds else 0.0,
+            "inconsistent_instruments": len(mismatched),
+            "consistent": not mismatched and len(sales) == counts["ok"]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CRM / StoreManager performans ölçümleri")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("run", help="sentetik veriyle ölçüm yap")
+    p.add_argument("--sizes", default="10000", help="virgülle ayrılmış müşteri sayıları, ör. 10000,100000,1000000")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--no-memory", action="store_true", help="tracemalloc ile tepe bellek ölçme")
+    p.add_argument("--out", help="JSON sonuç dosyası (verilmezse stdout)")
+    p = sub.add_parser("compare", help="iki sonuç dosyasını karşılaştır")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=0.10, help="izin verilen göreli yavaşlama")
+    p = sub.add_parser("stress", help="eşzamanlı çok kalemli satış stres testi")
+    p.add_argument("--threads", type=int, default=8)
+    p.add_argument("--orders", type=int, default=2000, help="iş parçacığı başına sipariş")
+    p.add_argument("--instruments", type=int, default=20)
+    p.add_argument("--stock", type=int, default=300)
+    p.add_argument("--db", help="SQLite dosyası (verilmezse bellek içi)")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        sizes = [int(x) for x in args.sizes.split(",")]
+        # the CRM prints to stdout while saving/listing; keep stdout for the JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            result = run(sizes, args.repeat, not args.no_memory,
+                         progress=lambda r: print(f"{r['name']:<28} {r['size']:>9} {r['seconds']:10.4f} s"))
+        text = json.dumps(result, indent=2)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                f.write(text)
+        else:
+            print(text)
+        return 0
+    if args.command == "compare":
+        with open(args.old, encoding="utf-8") as f:
+            old = json.load(f)
+        with open(args.new, encoding="utf-8") as f:
+            new = json.load(f)
+        rows = compare(old, new, args.threshold)
+        for r in rows:
+            flag = "REGRESYON" if r["regression"] else ""
+            print(f"{r['name']:<28} {r['size']:>9} {r['old']:10.4f} -> {r['new']:10.4f} s  x{r['ratio']:.2f} {flag}")
+        return 1 if any(r["regression"] for r in rows) else 0
+    if args.command == "stress":
+        result = stress_checkout(args.threads, args.orders, args.instruments, args.stock, db=args.db)
+        print(json.dumps(result, indent=2))
+        return 0 if result["consistent"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,376 @@
+import io
+import mmap
+import uuid
+import struct
+from compact import id_to_str
+
+# Compact binary snapshots for the CRM and the store, read through mmap.
+#
+#   header   magic, version, then section offsets/counts (HEADER)
+#   records  fixed-width structs: 16-byte binary ids, integer timestamps,
+#            string-table references for repeated short strings
+#   names    customer names/contacts as one UTF-8 text, referenced by character
+#            offset/length and decoded with a single call when the file is opened
+#   blob     other free text (ticket subjects...) referenced by byte offset/length
+#   strings  string table: product names, statuses, and any id or date that
+#            was not a UUID / parseable date (flag bits mark those fields)
+#
+# Amounts (sale amounts, totals, prices) take 8 bytes: an int64 when the value
+# was an integer (NUM_INT set), a double otherwise, so 12000 stays 12000 and
+# 12000.5 stays 12000.5 through a save and load.
+#
+# The CRM file has a fixed-width customer directory so a customer's sales
+# and tickets can be decoded only when first needed.
+
+VERSION = 2  # 2: integer amounts kept as int64 (version 1 files hold only doubles and still load)
+MAGIC_CRM = b"CRMSNAP\x00"
+MAGIC_STORE = b"STRSNAP\x00"
+
+HEADER = struct.Struct("<8sHH16Q")
+U32 = struct.Struct("<I")
+I64 = struct.Struct("<q")
+F64 = struct.Struct("<d")
+
+# flag bits
+ID_STR = 1    # id field holds a string-table index
+TS_STR = 2    # timestamp field holds a string-table index
+REF_STR = 4   # second id field (customer reference) holds a string-table index
+NUM_INT = 8   # the record's amount field holds an int64 instead of a double
+
+CRM_FIELDS = ("strings", "n_strings", "directory", "n_directory", "sales", "n_sales",
+              "tickets", "n_tickets", "names", "names_len", "blob", "blob_len")
+# flags, id, names offset, 4 text lengths, first sale, sale count, first ticket, ticket count, sales total
+CRM_CUSTOMER = struct.Struct("<B16sQIIIIQIQI8s")
+# flags, id, timestamp, product, qty, amount
+CRM_SALE = struct.Struct("<B16sqIq8s")
+# flags, id, timestamp, status, blob offset, subject length, description length
+CRM_TICKET = struct.Struct("<B16sqIQII")
+
+STORE_FIELDS = ("strings", "n_strings", "instruments", "n_instruments", "customers", "n_customers",
+                "sales", "n_sales", "items", "n_items", "supports", "n_supports", "names", "names_len",
+                "blob", "blob_len")
+# flags, id, name, stock, reorder level
+STORE_INSTRUMENT = struct.Struct("<B16sIqq")
+# flags, id, names offset, 4 text lengths
+STORE_CUSTOMER = struct.Struct("<B16sQIIII")
+# flags, id, customer id, timestamp, total, first item, item count
+STORE_SALE = struct.Struct("<B16s16sq8sQI")
+# flags, instrument id, qty, price
+STORE_ITEM = struct.Struct("<B16sq8s")
+# flags, id, customer id, timestamp, status, blob offset, subject length, message length
+STORE_SUPPORT = struct.Struct("<B16s16sqIQII")
+
+
+def pack_num(value):
+    # (flag, 8 bytes) of an amount
+    if isinstance(value, int) and not isinstance(value, bool):
+        try:
+            return NUM_INT, I64.pack(value)
+        except struct.error:
+            pass  # beyond int64: kept as a double
+    return 0, F64.pack(value)
+
+
+def unpack_num(flags, raw):
+    return I64.unpack(raw)[0] if flags & NUM_INT else F64.unpack(raw)[0]
+
+
+def is_snapshot(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(8) in (MAGIC_CRM, MAGIC_STORE)
+    except OSError:
+        return False
+
+
+class _Writer:
+    def __init__(self):
+        self.strings = {}
+        self.names = []
+        self.names_len = 0
+        self.blob = io.BytesIO()
+
+    def ref(self, value):
+        ref = self.strings.get(value)
+        if ref is None:
+            ref = self.strings[value] = len(self.strings)
+        return ref
+
+    def id(self, value, bit=ID_STR):
+        # (flag, 16 bytes); ids that are not UUIDs go to the string table
+        if isinstance(value, bytes) and len(value) == 16:
+            return 0, value
+        try:
+            return 0, uuid.UUID(value).bytes
+        except (ValueError, AttributeError, TypeError):
+            return bit, U32.pack(self.ref(str(value))).ljust(16, b"\0")
+
+    def ts(self, value):
+        if isinstance(value, int):
+            return 0, value
+        return TS_STR, self.ref(str(value))
+
+    def name(self, *values):
+        # names offset and the lengths in characters
+        offset = self.names_len
+        lengths = [len(v) for v in values]
+        self.names.extend(values)
+        self.names_len += sum(lengths)
+        return offset, lengths
+
+    def text(self, *values):
+        # blob offset and the encoded lengths
+        offset = self.blob.tell()
+        lengths = []
+        for value in values:
+            data = value.encode("utf-8")
+            self.blob.write(data)
+            lengths.append(len(data))
+        return offset, lengths
+
+    def finish(self, f, magic, names, sections):
+        # sections: {name: (offset, count)} for everything but names, blob and strings
+        names_off = f.tell()
+        text = "".join(self.names).encode("utf-8")
+        f.write(text)
+        blob_off = f.tell()
+        f.write(self.blob.getbuffer())
+        strings_off = f.tell()
+        for value in self.strings:
+            data = value.encode("utf-8")
+            f.write(U32.pack(len(data)))
+            f.write(data)
+        sections = dict(sections, strings=(strings_off, len(self.strings)),
+                        names=(names_off, len(text)), blob=(blob_off, self.blob.tell()))
+        fields = []
+        for name in names[::2]:
+            fields.extend(sections[name])
+        f.seek(0)
+        f.write(HEADER.pack(magic, VERSION, 0, *fields, *[0] * (16 - len(fields))))
+
+
+class _Reader:
+    def __init__(self, path, magic, names):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self.mm) < HEADER.size:
+                raise ValueError("Anlık görüntü dosyası bozuk")
+            head = HEADER.unpack_from(self.mm)
+            if head[0] != magic:
+                raise ValueError("Anlık görüntü türü tanınmadı")
+            if head[1] > VERSION:
+                raise ValueError(f"Desteklenmeyen anlık görüntü sürümü: {head[1]}")
+        except BaseException:
+            self._file.close()
+            raise
+        self.fields = dict(zip(names, head[3:]))
+        self.strings = []
+        pos = self.fields["strings"]
+        for _ in range(self.fields["n_strings"]):
+            (n,) = U32.unpack_from(self.mm, pos)
+            self.strings.append(self.mm[pos + 4:pos + 4 + n].decode("utf-8"))
+            pos += 4 + n
+        self.names = self.mm[self.fields["names"]:self.fields["names"] + self.fields["names_len"]].decode("utf-8")
+        self.blob = self.fields["blob"]
+
+    def records(self, struct_, section, first=0, count=None):
+        count = self.fields["n_" + section] - first if count is None else count
+        start = self.fields[section] + first * struct_.size
+        return struct_.iter_unpack(self.mm[start:start + count * struct_.size])
+
+    def texts(self, offset, *lengths):
+        pos = self.blob + offset
+        out = []
+        for n in lengths:
+            out.append(self.mm[pos:pos + n].decode("utf-8"))
+            pos += n
+        return out
+
+    def id(self, flags, raw, bit=ID_STR):
+        # bytes for UUIDs (what the compact id fields store), str otherwise
+        return self.strings[U32.unpack_from(raw)[0]] if flags & bit else raw
+
+    def id_str(self, flags, raw, bit=ID_STR):
+        return self.strings[U32.unpack_from(raw)[0]] if flags & bit else id_to_str(raw)
+
+    def ts(self, flags, value):
+        return self.strings[value] if flags & TS_STR else value
+
+    @property
+    def closed(self):
+        return self.mm.closed
+
+    def close(self):
+        if not self.mm.closed:
+            self.mm.close()
+            self._file.close()
+
+
+# CRM
+def write_crm(f, customers):
+    # f: binary file opened for writing. customers: iterable of
+    # (id, ad, soyad, telefon, email, sales, tickets) where sales are
+    # (id, ts, product, qty, amount) and tickets (id, ts, status, subject, description)
+    w = _Writer()
+    directory, tickets = io.BytesIO(), io.BytesIO()
+    f.write(b"\0" * HEADER.size)
+    sales_off = f.tell()
+    n_customers = n_sales = n_tickets = 0
+    for cid, first, last, phone, email, sales, sups in customers:
+        flags, raw = w.id(cid)
+        offset, lengths = w.name(first, last, phone, email)
+        first_sale, total = n_sales, 0
+        for sid, ts, product, qty, amount in sales:
+            sflags, sraw = w.id(sid)
+            tflags, tvalue = w.ts(ts)
+            aflags, araw = pack_num(amount)
+            f.write(CRM_SALE.pack(sflags | tflags | aflags, sraw, tvalue, w.ref(product), qty, araw))
+            total += amount
+            n_sales += 1
+        first_ticket = n_tickets
+        for tid, ts, status, subject, description in sups:
+            sflags, sraw = w.id(tid)
+            tflags, tvalue = w.ts(ts)
+            toffset, (ls, ld) = w.text(subject, description)
+            tickets.write(CRM_TICKET.pack(sflags | tflags, sraw, tvalue, w.ref(status), toffset, ls, ld))
+            n_tickets += 1
+        nflags, nraw = pack_num(total)
+        directory.write(CRM_CUSTOMER.pack(flags | nflags, raw, offset, *lengths, first_sale, n_sales - first_sale,
+                                          first_ticket, n_tickets - first_ticket, nraw))
+        n_customers += 1
+    tickets_off = f.tell()
+    f.write(tickets.getbuffer())
+    directory_off = f.tell()
+    f.write(directory.getbuffer())
+    w.finish(f, MAGIC_CRM, CRM_FIELDS, {"directory": (directory_off, n_customers),
+                                        "sales": (sales_off, n_sales), "tickets": (tickets_off, n_tickets)})
+
+
+class CrmSnapshot(_Reader):
+    # Keeps the file mapped; sales()/tickets() decode one customer's records
+    def __init__(self, path):
+        super().__init__(path, MAGIC_CRM, CRM_FIELDS)
+
+    def __len__(self):
+        return self.fields["n_directory"]
+
+    def customers(self):
+        # (id, ad, soyad, telefon, email, sales total, ref); ref is passed back to sales()/tickets()
+        names = self.names
+        for flags, raw, a, l1, l2, l3, l4, fs, ns, ft, nt, total in self.records(CRM_CUSTOMER, "directory"):
+            b = a + l1
+            c = b + l2
+            d = c + l3
+            yield (self.id_str(flags, raw), names[a:b], names[b:c], names[c:d], names[d:d + l4],
+                   unpack_num(flags, total), (fs, ns, ft, nt))
+
+    def sales(self, ref):
+        # [(id, ts, product, qty, amount)]; id is 16 bytes unless it was not a UUID
+        strings = self.strings
+        return [(self.id(flags, raw), self.ts(flags, ts), strings[product], qty, unpack_num(flags, amount))
+                for flags, raw, ts, product, qty, amount in self.records(CRM_SALE, "sales", ref[0], ref[1])]
+
+    def tickets(self, ref):
+        # [(id, ts, status, subject, description)]
+        return [(self.id(flags, raw), self.ts(flags, ts), self.strings[status], *self.texts(offset, ls, ld))
+                for flags, raw, ts, status, offset, ls, ld in self.records(CRM_TICKET, "tickets", ref[2], ref[3])]
+
+    def ticket_keys(self, ref):
+        # [(id as str, ts, status)] without reading the text
+        return [(self.id_str(flags, raw), self.ts(flags, ts), self.strings[status])
+                for flags, raw, ts, status, _, _, _ in self.records(CRM_TICKET, "tickets", ref[2], ref[3])]
+
+
+# Store
+def write_store(f, instruments, customers, sales, supports):
+    # instruments: (id, name, stock, reorder_level); customers: (id, first, last, phone, email);
+    # sales: (id, customer_id, ts, total, [(instrument_id, qty, price)]);
+    # supports: (id, customer_id, ts, status, subject, message)
+    w = _Writer()
+    out = {}
+    items = io.BytesIO()
+    f.write(b"\0" * HEADER.size)
+
+    def section(name, rows):
+        start, n = f.tell(), 0
+        for row in rows:
+            f.write(row)
+            n += 1
+        out[name] = (start, n)
+
+    def instrument_rows():
+        for iid, name, stock, level in instruments:
+            flags, raw = w.id(iid)
+            yield STORE_INSTRUMENT.pack(flags, raw, w.ref(name), stock, level)
+
+    def customer_rows():
+        for cid, first, last, phone, email in customers:
+            flags, raw = w.id(cid)
+            offset, lengths = w.name(first, last, phone, email)
+            yield STORE_CUSTOMER.pack(flags, raw, offset, *lengths)
+
+    n_items = 0
+
+    def sale_rows():
+        nonlocal n_items
+        for sid, cid, ts, total, lines in sales:
+            flags, raw = w.id(sid)
+            cflags, craw = w.id(cid, REF_STR)
+            tflags, tvalue = w.ts(ts)
+            first = n_items
+            for iid, qty, price in lines:
+                iflags, iraw = w.id(iid)
+                pflags, praw = pack_num(price)
+                items.write(STORE_ITEM.pack(iflags | pflags, iraw, qty, praw))
+                n_items += 1
+            nflags, nraw = pack_num(total)
+            yield STORE_SALE.pack(flags | cflags | tflags | nflags, raw, craw, tvalue, nraw, first, n_items - first)
+
+    def support_rows():
+        for rid, cid, ts, status, subject, message in supports:
+            flags, raw = w.id(rid)
+            cflags, craw = w.id(cid, REF_STR)
+            tflags, tvalue = w.ts(ts)
+            offset, (ls, lm) = w.text(subject, message)
+            yield STORE_SUPPORT.pack(flags | cflags | tflags, raw, craw, tvalue, w.ref(status), offset, ls, lm)
+
+    section("instruments", instrument_rows())
+    section("customers", customer_rows())
+    section("sales", sale_rows())
+    out["items"] = (f.tell(), n_items)
+    f.write(items.getbuffer())
+    section("supports", support_rows())
+    w.finish(f, MAGIC_STORE, STORE_FIELDS, out)
+
+
+class StoreSnapshot(_Reader):
+    def __init__(self, path):
+        super().__init__(path, MAGIC_STORE, STORE_FIELDS)
+
+    def instruments(self):
+        for flags, raw, name, stock, level in self.records(STORE_INSTRUMENT, "instruments"):
+            yield self.id_str(flags, raw), self.strings[name], stock, level
+
+    def customers(self):
+        names = self.names
+        for flags, raw, a, l1, l2, l3, l4 in self.records(STORE_CUSTOMER, "customers"):
+            b = a + l1
+            c = b + l2
+            d = c + l3
+            yield self.id_str(flags, raw), names[a:b], names[b:c], names[c:d], names[d:d + l4]
+
+    def sales(self):
+        # (id, customer_id, ts, total, [(instrument_id, qty, price)])
+        items = [(self.id_str(flags, raw), qty, unpack_num(flags, price))
+                 for flags, raw, qty, price in self.records(STORE_ITEM, "items")]
+        for flags, raw, craw, ts, total, first, n in self.records(STORE_SALE, "sales"):
+            yield (self.id(flags, raw), self.id_str(flags, craw, REF_STR), self.ts(flags, ts),
+                   unpack_num(flags, total), items[first:first + n])
+
+    def supports(self):
+        # (id, customer_id, ts, status, subject, message)
+        for flags, raw, craw, ts, status, offset, ls, lm in self.records(STORE_SUPPORT, "supports"):
+            yield (self.id(flags, raw), self.id_str(flags, craw, REF_STR), self.ts(flags, ts),
+                   self.strings[status], *self.texts(offset, ls, lm))
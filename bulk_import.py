@@ -0,0 +1,244 @@
+import re
+import csv
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from search_index import normalize_phone, normalize_email
+
+# Bulk import of customers and sales from CSV or JSON Lines into a CRM or a
+# StoreManager. Rows are read lazily, validated in batches (optionally in a
+# process pool) and inserted without per-record UI refreshes.
+
+# accepted column names -> canonical field
+ALIASES = {
+    "ad": "first_name", "first_name": "first_name", "first": "first_name",
+    "soyad": "last_name", "last_name": "last_name", "last": "last_name",
+    "telefon": "phone", "phone": "phone",
+    "email": "email", "e-posta": "email", "eposta": "email",
+    "musteri_id": "customer_id", "customer_id": "customer_id",
+    "urun": "product", "product": "product",
+    "instrument_id": "instrument_id",
+    "miktar": "qty", "qty": "qty", "quantity": "qty",
+    "toplam_tutar": "total", "total": "total",
+    "birim_fiyat": "price", "price": "price",
+    "tarih": "date", "date": "date",
+}
+EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
+
+def read_rows(path):
+    # (line number, {canonical field: value}) for each data row
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        with open(path, "r", encoding="utf-8-sig") as f:
+            for n, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        raw = json.loads(line)
+                    except ValueError:
+                        yield n, {"_error": "Geçersiz JSON satırı"}
+                        continue
+                    yield n, {ALIASES.get(k.strip().lower(), k): v for k, v in raw.items()}
+    else:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, {ALIASES.get((k or "").strip().lower(), k): v for k, v in row.items()}
+
+
+def _text(row, field):
+    value = row.get(field)
+    return str(value).strip() if value is not None else ""
+
+
+def validate_customers(batch):
+    # Pure function so it can run in a worker process
+    valid, errors = [], []
+    for n, row in batch:
+        if "_error" in row:
+            errors.append((n, row["_error"], row))
+            continue
+        first, last = _text(row, "first_name"), _text(row, "last_name")
+        phone, email = _text(row, "phone"), _text(row, "email")
+        missing = [f for f, v in (("ad", first), ("soyad", last), ("telefon", phone), ("email", email)) if not v]
+        if missing:
+            errors.append((n, "Eksik alan: " + ", ".join(missing), row))
+        elif len(normalize_phone(phone)) < 10:
+            errors.append((n, "Geçersiz telefon", row))
+        elif not EMAIL_RE.fullmatch(email):
+            errors.append((n, "Geçersiz email", row))
+        else:
+            valid.append((n, (first, last, phone, email)))
+    return valid, errors
+
+
+def validate_sales(batch):
+    valid, errors = [], []
+    for n, row in batch:
+        if "_error" in row:
+            errors.append((n, row["_error"], row))
+            continue
+        ref = {f: _text(row, f) for f in ("customer_id", "phone", "email") if _text(row, f)}
+        if not ref:
+            errors.append((n, "Müşteri belirtilmedi (customer_id, telefon veya email)", row))
+            continue
+        try:
+            qty = int(_text(row, "qty"))
+            if qty <= 0:
+                raise ValueError
+        except ValueError:
+            errors.append((n, "Geçersiz miktar", row))
+            continue
+        try:
+            if _text(row, "instrument_id"):
+                sale = {"instrument_id": _text(row, "instrument_id"), "qty": qty,
+                        "price": float(_text(row, "price"))}
+            else:
+                if not _text(row, "product"):
+                    raise KeyError("urun")
+                sale = {"product": _text(row, "product"), "qty": qty, "total": float(_text(row, "total"))}
+        except KeyError:
+            errors.append((n, "Eksik alan: urun", row))
+            continue
+        except ValueError:
+            errors.append((n, "Geçersiz tutar", row))
+            continue
+        if _text(row, "date"):
+            sale["date"] = _text(row, "date")
+        valid.append((n, (ref, sale)))
+    return valid, errors
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _validated(validate, batches, workers):
+    if workers <= 1:
+        for batch in batches:
+            yield validate(batch)
+        return
+    # at most 2 batches per worker in flight, so memory stays bounded
+    with ProcessPoolExecutor(workers) as pool:
+        in_flight = deque()
+        for batch in batches:
+            in_flight.append(pool.submit(validate, batch))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def detect_kind(path):
+    for _, row in read_rows(path):
+        return "sales" if {"product", "instrument_id", "qty"} & row.keys() else "customers"
+    return "customers"
+
+
+def iter_import(target, path, kind=None, batch_size=1000, workers=1, error_report=None):
+    # Imports `path` into `target` (a CRM or a StoreManager) and yields the
+    # running stats after every batch. Rejected rows and duplicates both go to
+    # `error_report` (default: <path>.errors.csv) but are counted apart, so
+    # read == imported + duplicates + rejected.
+    kind = kind or detect_kind(path)
+    validate = validate_sales if kind == "sales" else validate_customers
+    error_report = error_report or path + ".errors.csv"
+    stats = {"kind": kind, "read": 0, "imported": 0, "duplicates": 0, "rejected": 0,
+             "seconds": 0.0, "rows_per_sec": 0.0, "error_report": error_report}
+    start = time.perf_counter()
+    with open(error_report, "w", encoding="utf-8", newline="") as ef:
+        errors_out = csv.writer(ef)
+        errors_out.writerow(["satir", "hata", "kayit"])
+        for valid, errors in _validated(validate, _batches(read_rows(path), batch_size), workers):
+            stats["read"] += len(valid) + len(errors)
+            stats["rejected"] += len(errors)
+            if kind == "sales":
+                imported, rejected = _insert_sales(target, valid)
+                stats["rejected"] += len(rejected)
+            else:
+                imported, rejected = _insert_customers(target, valid)
+                stats["duplicates"] += len(rejected)
+            errors.extend(rejected)
+            stats["imported"] += imported
+            for n, msg, row in errors:
+                errors_out.writerow([n, msg, json.dumps(row, ensure_ascii=False, default=str)])
+            stats["seconds"] = time.perf_counter() - start
+            stats["rows_per_sec"] = stats["read"] / stats["seconds"] if stats["seconds"] else 0.0
+            yield stats
+
+
+def import_file(target, path, kind=None, batch_size=1000, workers=1, error_report=None):
+    stats = None
+    for stats in iter_import(target, path, kind, batch_size, workers, error_report):
+        pass
+    return stats
+
+
+def _index(target):
+    return target.indeks if hasattr(target, "musteriler") else target.index
+
+
+def _insert_customers(target, valid):
+    index = _index(target)
+    seen_phones, seen_emails = set(), set()
+    rows, rejected = [], []
+    for n, (first, last, phone, email) in valid:
+        p, e = normalize_phone(phone), normalize_email(email)
+        # duplicates against existing customers and earlier rows of this batch
+        if index.by_phone(phone) or p in seen_phones or index.by_email(email) or e in seen_emails:
+            rejected.append((n, "Mükerrer müşteri (telefon/email mevcut)",
+                             {"first_name": first, "last_name": last, "phone": phone, "email": email}))
+            continue
+        seen_phones.add(p)
+        seen_emails.add(e)
+        rows.append((first, last, phone, email))
+    if hasattr(target, "musteriler"):
+        target.musterileri_ekle(rows)
+    else:
+        target.add_customers(rows)
+    return len(rows), rejected
+
+
+def _find_customer(target, index, ref):
+    if "customer_id" in ref:
+        if hasattr(target, "musteriler"):
+            return target.musteri_getir(ref["customer_id"])
+        return target.get_customer(ref["customer_id"])
+    ids = index.by_phone(ref["phone"]) if "phone" in ref else index.by_email(ref["email"])
+    if len(ids) != 1:
+        return None
+    return target.musteri_getir(ids[0]) if hasattr(target, "musteriler") else target.get_customer(ids[0])
+
+
+def _insert_sales(target, valid):
+    index = _index(target)
+    imported, rejected = 0, []
+    for n, (ref, sale) in valid:
+        customer = _find_customer(target, index, ref)
+        if customer is None:
+            rejected.append((n, "Müşteri bulunamadı veya belirsiz", dict(ref, **sale)))
+            continue
+        try:
+            if hasattr(target, "musteriler"):
+                if "product" not in sale:
+                    raise ValueError("CRM satışı için urun ve toplam_tutar gerekli")
+                customer.satis_ekle(sale["product"], sale["qty"], sale["total"], tarih=sale.get("date"))
+            else:
+                inst = target.get_instrument(sale.get("instrument_id"))
+                if inst is None:
+                    raise ValueError("Enstrüman bulunamadı")
+                target.create_sale(customer.customer_id, [(inst, sale["qty"], sale["price"])],
+                                   date=sale.get("date"))
+        except ValueError as e:
+            rejected.append((n, str(e), dict(ref, **sale)))
+            continue
+        imported += 1
+    return imported, rejected
@@ -0,0 +1,144 @@
+import heapq
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # optional; the pure-Python path gives the same results
+    np = None
+
+# Columnar snapshot of sales for aggregate reports: one flat column per field
+# instead of one object per sale. Columns grow with append(); with NumPy the
+# queries run as vectorized operations over NumPy buffers filled from the
+# columns, without it as plain loops. Amounts are kept as integer kuruş so that both
+# paths add exactly and return identical results.
+
+
+def _cents(amount):
+    return int(round(amount * 100))
+
+
+class SalesColumns:
+    def __init__(self, use_numpy=True):
+        self.use_numpy = use_numpy and np is not None
+        self.customer = array("q")   # index into self.customer_ids
+        self.amount = array("q")     # kuruş
+        self.qty = array("q")
+        self.ts = array("q")
+        self.product = array("q")    # index into self.products
+        self.customer_ids = []
+        self.products = []
+        self._customer_index = {}
+        self._product_index = {}
+        self._np = None
+        self._np_len = 0
+
+    def __len__(self):
+        return len(self.amount)
+
+    def _code(self, value, values, index):
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(values)
+            values.append(value)
+        return code
+
+    def append(self, customer_id, amount, qty, ts, product):
+        if not isinstance(ts, int):
+            ts = -1  # unparseable legacy date: counted in totals, outside every range
+        self.customer.append(self._code(customer_id, self.customer_ids, self._customer_index))
+        self.amount.append(_cents(amount))
+        self.qty.append(qty)
+        self.ts.append(ts)
+        self.product.append(self._code(product, self.products, self._product_index))
+
+    # NumPy buffers are refreshed lazily: rows appended since the last query are
+    # written into spare capacity, and a full buffer is reallocated at twice the
+    # size, so a refresh costs O(new rows) amortized rather than O(n)
+    def _arrays(self):
+        n = len(self.amount)
+        if self._np is None or len(self._np["amount"]) < n:
+            capacity = max(n, 2 * (0 if self._np is None else len(self._np["amount"])), 1024)
+            grown = {}
+            for name in ("customer", "amount", "qty", "ts", "product"):
+                grown[name] = np.empty(capacity, dtype=np.int64)
+                if self._np is not None:
+                    grown[name][:self._np_len] = self._np[name][:self._np_len]
+            self._np = grown
+        if self._np_len < n:
+            for name, buf in self._np.items():
+                buf[self._np_len:n] = np.array(getattr(self, name)[self._np_len:n], dtype=np.int64)
+            self._np_len = n
+        return {name: buf[:n] for name, buf in self._np.items()}
+
+    def _rows(self, start, end):
+        # row numbers with start <= ts < end (None: unbounded)
+        ts = self.ts
+        if start is None and end is None:
+            return range(len(ts))
+        lo = -2 ** 63 if start is None else start
+        hi = 2 ** 63 if end is None else end
+        return [i for i in range(len(ts)) if lo <= ts[i] < hi and ts[i] != -1]
+
+    def _mask(self, a, start, end):
+        if start is None and end is None:
+            return None
+        mask = a["ts"] != -1
+        if start is not None:
+            mask &= a["ts"] >= start
+        if end is not None:
+            mask &= a["ts"] < end
+        return mask
+
+    def total(self, start=None, end=None):
+        if self.use_numpy:
+            a = self._arrays()
+            mask = self._mask(a, start, end)
+            cents = int(a["amount"].sum() if mask is None else a["amount"][mask].sum())
+        else:
+            amount = self.amount
+            cents = sum(amount) if start is None and end is None else sum(amount[i] for i in self._rows(start, end))
+        return cents / 100
+
+    def _group(self, key, start, end):
+        # kuruş totals per code of column `key` ("customer" or "product")
+        size = len(self.customer_ids if key == "customer" else self.products)
+        if self.use_numpy:
+            a = self._arrays()
+            mask = self._mask(a, start, end)
+            codes, amount = (a[key], a["amount"]) if mask is None else (a[key][mask], a["amount"][mask])
+            # float64 sums of integer kuruş are exact below 2**53
+            return np.bincount(codes, weights=amount, minlength=size).astype(np.int64)
+        sums = [0] * size
+        codes, amount = getattr(self, key), self.amount
+        for i in self._rows(start, end):
+            sums[codes[i]] += amount[i]
+        return sums
+
+    def customer_totals(self, start=None, end=None):
+        # {customer_id: total} for customers with at least one sale in range
+        return self._totals("customer", self.customer_ids, start, end)
+
+    def product_totals(self, start=None, end=None):
+        return self._totals("product", self.products, start, end)
+
+    def _totals(self, key, values, start, end):
+        sums = self._group(key, start, end)
+        if self.use_numpy:
+            nonzero = np.flatnonzero(sums)
+            return {values[i]: int(sums[i]) / 100 for i in nonzero.tolist()}
+        return {values[i]: s / 100 for i, s in enumerate(sums) if s}
+
+    def top_customers(self, n=10, start=None, end=None):
+        return self._top("customer", self.customer_ids, n, start, end)
+
+    def top_products(self, n=10, start=None, end=None):
+        return self._top("product", self.products, n, start, end)
+
+    def _top(self, key, values, n, start, end):
+        # [(value, total)] largest first; ties by first appearance
+        sums = self._group(key, start, end)
+        if self.use_numpy:
+            order = np.argsort(-sums, kind="stable")[:n].tolist()
+            return [(values[i], int(sums[i]) / 100) for i in order if sums[i]]
+        order = heapq.nsmallest(n, range(len(sums)), key=lambda i: (-sums[i], i))
+        return [(values[i], sums[i] / 100) for i in order if sums[i]]
@@ -0,0 +1,58 @@
+import uuid
+import time
+import calendar
+
+# Compact field storage for high-volume records: ids as 16-byte UUIDs, dates as
+# integer seconds. The public attributes still read and write the old strings.
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def new_id():
+    return uuid.uuid4().bytes
+
+
+def id_to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    try:
+        return uuid.UUID(value).bytes
+    except (ValueError, AttributeError, TypeError):
+        return value  # not a UUID; kept as given
+
+
+def id_to_str(value):
+    # same text as str(uuid.UUID(bytes=value)), without building a UUID object
+    if isinstance(value, bytes):
+        h = value.hex()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+    return value
+
+
+def now_ts():
+    # Local wall-clock time counted as if it were UTC, so it round-trips the
+    # old formatted strings exactly (no DST or timezone shifts)
+    return calendar.timegm(time.localtime()[:6])
+
+
+def ts_from_str(value):
+    if isinstance(value, int):
+        return value
+    try:
+        return calendar.timegm((int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                                int(value[11:13]), int(value[14:16]), int(value[17:19])))
+    except (ValueError, TypeError, IndexError):
+        return value  # unparseable; kept as given
+
+
+def ts_to_str(value):
+    return time.strftime(DATE_FORMAT, time.gmtime(value)) if isinstance(value, int) else value
+
+
+def id_field(slot):
+    return property(lambda self: id_to_str(getattr(self, slot)),
+                    lambda self, value: setattr(self, slot, id_to_bytes(value)))
+
+
+def date_field(slot):
+    return property(lambda self: ts_to_str(getattr(self, slot)),
+                    lambda self, value: setattr(self, slot, ts_from_str(value)))
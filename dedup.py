@@ -0,0 +1,188 @@
+from collections import deque
+from difflib import SequenceMatcher
+from concurrent.futures import ProcessPoolExecutor
+
+from search_index import fold, normalize_phone, normalize_email
+
+# Duplicate-customer detection. Records are normalized (Turkish-folded names,
+# 10-digit phones, lower-case emails) and put into blocks by cheap keys:
+#   same phone, same email, surname sound code + last 4 phone digits,
+#   surname + first name sound codes.
+# Only records sharing a block are compared, so a full scan is linear in the
+# number of records times the (capped) block size instead of O(n²), and the
+# check for one new record touches a few small blocks.
+
+MAX_BLOCK = 200   # larger blocks (very common names) are too unspecific to compare
+THRESHOLD = 0.8
+
+_SOUND = {c: d for letters, d in (("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"), ("l", "4"), ("mn", "5"),
+                                  ("r", "6")) for c in letters}
+
+
+def phonetic(text):
+    # Soundex-style code of a Turkish-folded word: "Yılmaz", "Yilmas" -> "y452"
+    text = fold(text).replace(" ", "")
+    if not text:
+        return ""
+    code, last = text[0], _SOUND.get(text[0])
+    for c in text[1:]:
+        digit = _SOUND.get(c)
+        if digit and digit != last:
+            code += digit
+        if c not in "hw":
+            last = digit  # vowels separate repeated sounds, h and w do not
+    return (code + "000")[:4]
+
+
+def normalize(first, last, phone, email):
+    return fold(first or ""), fold(last or ""), normalize_phone(phone), normalize_email(email)
+
+
+def blocking_keys(norm):
+    first, last, phone, email = norm
+    keys = []
+    if phone:
+        keys.append(("t", phone))
+    if email:
+        keys.append(("e", email))
+    code = phonetic(last)
+    if code and len(phone) >= 4:
+        keys.append(("s", code, phone[-4:]))
+    if code:
+        keys.append(("a", code, phonetic(first)))
+    return keys
+
+
+def _email_local(email):
+    return email.split("@")[0].replace(".", "")
+
+
+def score(a, b):
+    # 0..1 similarity of two normalized records. Names always count; phone and
+    # email count fully when they agree and half when both are given but differ
+    # (people change numbers and addresses).
+    name = max(SequenceMatcher(None, f"{a[0]} {a[1]}", f"{b[0]} {b[1]}").ratio(),
+               SequenceMatcher(None, f"{a[1]} {a[0]}", f"{b[0]} {b[1]}").ratio())
+    total, weight = 0.5 * name, 0.5
+    if a[2] and b[2]:
+        if a[2] == b[2]:
+            total, weight = total + 0.3, weight + 0.3
+        elif a[2][-7:] == b[2][-7:]:
+            total, weight = total + 0.15, weight + 0.3
+        else:
+            weight += 0.15
+    if a[3] and b[3]:
+        if a[3] == b[3]:
+            total, weight = total + 0.2, weight + 0.2
+        elif _email_local(a[3]) == _email_local(b[3]):
+            total, weight = total + 0.14, weight + 0.2
+        else:
+            weight += 0.1
+    return total / weight
+
+
+def score_blocks(blocks, min_score=THRESHOLD):
+    # Pure function so it can run in a worker process: blocks are lists of
+    # (id, normalized record); returns {(id, id): score} for pairs above min_score
+    found = {}
+    for block in blocks:
+        for i, (id_a, a) in enumerate(block):
+            for id_b, b in block[i + 1:]:
+                pair = (id_a, id_b) if id_a < id_b else (id_b, id_a)
+                if pair not in found:
+                    s = score(a, b)
+                    if s >= min_score:
+                        found[pair] = s
+    return found
+
+
+def _batches(blocks, size):
+    batch = []
+    for block in blocks:
+        batch.append(block)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class DedupIndex:
+    def __init__(self):
+        self._blocks = {}     # key -> set of ids
+        self._entries = {}    # id -> (normalized record, keys)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, record_id):
+        return record_id in self._entries
+
+    def add(self, record_id, first, last, phone, email):
+        if record_id in self._entries:
+            self.remove(record_id)
+        norm = normalize(first, last, phone, email)
+        keys = blocking_keys(norm)
+        for key in keys:
+            self._blocks.setdefault(key, set()).add(record_id)
+        self._entries[record_id] = (norm, keys)
+
+    update = add
+
+    def extend(self, rows):
+        # (id, first, last, phone, email) rows
+        for row in rows:
+            self.add(*row)
+
+    def remove(self, record_id):
+        entry = self._entries.pop(record_id, None)
+        if entry is None:
+            return
+        for key in entry[1]:
+            block = self._blocks[key]
+            block.discard(record_id)
+            if not block:
+                del self._blocks[key]
+
+    def likely(self, first, last, phone, email, min_score=THRESHOLD, limit=5, exclude=None):
+        # [(id, score)] of existing records that look like this one, best first.
+        # Bounded work: at most MAX_BLOCK comparisons per blocking key.
+        norm = normalize(first, last, phone, email)
+        seen, found = {exclude}, []
+        for key in blocking_keys(norm):
+            block = self._blocks.get(key, ())
+            if len(block) > MAX_BLOCK:
+                continue
+            for record_id in block:
+                if record_id not in seen:
+                    seen.add(record_id)
+                    s = score(norm, self._entries[record_id][0])
+                    if s >= min_score:
+                        found.append((s, record_id))
+        found.sort(key=lambda x: -x[0])
+        return [(record_id, s) for s, record_id in found[:limit]]
+
+    def candidate_blocks(self):
+        for block in self._blocks.values():
+            if 2 <= len(block) <= MAX_BLOCK:
+                yield [(record_id, self._entries[record_id][0]) for record_id in block]
+
+    def scan(self, min_score=THRESHOLD, workers=1, batch_size=500):
+        # [(id, id, score)] best first, compared block by block; with workers > 1
+        # batches of blocks are scored in a process pool
+        found = {}
+        batches = _batches(self.candidate_blocks(), batch_size)
+        if workers <= 1:
+            for batch in batches:
+                found.update(score_blocks(batch, min_score))
+        else:
+            # at most 2 batches per worker in flight, so memory stays bounded
+            with ProcessPoolExecutor(workers) as pool:
+                in_flight = deque()
+                for batch in batches:
+                    in_flight.append(pool.submit(score_blocks, batch, min_score))
+                    if len(in_flight) >= workers * 2:
+                        found.update(in_flight.popleft().result())
+                while in_flight:
+                    found.update(in_flight.popleft().result())
+        return sorted(((a, b, s) for (a, b), s in found.items()), key=lambda x: (-x[2], x[0], x[1]))
@@ -0,0 +1,192 @@
+import os
+import csv
+import json
+import time
+from itertools import islice
+
+from compact import now_ts, ts_to_str
+from persistence import atomic_write
+
+# Streaming export of customers, sales and tickets from a CRM or a
+# StoreManager to flat CSV or JSON Lines. Records come from generators and are
+# written straight to disk, optionally split into files of at most
+# `chunk_rows` rows, so memory does not grow with the dataset. A state file
+# keeps a high-water mark per kind: the next export of sales/tickets starts
+# where the previous one ended.
+#
+#   export(crm, "sales", "satislar.csv", state="export_state.json")
+
+KINDS = ("customers", "sales", "tickets")
+
+CRM_FIELDS = {
+    "customers": ["musteri_id", "ad", "soyad", "telefon", "email", "satis_sayisi", "destek_sayisi"],
+    "sales": ["satis_id", "musteri_id", "tarih", "urun", "miktar", "toplam_tutar"],
+    "tickets": ["talep_id", "musteri_id", "tarih", "durum", "konu", "aciklama"],
+}
+STORE_FIELDS = {
+    "customers": ["customer_id", "first_name", "last_name", "phone", "email"],
+    "sales": ["sale_id", "customer_id", "date", "instrument_id", "instrument", "qty", "price"],
+    "tickets": ["request_id", "customer_id", "date", "status", "subject", "message"],
+}
+
+
+def _in_range(ts, start, end):
+    # unparseable legacy dates only pass when no range is given
+    if start is None and end is None:
+        return True
+    if not isinstance(ts, int):
+        return False
+    return (start is None or ts >= start) and (end is None or ts < end)
+
+
+def _pages(query, size=1000):
+    # every record of a cursor query, one page at a time; records added while
+    # the export runs do not disturb the order
+    cursor = None
+    while True:
+        items, cursor = query(cursor, size)
+        yield from items
+        if len(items) < size:
+            return
+
+
+def _customers(target, customer_ids):
+    # every customer, or only the requested ones
+    if customer_ids is None:
+        if hasattr(target, "musteriler"):
+            return _pages(lambda cursor, size: target.musteri_sorgula(imlec=cursor, limit=size))
+        return _pages(lambda cursor, size: target.query_customers(cursor=cursor, limit=size))
+    found = (target.musteri_getir(cid) if hasattr(target, "musteriler") else target.get_customer(cid)
+             for cid in customer_ids)
+    return [c for c in found if c is not None]
+
+
+def crm_rows(crm, kind, start=None, end=None, customer_ids=None):
+    for m in _customers(crm, customer_ids):
+        if kind == "customers":
+            yield {"musteri_id": m.musteri_id, "ad": m.ad, "soyad": m.soyad, "telefon": m.telefon,
+                   "email": m.email, "satis_sayisi": m.satis_sayisi(), "destek_sayisi": m.destek_sayisi()}
+        elif kind == "sales":
+            for s in m.satis_kayitlari():
+                if _in_range(s.zaman, start, end):
+                    yield {"satis_id": s.satis_id, "musteri_id": m.musteri_id, "tarih": s.tarih,
+                           "urun": s.urun, "miktar": s.miktar, "toplam_tutar": s.toplam_tutar}
+        else:
+            for d in m.destek_kayitlari():
+                if _in_range(d.zaman, start, end):
+                    yield {"talep_id": d.talep_id, "musteri_id": m.musteri_id, "tarih": d.tarih,
+                           "durum": d.durum, "konu": d.konu, "aciklama": d.aciklama}
+
+
+def store_rows(mgr, kind, start=None, end=None, customer_ids=None):
+    wanted = None if customer_ids is None else set(customer_ids)
+    if kind == "customers":
+        if wanted is None and mgr.storage:
+            custs = mgr.storage.iter_customer_keys()
+        else:
+            custs = ((c.customer_id, c.first_name, c.last_name, c.phone, c.email)
+                     for c in _customers(mgr, customer_ids))
+        for cid, first, last, phone, email in custs:
+            yield {"customer_id": cid, "first_name": first, "last_name": last, "phone": phone, "email": email}
+    elif kind == "sales":
+        if mgr.storage:
+            # dates are stored as "YYYY-MM-DD HH:MM:SS", which sorts like the timestamp
+            lines = mgr.storage.iter_sale_lines(ts_to_str(start) if start is not None else None,
+                                                ts_to_str(end) if end is not None else None)
+        else:
+            lines = ((s.sale_id, s.date, s.customer_id, inst.instrument_id, inst.name, qty, price)
+                     for s in mgr.sales.values() if _in_range(s.timestamp, start, end)
+                     for inst, qty, price in s.items)
+        for sale_id, date, cid, iid, name, qty, price in lines:
+            if wanted is None or cid in wanted:
+                yield {"sale_id": sale_id, "customer_id": cid, "date": date, "instrument_id": iid,
+                       "instrument": name, "qty": qty, "price": price}
+    else:
+        if mgr.storage:
+            sups = mgr.storage.iter_supports(ts_to_str(start) if start is not None else None,
+                                             ts_to_str(end) if end is not None else None)
+        else:
+            sups = ((sp.request_id, sp.customer_id, sp.subject, sp.message, sp.date, sp.status)
+                    for sp in mgr.supports.values() if _in_range(sp.timestamp, start, end))
+        for rid, cid, subject, message, date, status in sups:
+            if wanted is None or cid in wanted:
+                yield {"request_id": rid, "customer_id": cid, "date": date, "status": status,
+                       "subject": subject, "message": message}
+
+
+def part_name(path, part):
+    root, ext = os.path.splitext(path)
+    return f"{root}-{part:05d}{ext}"
+
+
+def write_rows(rows, fields, path, fmt=None, chunk_rows=None):
+    # Writes rows (dicts) to `path`, or to path-00001.ext, path-00002.ext...
+    # when chunk_rows is set. Each file is replaced atomically. Returns
+    # (row count, file names).
+    fmt = fmt or ("jsonl" if path.lower().endswith((".jsonl", ".ndjson")) else "csv")
+    rows = iter(rows)
+    files, total = [], 0
+    while True:
+        first = next(rows, None)
+        if first is None and files:
+            break
+        name = part_name(path, len(files) + 1) if chunk_rows else path
+        written = 0
+
+        def write(f):
+            nonlocal written
+            if fmt == "csv":
+                out = csv.DictWriter(f, fields, extrasaction="ignore")
+                out.writeheader()
+                emit = out.writerow
+            else:
+                emit = lambda row: f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            if first is None:
+                return
+            emit(first)
+            written = 1
+            for row in islice(rows, chunk_rows - 1 if chunk_rows else None):
+                emit(row)
+                written += 1
+
+        atomic_write(name, write, newline="")
+        files.append(name)
+        total += written
+        if first is None or not chunk_rows:
+            break
+    return total, files
+
+
+def load_state(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def export(target, kind, path, fmt=None, start=None, end=None, customer_ids=None, chunk_rows=None, state=None):
+    # Exports one kind of record from `target` (a CRM or a StoreManager).
+    # start/end: integer timestamps, end exclusive. With `state` (a JSON file)
+    # sales and tickets start at the previous run's end and the export stops
+    # at the current second, so records created while it runs go to the next one.
+    if kind not in KINDS:
+        raise ValueError(f"Bilinmeyen tür: {kind}")
+    began = time.perf_counter()
+    marks = load_state(state) if state else {}
+    if state and kind != "customers":
+        mark = marks.get(kind)
+        if mark is not None and (start is None or mark > start):
+            start = mark
+        end = now_ts() if end is None else min(end, now_ts())
+    if hasattr(target, "musteriler"):
+        rows, fields = crm_rows(target, kind, start, end, customer_ids), CRM_FIELDS[kind]
+    else:
+        rows, fields = store_rows(target, kind, start, end, customer_ids), STORE_FIELDS[kind]
+    count, files = write_rows(rows, fields, path, fmt, chunk_rows)
+    if state and kind != "customers":
+        # recorded only after every file is on disk
+        marks[kind] = end
+        atomic_write(state, lambda f: json.dump(marks, f))
+    return {"kind": kind, "rows": count, "files": files, "start": start, "end": end,
+            "seconds": time.perf_counter() - began}
@@ -0,0 +1,196 @@
+import os
+import sys
+import time
+import cProfile
+import functools
+import threading
+import tracemalloc
+
+from persistence import atomic_write
+
+# Call counts, latency histograms and live memory block deltas for hot paths.
+# Functions are wrapped once with @timed("name"); while metrics are off the
+# wrapper costs one global lookup and an extra call. Switch on with enable()
+# or by starting the process with APP_METRICS=1.
+
+# histogram upper bounds in seconds (Prometheus "le" buckets, +Inf implied)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = os.environ.get("APP_METRICS") == "1"
+_lock = threading.Lock()
+_metrics = {}
+_profiler = None
+
+
+class Metric:
+    __slots__ = ("count", "errors", "seconds", "live_blocks_delta", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.live_blocks_delta = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds, live_blocks_delta, failed):
+        self.count += 1
+        self.errors += failed
+        self.seconds += seconds
+        self.live_blocks_delta += live_blocks_delta
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                break
+        else:
+            i = len(BUCKETS)
+        self.buckets[i] += 1
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def toggle():
+    global _enabled
+    _enabled = not _enabled
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _metrics.clear()
+
+
+def observe(name, seconds, live_blocks_delta=0, failed=False):
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = Metric()
+        metric.observe(seconds, live_blocks_delta, failed)
+
+
+def _call(name, func, args, kwargs):
+    # The live blocks delta is the net change in the interpreter's live memory
+    # blocks over the call. It is process-wide, not per call: blocks allocated
+    # or freed meanwhile by other threads (the save worker, the API pool) are
+    # counted too, and blocks allocated and freed within the call are not. It
+    # is cheap to read, unlike tracemalloc; use start_profile() for real
+    # allocation sites.
+    blocks = sys.getallocatedblocks()
+    start = time.perf_counter()
+    failed = True
+    try:
+        result = func(*args, **kwargs)
+        failed = False
+        return result
+    finally:
+        observe(name, time.perf_counter() - start, sys.getallocatedblocks() - blocks, failed)
+
+
+def timed(name):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            return _call(name, func, args, kwargs)
+        return wrapper
+    return decorate
+
+
+def wrap(func, name):
+    # for callbacks that are not defined with a decorator (button commands)
+    return timed(name)(func)
+
+
+def snapshot():
+    # {name: {"count", "errors", "seconds", "live_blocks_delta", "buckets"}}
+    with _lock:
+        return {name: {"count": m.count, "errors": m.errors, "seconds": m.seconds,
+                       "live_blocks_delta": m.live_blocks_delta, "buckets": list(m.buckets)}
+                for name, m in _metrics.items()}
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(prefix="app"):
+    lines = [
+        f"# HELP {prefix}_calls_total Number of calls.",
+        f"# TYPE {prefix}_calls_total counter",
+    ]
+    metrics = sorted(snapshot().items())
+    for name, m in metrics:
+        lines.append(f'{prefix}_calls_total{{name="{_label(name)}"}} {m["count"]}')
+    lines += [f"# HELP {prefix}_call_errors_total Calls that raised.",
+              f"# TYPE {prefix}_call_errors_total counter"]
+    for name, m in metrics:
+        lines.append(f'{prefix}_call_errors_total{{name="{_label(name)}"}} {m["errors"]}')
+    lines += [f"# HELP {prefix}_call_live_blocks_delta Net change in process-wide live memory blocks "
+              f"summed over calls (includes other threads).",
+              f"# TYPE {prefix}_call_live_blocks_delta gauge"]
+    for name, m in metrics:
+        lines.append(f'{prefix}_call_live_blocks_delta{{name="{_label(name)}"}} {m["live_blocks_delta"]}')
+    lines += [f"# HELP {prefix}_call_seconds Call latency.",
+              f"# TYPE {prefix}_call_seconds histogram"]
+    for name, m in metrics:
+        label = _label(name)
+        cumulative = 0
+        for bound, n in zip(BUCKETS + ("+Inf",), m["buckets"]):
+            cumulative += n
+            lines.append(f'{prefix}_call_seconds_bucket{{name="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'{prefix}_call_seconds_sum{{name="{label}"}} {m["seconds"]}')
+        lines.append(f'{prefix}_call_seconds_count{{name="{label}"}} {m["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def export_prometheus(path, prefix="app"):
+    text = prometheus_text(prefix)
+    atomic_write(path, lambda f: f.write(text))
+    return path
+
+
+# On-demand profiling: start_profile() begins cProfile and tracemalloc,
+# dump_profile() writes <prefix>.prof and <prefix>.tracemalloc and stops both.
+def profiling():
+    return _profiler is not None
+
+
+def start_profile(frames=10):
+    global _profiler
+    if _profiler is not None:
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+
+
+def dump_profile(prefix):
+    global _profiler
+    if _profiler is None:
+        raise RuntimeError("Profil başlatılmadı")
+    _profiler.disable()
+    _profiler.dump_stats(prefix + ".prof")
+    _profiler = None
+    tracemalloc.take_snapshot().dump(prefix + ".tracemalloc")
+    tracemalloc.stop()
+    return prefix + ".prof", prefix + ".tracemalloc"
+
+
+def toggle_profile(prefix):
+    # starts profiling, or stops it and returns the written file paths
+    if _profiler is None:
+        start_profile()
+        return None
+    return dump_profile(prefix)
@@ -0,0 +1,117 @@
+import os
+import json
+import codecs
+
+# Incremental reader for the JSON files written by CRM and StoreManager.
+# Only one element is decoded at a time, so the raw text and the full parsed
+# tree never sit in memory together.
+_decoder = json.JSONDecoder()
+_WS = " \t\r\n"
+_DELIMS = _WS + ",]}:"
+
+
+class _Reader:
+    def __init__(self, f, chunk_size, progress):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.decode = codecs.getincrementaldecoder("utf-8-sig")().decode
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+        try:
+            self.total = os.fstat(f.fileno()).st_size
+        except (AttributeError, OSError, ValueError):
+            self.total = 0
+
+    def _fill(self, size=None):
+        data = self.f.read(size or self.chunk_size)
+        if isinstance(data, bytes):
+            self.bytes_read += len(data)
+            text = self.decode(data, final=not data)
+        else:
+            self.bytes_read += len(data.encode("utf-8"))
+            text = data
+        if not data:
+            self.eof = True
+        # drop the consumed prefix before growing the buffer
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+        if self.progress and self.total:
+            self.progress(min(self.bytes_read / self.total, 1.0))
+        return bool(data)
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"JSON: '{char}' bekleniyordu, konum {self.bytes_read}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+                # a number cut by the chunk boundary also decodes; accept only
+                # values followed by a delimiter
+                if self.eof or (end < len(self.buf) and self.buf[end] in _DELIMS):
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            size *= 2  # large element: read bigger chunks instead of re-parsing often
+            self._fill(size)
+
+
+def _iter_elements(reader):
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        sep = reader.peek()
+        reader.pos += 1
+        if sep == "]":
+            return
+        if sep != ",":
+            raise ValueError(f"JSON: ',' veya ']' bekleniyordu, konum {reader.bytes_read}")
+
+
+def iter_array(f, chunk_size=1 << 16, progress=None):
+    # Yields the elements of a top-level JSON array one by one
+    yield from _iter_elements(_Reader(f, chunk_size, progress))
+
+
+def iter_object(f, chunk_size=1 << 16, progress=None):
+    # Yields (key, element) for every element of every array value in a
+    # top-level object; non-array values are yielded once as (key, value)
+    reader = _Reader(f, chunk_size, progress)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if reader.peek() == "[":
+            for element in _iter_elements(reader):
+                yield key, element
+        else:
+            yield key, reader.value()
+        sep = reader.peek()
+        reader.pos += 1
+        if sep == "}":
+            return
+        if sep != ",":
+            raise ValueError(f"JSON: ',' veya '}}' bekleniyordu, konum {reader.bytes_read}")
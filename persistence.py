@@ -0,0 +1,91 @@
+import os
+import queue
+import threading
+
+
+def atomic_write(path, write, encoding="utf-8", newline=None):
+    # write(f) fills a temporary file next to `path`; it replaces `path` only
+    # after it is fully on disk, so a crash never leaves a truncated file.
+    # encoding=None opens the file in binary mode; newline is passed to open().
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with (open(tmp, "wb") if encoding is None else open(tmp, "w", encoding=encoding, newline=newline)) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        # persist the rename itself
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class BackgroundSaver:
+    # Runs save jobs on one worker thread. A job is a closure built on the
+    # caller's thread around a cheap snapshot; submitting a job under a key
+    # that is still waiting replaces it, so bursts of saves write once.
+    def __init__(self):
+        self._pending = {}
+        self._order = []
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self.errors = queue.Queue()
+        self.saves = 0
+        self._thread = threading.Thread(target=self._run, name="BackgroundSaver", daemon=True)
+        self._thread.start()
+
+    def submit(self, key, job):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("BackgroundSaver kapatıldı")
+            if key not in self._pending:
+                self._order.append(key)
+            self._pending[key] = job
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._order and not self._closed:
+                    self._cond.wait()
+                if not self._order:
+                    return
+                key = self._order.pop(0)
+                job = self._pending.pop(key)
+                self._busy = True
+            try:
+                job()
+                self.saves += 1
+            except Exception as e:
+                self.errors.put(e)
+            finally:
+                job = None  # the finished job's snapshot is freed now, not at the next save
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def idle(self):
+        # nothing queued or running
+        with self._cond:
+            return not self._order and not self._busy
+
+    def flush(self, timeout=None):
+        # waits until every submitted job has finished
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._order and not self._busy, timeout)
+
+    def close(self, timeout=None):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
@@ -0,0 +1,139 @@
+import json
+import base64
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+# Cursor pagination over maintained sort orders. A sort order is a sorted
+# list of (key, id) pairs kept up to date on every change; a page starts with
+# a binary search for the cursor (or the start of a key range) and then walks
+# at most `limit` matching pairs, so it costs O(log n + page) however many
+# records there are. The cursor is the (key, id) of the last row returned
+# rather than an offset, so rows inserted or removed elsewhere while a client
+# pages through never shift the next page: nothing is skipped or repeated.
+#
+#   ids, cursor = order.page(limit=50)
+#   ids, cursor = order.page(cursor, limit=50)   # until fewer than 50 come back
+
+
+class _Last:
+    # sorts after every id, so (key, LAST) comes after all pairs with that key
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+LAST = _Last()
+
+
+def encode_cursor(sort, key, item_id):
+    return base64.urlsafe_b64encode(json.dumps([sort, key, item_id]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor, sort):
+    # -> (key, id); a cursor from another sort order is rejected
+    try:
+        name, key, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError):
+        raise ValueError("Geçersiz imleç")
+    if name != sort:
+        raise ValueError("İmleç başka bir sıralamaya ait")
+    return key, item_id
+
+
+def prefix_range(text):
+    # (low, high) bounds of the string keys starting with text
+    return text, text + "\U0010ffff"
+
+
+def page_pairs(pairs, after=None, limit=50, descending=False, low=None, high=None, where=None):
+    # Walks the sorted (key, id) list from just past `after` (a (key, id)
+    # pair) within low <= key <= high and returns the ids for which where(id)
+    # is true. Filters other than the key range are checked row by row.
+    if descending:
+        i = len(pairs) if high is None else bisect_right(pairs, (high, LAST))
+        if after is not None:
+            i = min(i, bisect_left(pairs, tuple(after)))
+        stop = 0 if low is None else bisect_left(pairs, (low,))
+        step = -1
+        i -= 1
+    else:
+        i = 0 if low is None else bisect_left(pairs, (low,))
+        if after is not None:
+            i = max(i, bisect_right(pairs, tuple(after)))
+        stop = len(pairs) if high is None else bisect_right(pairs, (high, LAST))
+        step = 1
+    found, last = [], None
+    while len(found) < limit and (i >= stop if descending else i < stop):
+        last = pairs[i]
+        if where is None or where(last[1]):
+            found.append(last[1])
+        i += step
+    return found, last if found else None
+
+
+class SortedKeys:
+    # One sort order: a key per id, (key, id) pairs kept sorted
+    def __init__(self, name):
+        self.name = name
+        self._pairs = []
+        self._keys = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, item_id):
+        return item_id in self._keys
+
+    def key(self, item_id):
+        return self._keys.get(item_id)
+
+    def add(self, item_id, key):
+        with self._lock:
+            old = self._keys.get(item_id)
+            if old is not None:
+                if old == key:
+                    return
+                self._discard(old, item_id)
+            self._keys[item_id] = key
+            insort(self._pairs, (key, item_id))
+
+    update = add
+
+    def extend(self, rows):
+        # bulk load of (id, key) rows: appended and sorted once (the existing
+        # pairs are one sorted run, so this is close to linear)
+        with self._lock:
+            rows = list(rows)
+            if len(rows) < 64:
+                for item_id, key in rows:
+                    self.add(item_id, key)
+                return
+            for item_id, key in rows:
+                old = self._keys.pop(item_id, None)
+                if old is not None:
+                    self._discard(old, item_id)
+            for item_id, key in rows:
+                self._keys[item_id] = key
+                self._pairs.append((key, item_id))
+            self._pairs.sort()
+
+    def remove(self, item_id):
+        with self._lock:
+            key = self._keys.pop(item_id, None)
+            if key is not None:
+                self._discard(key, item_id)
+
+    def _discard(self, key, item_id):
+        i = bisect_left(self._pairs, (key, item_id))
+        if i < len(self._pairs) and self._pairs[i] == (key, item_id):
+            del self._pairs[i]
+
+    def page(self, cursor=None, limit=50, descending=False, low=None, high=None, where=None):
+        # -> (ids, cursor after the last id, or None when the page is empty)
+        after = decode_cursor(cursor, self.name) if cursor else None
+        with self._lock:
+            ids, last = page_pairs(self._pairs, after, limit, descending, low, high, where)
+        return ids, encode_cursor(self.name, *last) if last else None
@@ -0,0 +1,202 @@
+import re
+from bisect import bisect_left, insort
+
+# Turkish letters folded to their ASCII look-alikes so "ışık", "Isik" and "IŞIK" match
+_TR_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+_TR_FOLD = str.maketrans({"ı": "i", "ş": "s", "ç": "c", "ğ": "g", "ö": "o", "ü": "u", "â": "a", "î": "i", "û": "u"})
+_NON_DIGIT = re.compile(r"\D")
+
+
+def fold(text):
+    return " ".join(text.translate(_TR_LOWER).lower().translate(_TR_FOLD).split())
+
+
+def normalize_phone(phone):
+    digits = _NON_DIGIT.sub("", phone or "")
+    # 0555..., 90555..., +90 555... all reduce to the 10-digit subscriber number
+    if len(digits) > 10 and digits.startswith("90"):
+        digits = digits[2:]
+    return digits.lstrip("0") if len(digits) == 11 else digits
+
+
+def normalize_email(email):
+    return (email or "").strip().lower()
+
+
+def trigrams(text):
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class CustomerIndex:
+    # Sorted name keys for prefix search, hash maps for phone/email and a trigram
+    # index for typo-tolerant lookups. Kept in sync by add/update/remove.
+    def __init__(self):
+        self._names = []      # sorted (key, id); key is "first last" and "last"
+        self._entries = {}    # id -> (name keys, phone, email, grams)
+        self._phones = {}
+        self._emails = {}
+        self._grams = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, customer_id):
+        return customer_id in self._entries
+
+    def add(self, customer_id, first, last, phone, email, _sorted=True):
+        if customer_id in self._entries:
+            self.remove(customer_id)
+        full = fold(f"{first} {last}")
+        keys = (full, fold(last))
+        for key in keys:
+            if _sorted:
+                insort(self._names, (key, customer_id))
+            else:
+                self._names.append((key, customer_id))
+        phone, email = normalize_phone(phone), normalize_email(email)
+        if phone:
+            self._phones.setdefault(phone, set()).add(customer_id)
+        if email:
+            self._emails.setdefault(email, set()).add(customer_id)
+        grams = trigrams(full)
+        for g in grams:
+            self._grams.setdefault(g, set()).add(customer_id)
+        self._entries[customer_id] = (keys, phone, email, grams)
+
+    update = add
+
+    def extend(self, rows):
+        # bulk load: (id, first, last, phone, email) rows, one sort at the end
+        for row in rows:
+            self.add(*row, _sorted=False)
+        self._names.sort()
+
+    def remove(self, customer_id):
+        entry = self._entries.pop(customer_id, None)
+        if entry is None:
+            return
+        keys, phone, email, grams = entry
+        for key in keys:
+            i = bisect_left(self._names, (key, customer_id))
+            if i < len(self._names) and self._names[i] == (key, customer_id):
+                del self._names[i]
+        for table, value in ((self._phones, phone), (self._emails, email)):
+            if value:
+                table[value].discard(customer_id)
+                if not table[value]:
+                    del table[value]
+        for g in grams:
+            self._grams[g].discard(customer_id)
+            if not self._grams[g]:
+                del self._grams[g]
+
+    def by_phone(self, phone):
+        return list(self._phones.get(normalize_phone(phone), ()))
+
+    def by_email(self, email):
+        return list(self._emails.get(normalize_email(email), ()))
+
+    def prefix(self, text, limit=20):
+        text = fold(text)
+        found = []
+        i = bisect_left(self._names, (text,))
+        while i < len(self._names) and len(found) < limit:
+            key, customer_id = self._names[i]
+            if not key.startswith(text):
+                break
+            if customer_id not in found:
+                found.append(customer_id)
+            i += 1
+        return found
+
+    def fuzzy(self, text, limit=20, min_score=0.5):
+        grams = trigrams(fold(text))
+        counts = {}
+        for g in grams:
+            for customer_id in self._grams.get(g, ()):
+                counts[customer_id] = counts.get(customer_id, 0) + 1
+        scored = []
+        for customer_id, common in counts.items():
+            # share of the query found in the name, ties broken by overall similarity
+            score = common / len(grams)
+            if score >= min_score:
+                jaccard = common / (len(grams) + len(self._entries[customer_id][3]) - common)
+                scored.append((score, jaccard, customer_id))
+        scored.sort(key=lambda x: (-x[0], -x[1]))
+        return [customer_id for _, _, customer_id in scored[:limit]]
+
+    def search(self, text, limit=20):
+        text = text.strip()
+        if not text:
+            return []
+        if "@" in text:
+            return self.by_email(text)[:limit]
+        if _NON_DIGIT.sub("", text) and not any(c.isalpha() for c in text):
+            return self.by_phone(text)[:limit]
+        found = self.prefix(text, limit)
+        if len(found) < limit:
+            for customer_id in self.fuzzy(text, limit):
+                if customer_id not in found:
+                    found.append(customer_id)
+                    if len(found) == limit:
+                        break
+        return found
+
+
+class NameIndex:
+    # Prefix search over every word of short names (instrument names): each
+    # word start is a sorted key, so "gitar" finds "Klasik Gitar".
+    def __init__(self):
+        self._keys = []       # sorted (key, id)
+        self._entries = {}    # id -> keys
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, item_id):
+        return item_id in self._entries
+
+    def add(self, item_id, name, _sorted=True):
+        if item_id in self._entries:
+            self.remove(item_id)
+        words = fold(name).split(" ")
+        keys = {" ".join(words[i:]) for i in range(len(words))}
+        for key in keys:
+            if _sorted:
+                insort(self._keys, (key, item_id))
+            else:
+                self._keys.append((key, item_id))
+        self._entries[item_id] = keys
+
+    update = add
+
+    def extend(self, rows):
+        # bulk load: (id, name) rows, one sort at the end
+        for item_id, name in rows:
+            self.add(item_id, name, _sorted=False)
+        self._keys.sort()
+
+    def remove(self, item_id):
+        for key in self._entries.pop(item_id, ()):
+            i = bisect_left(self._keys, (key, item_id))
+            if i < len(self._keys) and self._keys[i] == (key, item_id):
+                del self._keys[i]
+
+    def search(self, text, limit=20):
+        text = fold(text)
+        if not text:
+            return []
+        found = []
+        i = bisect_left(self._keys, (text,))
+        while i < len(self._keys) and len(found) < limit:
+            key, item_id = self._keys[i]
+            if not key.startswith(text):
+                break
+            if item_id not in found:
+                found.append(item_id)
+            i += 1
+        return found
@@ -0,0 +1,467 @@
+import re
+import sys
+import json
+import argparse
+import threading
+from itertools import islice
+from urllib.parse import urlparse, parse_qs
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+
+from CRM import CRM
+from persistence import BackgroundSaver
+from store_loader import load_store_module
+
+# Local HTTP/JSON service over one CRM and one StoreManager. Terminals talk to
+# this process instead of each loading and overwriting their own data files.
+#
+#   GET  /crm/customers?offset=&limit=&q=        POST /crm/customers
+#   GET  /crm/customers?cursor=&sort=&desc=&prefix=&open_tickets=&min_total=&max_total=&limit=
+#   GET  /crm/customers/<id>                     PATCH /crm/customers/<id>
+#   POST /crm/customers/<id>/sales               POST /crm/customers/<id>/supports
+#   GET  /crm/report?n=
+#   POST /crm/supports/next                      PATCH /crm/supports/<talep_id>
+#   GET  /store/instruments?offset=&limit=       POST /store/instruments
+#   GET  /store/instruments?cursor=&sort=&desc=&prefix=&stock_below=&limit=
+#   GET  /store/instruments/low                  PATCH /store/instruments/<id>
+#   GET  /store/customers?offset=&limit=&q=      POST /store/customers
+#   GET  /store/customers?cursor=&sort=&desc=&prefix=&open_tickets=&limit=
+#   GET  /store/customers/<id>/sales             POST /store/sales
+#   POST /store/supports                         GET  /store/report
+#   POST /store/supports/next                    PATCH /store/supports/<request_id>
+
+MAX_PAGE = 500
+# any of these switches a list endpoint from offset paging to the cursor query API
+QUERY_PARAMS = ("cursor", "sort", "desc", "prefix", "open_tickets", "min_total", "max_total", "stock_below")
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class PooledHTTPServer(HTTPServer):
+    # Requests are handled on a fixed thread pool instead of a thread per request
+    def __init__(self, address, handler, api, workers=8):
+        super().__init__(address, handler)
+        self.api = api
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="api")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+# expected type of a field, for error messages
+KINDS = {int: "bir tam sayı", float: "bir sayı", str: "bir metin"}
+
+
+def _convert(value, name, kind):
+    try:
+        return kind(value)
+    except (ValueError, TypeError, OverflowError):
+        raise ApiError(400, f"'{name}' {KINDS[kind]} olmalı")
+
+
+def _field(body, name, kind=str, default=None):
+    # body[name] as kind; a missing or unparsable field is a 400 naming the field
+    value = body.get(name, default)
+    if value is None:
+        raise ApiError(400, f"Eksik alan: '{name}'")
+    return _convert(value, name, kind)
+
+
+def _param(params, name, kind=int, default=None):
+    value = params.get(name)
+    return default if value is None else _convert(value, name, kind)
+
+
+def _page(params):
+    offset = _param(params, "offset", int, 0)
+    limit = min(_param(params, "limit", int, 50), MAX_PAGE)
+    if offset < 0 or limit < 0:
+        raise ValueError("offset/limit negatif olamaz")
+    return offset, limit
+
+
+def _flag(params, name):
+    value = params.get(name)
+    return None if value is None else value.lower() in ("1", "true", "yes")
+
+
+def _number(params, name, kind=float):
+    return _param(params, name, kind)
+
+
+def _cursor_query(params):
+    return not params.get("q") and any(k in params for k in QUERY_PARAMS)
+
+
+def _musteri(m):
+    if m.crm:
+        mid, ad, soyad, telefon, email, satis, acik, destek = m.crm.musteri_ozeti(m.musteri_id)[:8]
+    else:
+        mid, ad, soyad, telefon, email = m.musteri_id, m.ad, m.soyad, m.telefon, m.email
+        satis, acik, destek = m.satis_sayisi(), 0, m.destek_sayisi()
+    return {"musteri_id": mid, "ad": ad, "soyad": soyad, "telefon": telefon, "email": email,
+            "satis_sayisi": satis, "destek_sayisi": destek, "acik_destek": acik}
+
+
+def _customer(c):
+    return {"customer_id": c.customer_id, "first_name": c.first_name, "last_name": c.last_name,
+            "phone": c.phone, "email": c.email}
+
+
+class Api:
+    # The models are not thread-safe: every request runs under one lock, held
+    # only for the in-memory work (JSON encoding and socket I/O happen outside)
+    def __init__(self, crm, store, crm_file="veriler.json", autosave_interval=30):
+        self.crm = crm
+        self.store = store
+        self.crm_file = crm_file
+        self.lock = threading.RLock()
+        self.routes = []
+        self._autosave_interval = autosave_interval
+        self._stop = threading.Event()
+        r = self.route
+        r("GET", r"/crm/customers", self.crm_customers)
+        r("POST", r"/crm/customers", self.crm_add_customer)
+        r("GET", r"/crm/customers/([^/]+)", self.crm_customer)
+        r("PATCH", r"/crm/customers/([^/]+)", self.crm_update_customer)
+        r("POST", r"/crm/customers/([^/]+)/sales", self.crm_add_sale)
+        r("POST", r"/crm/customers/([^/]+)/supports", self.crm_add_support)
+        r("GET", r"/crm/report", self.crm_report)
+        r("POST", r"/crm/supports/next", self.crm_next_support)
+        r("PATCH", r"/crm/supports/([^/]+)", self.crm_update_support)
+        r("GET", r"/store/instruments", self.store_instruments)
+        r("POST", r"/store/instruments", self.store_add_instrument)
+        r("GET", r"/store/instruments/low", self.store_low_stock)
+        r("PATCH", r"/store/instruments/([^/]+)", self.store_update_instrument)
+        r("GET", r"/store/customers", self.store_customers)
+        r("POST", r"/store/customers", self.store_add_customer)
+        r("GET", r"/store/customers/([^/]+)/sales", self.store_customer_sales)
+        r("POST", r"/store/sales", self.store_add_sale)
+        r("POST", r"/store/supports", self.store_add_support)
+        r("POST", r"/store/supports/next", self.store_next_support)
+        r("PATCH", r"/store/supports/([^/]+)", self.store_update_support)
+        r("GET", r"/store/report", self.store_report)
+
+    def route(self, method, pattern, handler):
+        self.routes.append((method, re.compile(pattern + r"/?"), handler))
+
+    def dispatch(self, method, path, params, body):
+        allowed = False
+        for m, pattern, handler in self.routes:
+            match = pattern.fullmatch(path)
+            if match:
+                allowed = True
+                if m == method:
+                    with self.lock:
+                        return handler(params, body, *match.groups())
+        raise ApiError(405 if allowed else 404, "Yöntem desteklenmiyor" if allowed else "Bulunamadı")
+
+    # Autosave
+    def start_autosave(self):
+        if self._autosave_interval:
+            threading.Thread(target=self._autosave, name="autosave", daemon=True).start()
+
+    def _autosave(self):
+        while not self._stop.wait(self._autosave_interval):
+            self.save()
+
+    def save(self):
+        with self.lock:
+            self.crm.verileri_kaydet(self.crm_file)
+            self.store.save_data()
+
+    def close(self):
+        self._stop.set()
+        self.save()
+        self.crm.kapat()
+        if self.store.storage:
+            self.store.storage.close()
+
+    # CRM
+    def _crm_get(self, musteri_id):
+        musteri = self.crm.musteri_getir(musteri_id)
+        if musteri is None:
+            raise ApiError(404, "Müşteri bulunamadı")
+        return musteri
+
+    def crm_customers(self, params, body):
+        offset, limit = _page(params)
+        if _cursor_query(params):
+            found, cursor = self.crm.musteri_sorgula(
+                params.get("prefix"), _flag(params, "open_tickets"), _number(params, "min_total"),
+                _number(params, "max_total"), params.get("sort", "kayit"), bool(_flag(params, "desc")),
+                params.get("cursor"), limit)
+            return {"cursor": cursor, "items": [_musteri(m) for m in found]}
+        if params.get("q"):
+            found = self.crm.musteri_ara(params["q"], offset + limit)[offset:]
+        else:
+            found = islice(self.crm.musteriler.values(), offset, offset + limit)
+        return {"offset": offset, "total": len(self.crm.musteriler), "items": [_musteri(m) for m in found]}
+
+    def crm_add_customer(self, params, body):
+        values = [str(body.get(k, "")).strip() for k in ("ad", "soyad", "telefon", "email")]
+        if not all(values):
+            raise ValueError("ad, soyad, telefon ve email gerekli")
+        return {"musteri_id": self.crm.musteri_ekle(*values)}
+
+    def crm_customer(self, params, body, musteri_id):
+        return self._crm_get(musteri_id).to_dict()
+
+    def crm_update_customer(self, params, body, musteri_id):
+        musteri = self._crm_get(musteri_id)
+        musteri.musteri_guncelle(**{k: body[k] for k in ("ad", "soyad", "telefon", "email") if body.get(k)})
+        return _musteri(musteri)
+
+    def crm_add_sale(self, params, body, musteri_id):
+        musteri = self._crm_get(musteri_id)
+        satis = musteri.satis_ekle(_field(body, "urun"), _field(body, "miktar", int),
+                                   _field(body, "toplam_tutar", float))
+        return satis.to_dict()
+
+    def crm_add_support(self, params, body, musteri_id):
+        musteri = self._crm_get(musteri_id)
+        return musteri.destek_talebi_olustur(_field(body, "konu"), _field(body, "aciklama")).to_dict()
+
+    def crm_report(self, params, body):
+        n = min(_param(params, "n", int, 10), MAX_PAGE)
+        return {"toplam_satis_tutar": self.crm.toplam_satis_tutar(),
+                "en_cok_satis_yapanlar": [dict(_musteri(m), toplam=t) for m, t in self.crm.en_cok_satis_yapanlar(n)]}
+
+    def crm_next_support(self, params, body):
+        talep = self.crm.siradaki_destek()
+        if talep is None:
+            raise ApiError(404, "Kuyrukta bekleyen talep yok")
+        return talep.to_dict()
+
+    def crm_update_support(self, params, body, talep_id):
+        if self.crm.destek_talebi_bul(talep_id)[1] is None:
+            raise ApiError(404, "Destek talebi bulunamadı")
+        try:
+            return self.crm.destek_durumu_degistir(talep_id, _field(body, "durum")).to_dict()
+        except ValueError as e:
+            raise ApiError(409, str(e))
+
+    # Store
+    def store_instruments(self, params, body):
+        offset, limit = _page(params)
+        if _cursor_query(params):
+            found, cursor = self.store.query_instruments(
+                params.get("prefix"), _number(params, "stock_below", int), params.get("sort", "name"),
+                bool(_flag(params, "desc")), params.get("cursor"), limit)
+            return {"cursor": cursor, "items": [i.to_dict() for i in found]}
+        return {"offset": offset, "items": [i.to_dict() for i in self.store.list_instruments(offset, limit)]}
+
+    def store_add_instrument(self, params, body):
+        stock = _field(body, "stock", int)
+        if stock < 0:
+            raise ValueError("Geçersiz stok değeri")
+        level = _field(body, "reorder_level", int, 0)
+        if level < 0:
+            raise ValueError("Geçersiz eşik değeri")
+        return self.store.add_instrument(_field(body, "name"), stock, level).to_dict()
+
+    def store_low_stock(self, params, body):
+        return {"items": [i.to_dict() for i in self.store.low_stock()]}
+
+    def store_update_instrument(self, params, body, instrument_id):
+        if self.store.get_instrument(instrument_id) is None:
+            raise ApiError(404, "Geçersiz enstrüman ID'si")
+        level = _field(body, "reorder_level", int)
+        if level < 0:
+            raise ValueError("Geçersiz eşik değeri")
+        return self.store.set_reorder_level(instrument_id, level).to_dict()
+
+    def store_customers(self, params, body):
+        offset, limit = _page(params)
+        if _cursor_query(params):
+            found, cursor = self.store.query_customers(
+                params.get("prefix"), _flag(params, "open_tickets"), params.get("sort", "created"),
+                bool(_flag(params, "desc")), params.get("cursor"), limit)
+            return {"cursor": cursor, "items": [_customer(c) for c in found]}
+        if params.get("q"):
+            found = self.store.search_customers(params["q"], offset + limit)[offset:]
+        else:
+            found = self.store.list_customers(offset, limit)
+        return {"offset": offset, "items": [_customer(c) for c in found]}
+
+    def store_add_customer(self, params, body):
+        values = [str(body.get(k, "")).strip() for k in ("first_name", "last_name", "phone", "email")]
+        if not all(values):
+            raise ValueError("first_name, last_name, phone ve email gerekli")
+        return _customer(self.store.add_customer(*values))
+
+    def store_customer_sales(self, params, body, customer_id):
+        if self.store.get_customer(customer_id) is None:
+            raise ApiError(404, "Müşteri bulunamadı")
+        return {"items": [s.to_dict() for s in self.store.customer_sales(customer_id)]}
+
+    def store_add_sale(self, params, body):
+        if self.store.get_customer(body.get("customer_id")) is None:
+            raise ApiError(404, "Müşteri bulunamadı")
+        lines = body.get("items") or []
+        if not isinstance(lines, list) or not all(isinstance(item, dict) for item in lines):
+            raise ApiError(400, "'items' bir nesne listesi olmalı")
+        items = []
+        for item in lines:
+            inst = self.store.get_instrument(item.get("instrument_id"))
+            if inst is None:
+                raise ApiError(404, "Geçersiz enstrüman ID'si")
+            qty = _field(item, "qty", int)
+            if qty <= 0:
+                raise ValueError("Geçersiz miktar")
+            items.append((inst, qty, _field(item, "price", float)))
+        if not items:
+            raise ValueError("items boş olamaz")
+        try:
+            return self.store.create_sale(body["customer_id"], items).to_dict()
+        except ValueError as e:
+            raise ApiError(409, str(e))
+
+    def store_add_support(self, params, body):
+        if self.store.get_customer(body.get("customer_id")) is None:
+            raise ApiError(404, "Müşteri bulunamadı")
+        return self.store.create_support(body["customer_id"], _field(body, "subject"),
+                                         _field(body, "message")).to_dict()
+
+    def store_next_support(self, params, body):
+        sup = self.store.next_support()
+        if sup is None:
+            raise ApiError(404, "Kuyrukta bekleyen talep yok")
+        return sup.to_dict()
+
+    def store_update_support(self, params, body, request_id):
+        if request_id not in self.store.tickets:
+            raise ApiError(404, "Destek talebi bulunamadı")
+        try:
+            return self.store.update_support_status(request_id, _field(body, "status")).to_dict()
+        except ValueError as e:
+            raise ApiError(409, str(e))
+
+    def store_report(self, params, body):
+        return {"revenue": self.store.total_revenue(),
+                "top_sellers": [dict(i.to_dict(), units_sold=u) for i, u in self.store.top_sellers(10)]}
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "CRMApi/1.0"
+
+    def _handle(self, method):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            body = {}
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                raise ApiError(400, "Geçersiz Content-Length başlığı")
+            if length:
+                try:
+                    body = json.loads(self.rfile.read(length))
+                except ValueError:
+                    raise ApiError(400, "İstek gövdesi geçerli JSON değil")
+                if not isinstance(body, dict):
+                    raise ValueError("JSON nesnesi bekleniyordu")
+            status, result = 200, self.server.api.dispatch(method, url.path, params, body)
+        except ApiError as e:
+            status, result = e.status, {"error": str(e)}
+        except ValueError as e:
+            # messages of the models' own checks ("Geçersiz miktar"...)
+            status, result = 400, {"error": str(e)}
+        except (KeyError, TypeError, AttributeError):
+            status, result = 400, {"error": "İstek gövdesi beklenen biçimde değil"}
+        self._reply(status, result)
+
+    def _reply(self, status, result):
+        data = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def send_error(self, code, message=None, explain=None):
+        # errors raised by http.server itself (unknown methods, bad request
+        # lines, oversized headers) are answered in JSON too
+        self.close_connection = True
+        self._reply(code, {"error": message or self.responses.get(code, ("Hata",))[0]})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    # no route takes these; they get the JSON 405 (or 404) from dispatch
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(api, host="127.0.0.1", port=8765, workers=8, verbose=False):
+    server = PooledHTTPServer((host, port), ApiHandler, api, workers)
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CRM ve enstrüman dükkanı için yerel HTTP/JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=8, help="istek iş parçacığı sayısı")
+    parser.add_argument("--crm-dosya", default="veriler.json")
+    parser.add_argument("--crm-gunluk", default="veriler.gunluk.jsonl")
+    parser.add_argument("--store-db", default="store_data.db")
+    parser.add_argument("--store-json", default="store_data.json")
+    parser.add_argument("--autosave", type=int, default=30, help="kayıt aralığı (sn)")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    crm = CRM(gunluk_dosyasi=args.crm_gunluk)
+    crm.kaydedici = BackgroundSaver()
+    crm.verileri_yukle(args.crm_dosya)
+    store_mod = load_store_module()
+    store = store_mod.StoreManager(storage=store_mod.SQLiteStorage(args.store_db))
+    store.load_data(args.store_json)
+
+    api = Api(crm, store, args.crm_dosya, args.autosave)
+    server = make_server(api, args.host, args.port, args.workers, args.verbose)
+    api.start_autosave()
+    print(f"API http://{args.host}:{server.server_port} adresinde dinliyor", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        api.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
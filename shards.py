@@ -0,0 +1,202 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from store_loader import load_store_module
+
+# Branch sharding for the instrument store: every branch has its own SQLite
+# database (DIR/<branch>.db, seeded once from DIR/<branch>.json if present) and
+# its own StoreManager, opened on first use, so one branch's work never loads
+# another branch. A routing table (DIR/routes.db) maps customer and instrument
+# ids to their branch; ids it does not know yet (bulk imports, old databases)
+# are looked up in each branch once and then recorded.
+# Cross-branch reports run one aggregation per branch in a process pool and
+# merge the results.
+#
+#   stores = BranchStores("branches")
+#   cust = stores.add_customer("kadikoy", "Ali", "Veli", "0532...", "ali@x.com")
+#   stores.report(workers=4)
+
+ROUTES = "routes.db"
+SUFFIX = ".db"
+
+
+class Router:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS routes ("
+                          "id TEXT PRIMARY KEY, kind TEXT NOT NULL, branch TEXT NOT NULL) WITHOUT ROWID")
+        self.conn.commit()
+
+    def get(self, record_id):
+        row = self.conn.execute("SELECT branch FROM routes WHERE id = ?", (record_id,)).fetchone()
+        return row[0] if row else None
+
+    def add_many(self, rows):
+        # (id, kind, branch) rows; kind is "customer" or "instrument"
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO routes VALUES (?, ?, ?)", rows)
+
+    def add(self, record_id, kind, branch):
+        self.add_many([(record_id, kind, branch)])
+
+    def drop_branch(self, branch):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM routes WHERE branch = ?", (branch,))
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM routes").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def branch_report(branch, path):
+    # Runs in a worker process: totals of one branch, read straight from its database
+    store = load_store_module()
+    storage = store.SQLiteStorage(path)
+    try:
+        instruments = [(i.name, i.stock, i.reorder_level) for i in storage.list_instruments()]
+        return {"branch": branch,
+                "customers": storage.count("customers"),
+                "sales": storage.count("sales"),
+                "revenue": storage.total_revenue(),
+                "monthly": storage.monthly_revenue(),
+                "stock": instruments,
+                "low_stock": [(name, stock, level) for name, stock, level in instruments if stock <= level]}
+    finally:
+        storage.close()
+
+
+def merge_reports(reports):
+    # per-branch reports -> totals; stock and monthly revenue are summed by
+    # instrument name and month, since ids differ between branches
+    stock, monthly = {}, {}
+    for r in reports:
+        for name, units, level in r["stock"]:
+            stock[name] = stock.get(name, 0) + units
+        for month, revenue, sales in r["monthly"]:
+            total = monthly.setdefault(month, [0, 0])
+            total[0] += revenue
+            total[1] += sales
+    return {"branches": {r["branch"]: {k: r[k] for k in ("customers", "sales", "revenue", "low_stock")}
+                         for r in reports},
+            "customers": sum(r["customers"] for r in reports),
+            "sales": sum(r["sales"] for r in reports),
+            "revenue": sum(r["revenue"] for r in reports),
+            "monthly": [(month, revenue, sales) for month, (revenue, sales) in sorted(monthly.items())],
+            "stock": dict(sorted(stock.items()))}
+
+
+class BranchStores:
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.router = Router(os.path.join(directory, ROUTES))
+        self._storages = {}
+        self._managers = {}
+        self._lock = threading.Lock()
+
+    def branches(self):
+        return sorted(name[:-len(SUFFIX)] for name in os.listdir(self.directory)
+                      if name.endswith(SUFFIX) and name != ROUTES)
+
+    def path(self, branch):
+        if not branch or os.sep in branch or branch.startswith(".") or branch + SUFFIX == ROUTES:
+            raise ValueError(f"Geçersiz şube adı: {branch}")
+        return os.path.join(self.directory, branch + SUFFIX)
+
+    def storage(self, branch):
+        # database only, without the in-memory indexes of a StoreManager
+        with self._lock:
+            storage = self._storages.get(branch)
+            if storage is None:
+                storage = self._storages[branch] = load_store_module().SQLiteStorage(self.path(branch))
+            return storage
+
+    def manager(self, branch):
+        # the branch's StoreManager; its indexes are built from its own database only
+        storage = self.storage(branch)
+        with self._lock:
+            mgr = self._managers.get(branch)
+            if mgr is None:
+                mgr = load_store_module().StoreManager(storage=storage)
+                mgr.load_data(os.path.join(self.directory, branch + ".json"))
+                self._managers[branch] = mgr
+            return mgr
+
+    # Routing
+    def branch_of(self, record_id, kind="customer"):
+        branch = self.router.get(record_id)
+        if branch is not None:
+            return branch
+        for branch in self.branches():
+            storage = self.storage(branch)
+            found = storage.get_customer(record_id) if kind == "customer" else storage.get_instrument(record_id)
+            if found is not None:
+                self.router.add(record_id, kind, branch)
+                return branch
+        return None
+
+    def reindex(self):
+        # rebuilds every route from the branch databases (after copying databases in)
+        for branch in self.branches():
+            storage = self.storage(branch)
+            self.router.drop_branch(branch)
+            self.router.add_many((cid, "customer", branch) for cid, *_ in storage.iter_customer_keys())
+            self.router.add_many((i.instrument_id, "instrument", branch) for i in storage.list_instruments())
+        return self.router.count()
+
+    # Branch operations
+    def add_customer(self, branch, first, last, phone, email):
+        cust = self.manager(branch).add_customer(first, last, phone, email)
+        self.router.add(cust.customer_id, "customer", branch)
+        return cust
+
+    def add_instrument(self, branch, name, stock, reorder_level=0):
+        inst = self.manager(branch).add_instrument(name, stock, reorder_level)
+        self.router.add(inst.instrument_id, "instrument", branch)
+        return inst
+
+    def get_customer(self, customer_id):
+        branch = self.branch_of(customer_id)
+        return None if branch is None else self.manager(branch).get_customer(customer_id)
+
+    def get_instrument(self, instrument_id):
+        branch = self.branch_of(instrument_id, "instrument")
+        return None if branch is None else self.manager(branch).get_instrument(instrument_id)
+
+    def create_sale(self, branch, customer_id, items, date=None):
+        # a branch sells its own stock; the customer may be registered at any branch
+        home = self.branch_of(customer_id)
+        if home is None:
+            raise ValueError("Geçersiz müşteri ID'si")
+        for inst, qty, price in items:
+            if self.branch_of(inst.instrument_id, "instrument") != branch:
+                raise ValueError(f"{inst.name} bu şubenin stoğunda değil")
+        mgr = self.manager(branch)
+        if home != branch and customer_id not in mgr.customers:
+            # a visiting customer is cached in the selling branch's manager, not
+            # written to its database, so reports and routes still count them once
+            mgr.customers[customer_id] = self.storage(home).get_customer(customer_id)
+        return mgr.create_sale(customer_id, items, date)
+
+    # Cross-branch reports
+    def report(self, workers=None):
+        branches = self.branches()
+        jobs = [(branch, self.path(branch)) for branch in branches]
+        workers = min(workers or os.cpu_count() or 1, len(jobs))
+        if workers <= 1:
+            return merge_reports([branch_report(*job) for job in jobs])
+        with ProcessPoolExecutor(workers) as pool:
+            return merge_reports(list(pool.map(branch_report, *zip(*jobs))))
+
+    def close(self):
+        for storage in self._storages.values():
+            storage.close()
+        self._storages.clear()
+        self._managers.clear()
+        self.router.close()
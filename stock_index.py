@@ -0,0 +1,125 @@
+import heapq
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+from query import page_pairs, encode_cursor, decode_cursor
+
+# Stock levels of the instrument catalogue, kept up to date on every change
+# instead of scanned on demand.
+#  - (stock, id) in a sorted list: instruments at or below a stock level
+#  - instruments at or below their own reorder level, maintained on each change;
+#    listeners get ("low", inst) / ("restocked", inst) when a level is crossed
+#  - units sold per instrument with a lazy max-heap for top sellers
+
+
+class StockIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._by_id = {}
+        self._sorted = []
+        self._low = {}
+        self.units_sold = {}
+        # (-units, id); stale entries are dropped when queried
+        self._heap = []
+        self.listeners = []
+
+    def add_listener(self, listener):
+        # listener(event, instrument); called on the thread that changed the stock
+        self.listeners.append(listener)
+
+    def _notify(self, event, inst):
+        for listener in self.listeners:
+            listener(event, inst)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def add(self, inst):
+        with self._lock:
+            if inst.instrument_id in self._by_id:
+                return
+            inst.index = self
+            self._by_id[inst.instrument_id] = inst
+            insort(self._sorted, (inst.stock, inst.instrument_id))
+            self._check(inst)
+
+    def extend(self, instruments):
+        # bulk load: one sort instead of an insort per instrument
+        with self._lock:
+            for inst in instruments:
+                if inst.instrument_id not in self._by_id:
+                    inst.index = self
+                    self._by_id[inst.instrument_id] = inst
+                    self._sorted.append((inst.stock, inst.instrument_id))
+                    self._check(inst)
+            self._sorted.sort()
+
+    def changed(self, inst, old_stock):
+        # called by Instrument when its stock is assigned
+        with self._lock:
+            i = bisect_right(self._sorted, (old_stock, inst.instrument_id)) - 1
+            if i >= 0 and self._sorted[i] == (old_stock, inst.instrument_id):
+                del self._sorted[i]
+            insort(self._sorted, (inst.stock, inst.instrument_id))
+            self._check(inst)
+
+    def _check(self, inst):
+        low = inst.stock <= inst.reorder_level
+        was_low = inst.instrument_id in self._low
+        if low and not was_low:
+            self._low[inst.instrument_id] = inst
+            self._notify("low", inst)
+        elif was_low and not low:
+            del self._low[inst.instrument_id]
+            self._notify("restocked", inst)
+
+    def set_reorder_level(self, inst, level):
+        with self._lock:
+            inst.reorder_level = level
+            self._check(inst)
+
+    def below_threshold(self):
+        # instruments at or below their reorder level, lowest stock first
+        with self._lock:
+            return sorted(self._low.values(), key=lambda i: (i.stock, i.instrument_id))
+
+    def at_most(self, stock):
+        with self._lock:
+            end = bisect_left(self._sorted, (stock + 1,))
+            return [self._by_id[iid] for _, iid in self._sorted[:end]]
+
+    def page(self, cursor=None, limit=50, descending=False, low=None, high=None, where=None):
+        # ([instrument], cursor) by stock level; see query.page_pairs
+        after = decode_cursor(cursor, "stock") if cursor else None
+        with self._lock:
+            ids, last = page_pairs(self._sorted, after, limit, descending, low, high, where)
+            return [self._by_id[iid] for iid in ids], encode_cursor("stock", *last) if last else None
+
+    def sold(self, instrument_id, qty):
+        with self._lock:
+            units = self.units_sold.get(instrument_id, 0) + qty
+            self.units_sold[instrument_id] = units
+            heapq.heappush(self._heap, (-units, instrument_id))
+            if len(self._heap) > 2 * len(self.units_sold) + 64:
+                self._heap = [(-u, iid) for iid, u in self.units_sold.items()]
+                heapq.heapify(self._heap)
+
+    def set_units_sold(self, units_sold):
+        with self._lock:
+            self.units_sold = dict(units_sold)
+            self._heap = [(-u, iid) for iid, u in self.units_sold.items()]
+            heapq.heapify(self._heap)
+
+    def top_sellers(self, n=10):
+        # [(instrument, units)] by units sold, largest first
+        with self._lock:
+            result, seen = [], set()
+            while self._heap and len(result) < n:
+                minus_units, iid = heapq.heappop(self._heap)
+                if iid in seen or self.units_sold.get(iid) != -minus_units:
+                    continue  # stale entry
+                seen.add(iid)
+                result.append((iid, -minus_units))
+            for iid, units in result:
+                heapq.heappush(self._heap, (-units, iid))
+            return [(self._by_id[iid], units) for iid, units in result if iid in self._by_id]
@@ -0,0 +1,16 @@
+import os
+import sys
+import importlib.util
+
+STORE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Muzin Dükkanı.py")
+
+
+def load_store_module():
+    # "Muzin Dükkanı.py" is not an importable module name; load it by path once
+    module = sys.modules.get("muzin_dukkani")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("muzin_dukkani", STORE_SCRIPT)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["muzin_dukkani"] = module
+        spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,60 @@
+import threading
+from collections import OrderedDict
+
+# Memoized per-record display rows (counts, totals, "first last" strings) for
+# list views. A row is computed on first use and served from the cache until
+# the record changes: writers call mark_dirty(id) and the next read rebuilds
+# it. At most `maxsize` rows are kept; the least recently used are evicted.
+#
+#   rows = SummaryCache(lambda cid: (...), maxsize=10000)
+#   rows.get(cid); rows.mark_dirty(cid)
+
+
+class SummaryCache:
+    def __init__(self, build, maxsize=10000):
+        self.build = build
+        self.maxsize = maxsize
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped by every invalidation; a row built across one is not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    def get(self, key):
+        with self._lock:
+            row = self._rows.get(key)
+            if row is not None:
+                self._rows.move_to_end(key)
+                self.hits += 1
+                return row
+            self.misses += 1
+            generation = self._generation
+        row = self.build(key)
+        with self._lock:
+            if generation != self._generation:
+                return row
+            self._rows[key] = row
+            self._rows.move_to_end(key)
+            if len(self._rows) > self.maxsize:
+                self._rows.popitem(last=False)
+        return row
+
+    def get_many(self, keys):
+        return [self.get(key) for key in keys]
+
+    def mark_dirty(self, key):
+        with self._lock:
+            self._rows.pop(key, None)
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+            self._generation += 1
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root, next to this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from store_loader import load_store_module  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def store():
+    # the "Muzin Dükkanı.py" module
+    return load_store_module()
+
+
+@pytest.fixture
+def crm_state():
+    # every customer with their sales and tickets, for comparing two CRMs
+    def state(crm):
+        return {m.musteri_id: (m.ad, m.soyad, m.telefon, m.email,
+                               [s.to_dict() for s in m.satislar],
+                               [d.to_dict() for d in m.destek_talepleri])
+                for m in crm.musteriler.values()}
+    return state
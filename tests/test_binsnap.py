@@ -0,0 +1,74 @@
+import os
+
+import binsnap
+from CRM import CRM
+from persistence import BackgroundSaver
+
+
+def make_crm():
+    crm = CRM()
+    for n in range(50):
+        musteri = crm.musteri_getir(crm.musteri_ekle(f"Ad{n}", f"Soyad{n}", f"0555{n:07d}", f"m{n}@example.com"))
+        for k in range(n % 4):
+            musteri.satis_ekle(f"Ürün {k}", k + 1, 100.0 * (k + 1) + 0.25)
+        if n % 5 == 0:
+            musteri.destek_talebi_olustur("Konu", f"Açıklama {n}")
+    return crm
+
+
+def test_bin_round_trip(tmp_path, crm_state):
+    path = str(tmp_path / "veriler.bin")
+    crm = make_crm()
+    assert crm.verileri_kaydet(path)
+    assert binsnap.is_snapshot(path)
+
+    loaded = CRM()
+    loaded.verileri_yukle(path)
+    assert crm_state(loaded) == crm_state(crm)
+    assert loaded.toplam_satis_tutar() == crm.toplam_satis_tutar()
+    loaded.kapat()
+
+
+def test_resave_over_the_mapped_file(tmp_path, crm_state):
+    path = str(tmp_path / "veriler.bin")
+    assert make_crm().verileri_kaydet(path)
+    crm = CRM()
+    crm.verileri_yukle(path)
+    musteri = next(iter(crm.musteriler.values()))
+    musteri.satis_ekle("Yeni", 1, 42.0)
+    expected = crm_state(crm)
+
+    assert crm.verileri_kaydet(path), crm.son_hata
+    # written beside the open file and swapped in; records still read after the swap
+    assert not os.path.exists(CRM._bekleyen_yolu(path))
+    assert crm_state(crm) == expected
+    crm.kapat()
+
+    again = CRM()
+    again.verileri_yukle(path)
+    assert crm_state(again) == expected
+    again.kapat()
+
+
+def test_background_save_swaps_on_the_owning_thread(tmp_path, crm_state):
+    path = str(tmp_path / "veriler.bin")
+    assert make_crm().verileri_kaydet(path)
+    crm = CRM()
+    crm.kaydedici = BackgroundSaver()
+    crm.verileri_yukle(path)
+    next(iter(crm.musteriler.values())).satis_ekle("Yeni", 1, 42.0)
+    expected = crm_state(crm)
+
+    assert crm.verileri_kaydet(path)
+    crm.kaydedici.flush()
+    assert os.path.exists(CRM._bekleyen_yolu(path))
+    assert crm.goruntuyu_tamamla()
+    assert not os.path.exists(CRM._bekleyen_yolu(path))
+    assert crm_state(crm) == expected
+    crm.kapat()
+    crm.kaydedici.close()
+
+    again = CRM()
+    again.verileri_yukle(path)
+    assert crm_state(again) == expected
+    again.kapat()
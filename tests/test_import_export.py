@@ -0,0 +1,62 @@
+import pytest
+
+import bulk_import
+import export
+from CRM import CRM
+
+
+def crm_sales(crm):
+    return sorted((m.musteri_id, s.urun, s.miktar, s.toplam_tutar, s.tarih)
+                  for m in crm.musteriler.values() for s in m.satislar)
+
+
+@pytest.mark.parametrize("ext", [".csv", ".jsonl"])
+def test_crm_round_trip(tmp_path, ext):
+    crm = CRM()
+    ids = crm.musterileri_ekle([(f"Ad{n}", f"Soyad{n}", f"0555{n:07d}", f"m{n}@example.com") for n in range(30)])
+    # the same customers, before any sale
+    crm.verileri_kaydet(str(tmp_path / "musteriler.json"))
+    for n, mid in enumerate(ids):
+        for k in range(n % 3):
+            crm.musteri_getir(mid).satis_ekle(f"Ürün {k}", k + 1, 99.5 * (k + 1), tarih=f"2023-0{k + 1}-1{k} 10:00:00")
+
+    out = str(tmp_path / ("musteriler" + ext))
+    assert export.export(crm, "customers", out)["rows"] == 30
+    fresh = CRM()
+    stats = bulk_import.import_file(fresh, out)
+    assert (stats["imported"], stats["duplicates"], stats["rejected"]) == (30, 0, 0)
+    assert (sorted((m.ad, m.soyad, m.telefon, m.email) for m in fresh.musteriler.values())
+            == sorted((m.ad, m.soyad, m.telefon, m.email) for m in crm.musteriler.values()))
+    # importing the same file again only finds duplicates
+    assert bulk_import.import_file(fresh, out)["duplicates"] == 30
+
+    out = str(tmp_path / ("satislar" + ext))
+    assert export.export(crm, "sales", out)["rows"] == len(crm_sales(crm))
+    copy = CRM()
+    copy.verileri_yukle(str(tmp_path / "musteriler.json"))
+    stats = bulk_import.import_file(copy, out)
+    assert stats["rejected"] == 0
+    assert crm_sales(copy) == crm_sales(crm)
+
+
+def test_store_sales_round_trip(store, tmp_path):
+    mgr = store.StoreManager()
+    insts = [mgr.add_instrument(f"Enstrüman {i}", 100) for i in range(3)]
+    custs = [mgr.add_customer(f"Ad{n}", f"Soyad{n}", f"0555{n:07d}", f"m{n}@example.com") for n in range(5)]
+    mgr.save_data(str(tmp_path / "store.json"))
+    for n in range(10):
+        mgr.create_sale(custs[n % 5].customer_id, [(insts[n % 3], 1 + n % 2, 25.0 * (n + 1))],
+                        date=f"2022-{1 + n % 12:02d}-01 09:30:00")
+
+    out = str(tmp_path / "sales.csv")
+    assert export.export(mgr, "sales", out)["rows"] == 10
+    copy = store.StoreManager()
+    copy.load_data(str(tmp_path / "store.json"))
+    stats = bulk_import.import_file(copy, out)
+    assert (stats["imported"], stats["rejected"]) == (10, 0)
+
+    def sales(m):
+        return sorted((s.customer_id, s.date, s.total, [(i.instrument_id, q, p) for i, q, p in s.items])
+                      for s in m.sales.values())
+    assert sales(copy) == sales(mgr)
+    assert copy.revenue_by_period("month") == mgr.revenue_by_period("month")
@@ -0,0 +1,63 @@
+import os
+
+from CRM import CRM
+
+
+def fill(crm):
+    ids = crm.musterileri_ekle([("Ali", "Veli", "05550000001", "ali@example.com"),
+                                ("Ayşe", "Kaya", "05550000002", "ayse@example.com")])
+    ali, ayse = (crm.musteri_getir(i) for i in ids)
+    ali.satis_ekle("Gitar", 1, 1500.0)
+    ayse.satis_ekle("Davul", 2, 900.0)
+    talep = ali.destek_talebi_olustur("Akort", "Gitar akordu kaçıyor")
+    crm.destek_durumu_degistir(talep.talep_id, "İşlemde")
+    ayse.musteri_guncelle(soyad="Demir")
+    return ids
+
+
+def reopen(tmp_path, **kw):
+    crm = CRM(gunluk_dosyasi=str(tmp_path / "g.jsonl"), **kw)
+    crm.verileri_yukle(str(tmp_path / "veriler.json"))
+    return crm
+
+
+def test_journal_replays_changes_without_a_snapshot(tmp_path, crm_state):
+    crm = reopen(tmp_path)
+    fill(crm)
+    assert crm.verileri_kaydet(str(tmp_path / "veriler.json"))
+    crm.kapat()
+    assert not os.path.exists(tmp_path / "veriler.json")
+
+    again = reopen(tmp_path)
+    assert crm_state(again) == crm_state(crm)
+    assert again.toplam_satis_tutar() == crm.toplam_satis_tutar()
+    again.kapat()
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path, crm_state):
+    crm = reopen(tmp_path, sikistirma_esigi=3)
+    fill(crm)
+    assert crm.verileri_kaydet(str(tmp_path / "veriler.json"))
+    assert os.path.exists(tmp_path / "veriler.json")
+    assert crm.gunluk.kayit_sayisi == 0
+    # changes after compaction go to the new journal
+    musteri = next(iter(crm.musteriler.values()))
+    musteri.satis_ekle("Bateri", 1, 5000.0)
+    crm.kapat()
+
+    again = reopen(tmp_path)
+    assert crm_state(again) == crm_state(crm)
+    again.kapat()
+
+
+def test_saving_elsewhere_writes_a_full_snapshot(tmp_path, crm_state):
+    crm = reopen(tmp_path)
+    fill(crm)
+    assert crm.verileri_kaydet(str(tmp_path / "kopya.json"))
+    crm.kapat()
+    # the journal's base file is left alone
+    assert not os.path.exists(tmp_path / "veriler.json")
+
+    copy = CRM()
+    copy.verileri_yukle(str(tmp_path / "kopya.json"))
+    assert crm_state(copy) == crm_state(crm)
@@ -0,0 +1,101 @@
+import pytest
+
+from CRM import CRM
+from query import SortedKeys, prefix_range
+
+
+def all_pages(query, limit):
+    # concatenated ids of every page, following the cursor
+    ids, cursor = [], None
+    while True:
+        page, cursor = query(cursor, limit)
+        ids.extend(page)
+        if len(page) < limit:
+            return ids
+
+
+def test_sorted_keys_pages_in_key_order():
+    keys = SortedKeys("n")
+    keys.extend((f"id{i}", (i * 7) % 100) for i in range(100))
+    ids = all_pages(lambda cursor, limit: keys.page(cursor, limit), 9)
+    assert ids == [f"id{i}" for i in sorted(range(100), key=lambda i: (i * 7) % 100)]
+    desc = all_pages(lambda cursor, limit: keys.page(cursor, limit, descending=True), 9)
+    assert desc == ids[::-1]
+
+
+def test_sorted_keys_cursor_is_stable_under_changes():
+    keys = SortedKeys("n")
+    keys.extend((f"id{i:03d}", i) for i in range(100))
+    first, cursor = keys.page(limit=10)
+    # rows inserted before the cursor and removed from the first page do not shift the next page
+    keys.add("early", -1)
+    keys.remove("id000")
+    second, cursor = keys.page(cursor, 10)
+    assert first[-1] == "id009" and second == [f"id{i:03d}" for i in range(10, 20)]
+
+
+def test_sorted_keys_range_and_filter():
+    keys = SortedKeys("ad")
+    keys.extend([("1", "ahmet"), ("2", "ali"), ("3", "ayse"), ("4", "alp"), ("5", "bora")])
+    low, high = prefix_range("al")
+    assert keys.page(low=low, high=high)[0] == ["2", "4"]
+    assert keys.page(where=lambda i: i in ("1", "5"))[0] == ["1", "5"]
+    # a cursor only works on the sort order that issued it
+    with pytest.raises(ValueError):
+        SortedKeys("soyad").page(keys.page(limit=1)[1])
+
+
+def make_crm():
+    crm = CRM()
+    names = ["Ali", "Ayşe", "Ahmet", "Bora", "Can", "Alp", "Deniz", "Ece"]
+    for n in range(40):
+        musteri = crm.musteri_getir(crm.musteri_ekle(names[n % len(names)], f"Soyad{n}", f"0555{n:07d}", f"m{n}@example.com"))
+        if n % 3:
+            musteri.satis_ekle("Gitar", 1, float(n * 10))
+    return crm
+
+
+def test_crm_query_pages_cover_every_customer():
+    crm = make_crm()
+    for sirala in CRM.SIRALAMALAR:
+        for azalan in (False, True):
+            pages = all_pages(lambda imlec, limit: crm.musteri_sorgula(sirala=sirala, azalan=azalan,
+                                                                      imlec=imlec, limit=limit), 7)
+            assert sorted(m.musteri_id for m in pages) == sorted(crm.musteriler)
+    toplamlar = [m.satis_toplami() for m in all_pages(
+        lambda imlec, limit: crm.musteri_sorgula(sirala="toplam", imlec=imlec, limit=limit), 7)]
+    assert toplamlar == sorted(toplamlar)
+
+
+def test_crm_query_filters_and_new_customers():
+    crm = make_crm()
+    a_names = all_pages(lambda imlec, limit: crm.musteri_sorgula(ad_oneki="a", sirala="ad", imlec=imlec,
+                                                                 limit=limit), 4)
+    assert {m.ad for m in a_names} == {"Ali", "Ayşe", "Ahmet", "Alp"}
+    assert len(a_names) == 20
+    in_range = crm.musteri_sorgula(min_toplam=100, max_toplam=200, limit=100)[0]
+    assert all(100 <= m.satis_toplami() <= 200 for m in in_range) and in_range
+
+    # a customer added while paging comes last, nothing is skipped or repeated
+    sayfa, imlec = crm.musteri_sorgula(limit=10)
+    yeni = crm.musteri_ekle("Zeynep", "Yeni", "05559999999", "z@example.com")
+    musteriler = list(sayfa)
+    while len(sayfa) == 10:
+        sayfa, imlec = crm.musteri_sorgula(imlec=imlec, limit=10)
+        musteriler.extend(sayfa)
+    ids = [m.musteri_id for m in musteriler]
+    assert len(ids) == len(set(ids)) == 41 and ids[-1] == yeni
+
+
+def test_store_query_customers(store, tmp_path):
+    mgr = store.StoreManager(storage=store.SQLiteStorage(str(tmp_path / "store.db")))
+    mgr.load_data(str(tmp_path / "missing.json"))
+    custs = [mgr.add_customer(name, f"Soyad{n}", f"0555{n:07d}", f"m{n}@example.com")
+             for n, name in enumerate(["Ali", "Bora", "Alp", "Can", "Ayşe"] * 5)]
+    created = all_pages(lambda cursor, limit: mgr.query_customers(cursor=cursor, limit=limit), 6)
+    assert [c.customer_id for c in created] == [c.customer_id for c in custs]
+    by_name = all_pages(lambda cursor, limit: mgr.query_customers(prefix="al", sort="name", cursor=cursor,
+                                                                  limit=limit), 3)
+    assert len(by_name) == 10 and {c.first_name for c in by_name} == {"Ali", "Alp"}
+    with pytest.raises(ValueError):
+        mgr.query_customers(sort="name", cursor=mgr.query_customers(limit=1)[1])
@@ -0,0 +1,74 @@
+import pytest
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def manager(request, store, tmp_path):
+    storage = store.SQLiteStorage(str(tmp_path / "store.db")) if request.param == "sqlite" else None
+    mgr = store.StoreManager(storage=storage)
+    mgr.load_data(str(tmp_path / "missing.json"))
+    return mgr
+
+
+def stock(mgr, inst):
+    if mgr.storage:
+        return mgr.storage.get_instrument(inst.instrument_id).stock
+    return inst.stock
+
+
+def units(mgr):
+    # ties are ordered by instrument id, which differs between managers
+    return {inst.name: n for inst, n in mgr.top_sellers(10)}
+
+
+def test_sale_rolls_back_when_one_item_is_short(manager):
+    guitar = manager.add_instrument("Gitar", 10)
+    drum = manager.add_instrument("Davul", 1)
+    cust = manager.add_customer("Ali", "Veli", "05550000001", "ali@example.com")
+
+    with pytest.raises(ValueError):
+        manager.create_sale(cust.customer_id, [(guitar, 5, 100.0), (drum, 2, 300.0)])
+    assert stock(manager, guitar) == guitar.stock == 10
+    assert stock(manager, drum) == drum.stock == 1
+    assert manager.get_customer(cust.customer_id).orders == []
+    assert manager.revenue_by_period("month") == []
+    assert manager.top_sellers() == []
+
+
+def test_unknown_customer_is_rejected_before_any_write(manager):
+    guitar = manager.add_instrument("Gitar", 10)
+    with pytest.raises(KeyError):
+        manager.create_sale("no-such-customer", [(guitar, 1, 100.0)])
+    assert stock(manager, guitar) == 10
+    assert manager.revenue_by_period("month") == []
+
+
+def test_sqlite_matches_memory(store, tmp_path):
+    managers = []
+    for storage in (None, store.SQLiteStorage(str(tmp_path / "store.db"))):
+        mgr = store.StoreManager(storage=storage)
+        mgr.load_data(str(tmp_path / "missing.json"))
+        insts = [mgr.add_instrument(f"Enstrüman {i}", 20) for i in range(4)]
+        custs = [mgr.add_customer(f"Ad{i}", f"Soyad{i}", f"0555000000{i}", f"m{i}@example.com") for i in range(3)]
+        # reports are read before and after the sales, so the lazy and the incremental paths both run
+        mgr.revenue_by_period("month")
+        for n in range(12):
+            items = [(insts[n % 4], 1 + n % 3, 10.0 * (n + 1))]
+            if n % 4 == 0:
+                items.append((insts[(n + 1) % 4], 1, 5.0))
+            mgr.create_sale(custs[n % 3].customer_id, items, date=f"2024-{1 + n % 6:02d}-15 12:00:00")
+        managers.append((mgr, insts, custs))
+
+    (mem, mem_insts, mem_custs), (db, db_insts, db_custs) = managers
+    assert mem.revenue_by_period("month") == db.revenue_by_period("month")
+    assert mem.top_instruments(4) == db.top_instruments(4)
+    assert units(mem) == units(db)
+    assert [stock(mem, i) for i in mem_insts] == [stock(db, i) for i in db_insts]
+    for a, b in zip(mem_custs, db_custs):
+        assert ([(s.date, s.total) for s in mem.get_customer(a.customer_id).orders]
+                == [(s.date, s.total) for s in db.get_customer(b.customer_id).orders])
+
+    # a fresh SQLite manager builds the same rollups from the database
+    reopened = store.StoreManager(storage=store.SQLiteStorage(str(tmp_path / "store.db")))
+    reopened.load_data(str(tmp_path / "missing.json"))
+    assert reopened.revenue_by_period("month") == mem.revenue_by_period("month")
+    assert units(reopened) == units(mem)
@@ -0,0 +1,175 @@
+import heapq
+from bisect import bisect_left, insort
+
+# Support-ticket index shared by the CRM and the store. The ticket objects stay
+# in their models; this keeps, per ticket id, (customer, status, created,
+# deadline) and maintains on every change:
+#  - ids by status and by customer, open-ticket counts per customer
+#  - open tickets by creation time (age queries)
+#  - a min-heap of new tickets by SLA deadline: next() is amortized O(log n)
+
+DAY = 86400
+
+
+class TicketStore:
+    def __init__(self, transitions, initial, closed, sla=2 * DAY):
+        # transitions: {status: allowed next statuses}; initial: status of new
+        # (queued) tickets; closed: statuses that do not count as open
+        self.transitions = transitions
+        self.initial = initial
+        self.closed = frozenset(closed)
+        self.sla = sla
+        self._tickets = {}
+        self._by_status = {}
+        self._by_customer = {}
+        self._open_counts = {}
+        self._open_by_age = []
+        # (deadline, created, seq, id, version); seq keeps same-second tickets
+        # first in, first out. Entries whose version is outdated or whose ticket
+        # left the initial status are skipped.
+        self._queue = []
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._tickets)
+
+    def __contains__(self, ticket_id):
+        return ticket_id in self._tickets
+
+    def add(self, ticket_id, customer_id, created, status=None, deadline=None):
+        if ticket_id in self._tickets:
+            return
+        status = status or self.initial
+        if not isinstance(created, int):
+            created = 0  # unparseable legacy date: oldest
+        deadline = created + self.sla if deadline is None else deadline
+        # [customer, status, created, deadline, version]
+        self._tickets[ticket_id] = [customer_id, None, created, deadline, 0]
+        self._by_customer.setdefault(customer_id, []).append(ticket_id)
+        self._set_status(ticket_id, status)
+
+    def extend(self, tickets):
+        # bulk load of (ticket_id, customer_id, created, status): one sort and one
+        # heapify instead of an insort and a heap push per ticket
+        for ticket_id, customer_id, created, status in tickets:
+            if ticket_id in self._tickets:
+                continue
+            status = status or self.initial
+            if not isinstance(created, int):
+                created = 0
+            t = self._tickets[ticket_id] = [customer_id, status, created, created + self.sla, 0]
+            self._by_customer.setdefault(customer_id, []).append(ticket_id)
+            self._by_status.setdefault(status, set()).add(ticket_id)
+            if status not in self.closed:
+                self._open_counts[customer_id] = self._open_counts.get(customer_id, 0) + 1
+                self._open_by_age.append((created, ticket_id))
+            if status == self.initial:
+                t[4] = 1
+                self._seq += 1
+                self._queue.append((t[3], created, self._seq, ticket_id, 1))
+        self._open_by_age.sort()
+        heapq.heapify(self._queue)
+
+    def _set_status(self, ticket_id, status):
+        t = self._tickets[ticket_id]
+        customer_id, old, created = t[0], t[1], t[2]
+        if old is not None:
+            self._by_status[old].discard(ticket_id)
+        self._by_status.setdefault(status, set()).add(ticket_id)
+        t[1] = status
+        was_open = old is not None and old not in self.closed
+        is_open = status not in self.closed
+        if is_open and not was_open:
+            self._open_counts[customer_id] = self._open_counts.get(customer_id, 0) + 1
+            insort(self._open_by_age, (created, ticket_id))
+        elif was_open and not is_open:
+            self._open_counts[customer_id] -= 1
+            i = bisect_left(self._open_by_age, (created, ticket_id))
+            del self._open_by_age[i]
+        if status == self.initial:
+            t[4] += 1
+            self._seq += 1
+            heapq.heappush(self._queue, (t[3], created, self._seq, ticket_id, t[4]))
+
+    def reassign(self, old_customer, new_customer):
+        # moves every ticket of old_customer to new_customer (customer merge)
+        moved = self._by_customer.pop(old_customer, [])
+        for ticket_id in moved:
+            self._tickets[ticket_id][0] = new_customer
+        if moved:
+            self._by_customer.setdefault(new_customer, []).extend(moved)
+        n = self._open_counts.pop(old_customer, 0)
+        if n:
+            self._open_counts[new_customer] = self._open_counts.get(new_customer, 0) + n
+
+    def can_transition(self, ticket_id, status):
+        return status in self.transitions.get(self._tickets[ticket_id][1], ())
+
+    def transition(self, ticket_id, status):
+        if ticket_id not in self._tickets:
+            raise KeyError(ticket_id)
+        if not self.can_transition(ticket_id, status):
+            raise ValueError(f"Geçersiz durum geçişi: {self._tickets[ticket_id][1]} -> {status}")
+        self._set_status(ticket_id, status)
+
+    def status(self, ticket_id):
+        return self._tickets[ticket_id][1]
+
+    def customer(self, ticket_id):
+        return self._tickets[ticket_id][0]
+
+    def deadline(self, ticket_id):
+        return self._tickets[ticket_id][3]
+
+    def with_status(self, status):
+        return list(self._by_status.get(status, ()))
+
+    def for_customer(self, customer_id):
+        return list(self._by_customer.get(customer_id, ()))
+
+    def open_count(self, customer_id):
+        return self._open_counts.get(customer_id, 0)
+
+    def open_total(self):
+        return len(self._open_by_age)
+
+    def opened_before(self, ts):
+        # open tickets created before ts, oldest first
+        return [tid for _, tid in self._open_by_age[:bisect_left(self._open_by_age, (ts,))]]
+
+    def _valid(self, entry):
+        t = self._tickets.get(entry[3])
+        return t is not None and t[1] == self.initial and t[4] == entry[4]
+
+    def next(self):
+        # queued ticket with the earliest deadline, or None
+        queue = self._queue
+        while queue and not self._valid(queue[0]):
+            heapq.heappop(queue)
+        return queue[0][3] if queue else None
+
+    def take_next(self, status):
+        # moves the next queued ticket to `status` (e.g. in progress) and returns its id
+        ticket_id = self.next()
+        if ticket_id is not None:
+            self.transition(ticket_id, status)
+        return ticket_id
+
+    def queue(self, limit=None, due_before=None):
+        # queued ticket ids by deadline; pops valid entries and pushes them back
+        # (O(k log n)), so it never walks the whole heap
+        taken = []
+        while self._queue and (limit is None or len(taken) < limit):
+            entry = heapq.heappop(self._queue)
+            if not self._valid(entry):
+                continue
+            if due_before is not None and entry[0] >= due_before:
+                heapq.heappush(self._queue, entry)
+                break
+            taken.append(entry)
+        for entry in taken:
+            heapq.heappush(self._queue, entry)
+        return [entry[3] for entry in taken]
+
+    def overdue(self, now):
+        return self.queue(due_before=now)